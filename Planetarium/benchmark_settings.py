@@ -0,0 +1,21 @@
+"""
+Settings for load benchmarks (see the benchmark_async_catalog command):
+the project settings without the debug toolbar, query logging and
+throttling, which would otherwise dominate the numbers.
+"""
+
+from Planetarium.settings import *  # noqa: F401,F403
+from Planetarium.settings import MIDDLEWARE, REST_FRAMEWORK
+
+DEBUG = False
+
+MIDDLEWARE = [
+    middleware
+    for middleware in MIDDLEWARE
+    if not middleware.startswith("debug_toolbar")
+]
+
+REST_FRAMEWORK = {
+    **REST_FRAMEWORK,
+    "DEFAULT_THROTTLE_CLASSES": [],
+}
@@ -50,6 +50,7 @@ INSTALLED_APPS = [
     "django.contrib.sessions",
     "django.contrib.messages",
     "django.contrib.staticfiles",
+    "django.contrib.postgres",
     "rest_framework",
     "drf_spectacular",
     "shows",
@@ -113,6 +114,25 @@ DATABASES = {
     }
 }
 
+# Cache
+# https://docs.djangoproject.com/en/5.0/topics/cache/
+# Local memory is private to each process; set REDIS_URL when running
+# several workers so they share cached responses and invalidations.
+
+if os.environ.get("REDIS_URL"):
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.redis.RedisCache",
+            "LOCATION": os.environ["REDIS_URL"],
+        }
+    }
+else:
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        }
+    }
+
 # Password validation
 # https://docs.djangoproject.com/en/5.0/ref/settings/#auth-password-validators
 
@@ -154,6 +174,16 @@ MEDIA_URL = "/media/"
 
 MEDIA_ROOT = "/files/media"
 
+# Header that hands media files to the web server in front instead of
+# streaming them from Django: "X-Accel-Redirect" for nginx, "X-Sendfile"
+# for Apache mod_xsendfile or lighttpd. Unset, Django serves them itself.
+MEDIA_SENDFILE_HEADER = os.environ.get("MEDIA_SENDFILE_HEADER")
+
+# nginx `internal` location aliased to MEDIA_ROOT, for X-Accel-Redirect.
+MEDIA_ACCEL_REDIRECT_LOCATION = os.environ.get(
+    "MEDIA_ACCEL_REDIRECT_LOCATION", "/protected-media/"
+)
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.0/ref/settings/#default-auto-field
 
@@ -161,7 +191,7 @@ DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
 
 REST_FRAMEWORK = {
     "DEFAULT_AUTHENTICATION_CLASSES": (
-        "rest_framework_simplejwt.authentication.JWTAuthentication",
+        "user.authentication.StatelessJWTAuthentication",
     ),
     "DEFAULT_PERMISSION_CLASSES": (
         "shows.permissions.IsAdminOrIfAuthenticatedReadOnly",
@@ -169,10 +199,12 @@ REST_FRAMEWORK = {
     "DEFAULT_SCHEMA_CLASS": "drf_spectacular.openapi.AutoSchema",
 }
 
+# Throttle counters live in the cache, shared by every worker when
+# REDIS_URL is set. Views weigh costly actions with throttle_costs.
 if not IS_RUNNING_TESTS:
     REST_FRAMEWORK["DEFAULT_THROTTLE_CLASSES"] = [
-        "rest_framework.throttling.AnonRateThrottle",
-        "rest_framework.throttling.UserRateThrottle",
+        "shows.throttling.AnonRateThrottle",
+        "shows.throttling.UserRateThrottle",
     ]
     REST_FRAMEWORK["DEFAULT_THROTTLE_RATES"] = {
         "anon": "30/day", "user": "300/day"
@@ -182,4 +214,23 @@ SIMPLE_JWT = {
     "ACCESS_TOKEN_LIFETIME": timedelta(days=1),
     "REFRESH_TOKEN_LIFETIME": timedelta(days=5),
     "ROTATE_REFRESH_TOKENS": False,
+    "TOKEN_OBTAIN_SERIALIZER": "user.serializers.TokenObtainPairSerializer",
+    "TOKEN_REFRESH_SERIALIZER": "user.serializers.TokenRefreshSerializer",
 }
+
+# Seconds a full user loaded for a token user, or a token version read
+# from the database, stays cached; saves invalidate them earlier.
+USER_CACHE_TIMEOUT = 60
+
+# Seconds a catalog response stays cached; writes invalidate it earlier.
+CATALOG_CACHE_TIMEOUT = 60 * 15
+
+# Seconds a computed seat map stays cached; tickets invalidate it earlier.
+SEAT_MAP_CACHE_TIMEOUT = 60
+
+# Requests an ASGI worker runs async views for at once; each holds a
+# database connection while it runs, the others wait on the event loop.
+ASYNC_VIEW_CONCURRENCY = 16
+
+# How long selected seats stay reserved for a user before checkout.
+SEAT_HOLD_TTL = timedelta(minutes=10)
@@ -15,11 +15,12 @@ Including another URLconf
     2. Add a URL to urlpatterns:  path('blog/', include('blog.urls'))
 """
 from django.conf import settings
-from django.conf.urls.static import static
 from django.contrib import admin
 from django.urls import path, include
 from drf_spectacular.views import SpectacularAPIView, SpectacularSwaggerView
 
+from shows.media import serve_media
+
 urlpatterns = [
     path("admin/", admin.site.urls),
     path("api/", include("shows.urls", namespace="shows")),
@@ -31,4 +32,9 @@ urlpatterns = [
         SpectacularSwaggerView.as_view(url_name='schema'),
         name='docs'
     ),
-] + static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
+    path(
+        f"{settings.MEDIA_URL.strip('/')}/<path:path>",
+        serve_media,
+        name="media",
+    ),
+]
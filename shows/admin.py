@@ -6,7 +6,8 @@ from .models import (
     PlanetariumDome,
     ShowSession,
     Reservation,
-    Ticket
+    Ticket,
+    SeatHold,
 )
 
 admin.site.register(AstronomyShow)
@@ -15,3 +16,4 @@ admin.site.register(PlanetariumDome)
 admin.site.register(ShowSession)
 admin.site.register(Reservation)
 admin.site.register(Ticket)
+admin.site.register(SeatHold)
@@ -0,0 +1,196 @@
+import asyncio
+import weakref
+from functools import partial
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.http import Http404, HttpResponse
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date
+from django.views import View
+from rest_framework.renderers import JSONRenderer
+from rest_framework.response import Response
+
+from shows.catalog_cache import CatalogCacheMixin, catalog_cache_key
+from shows.conditional import (
+    ConditionalGetMixin,
+    data_etag,
+    lookup_queryset,
+)
+from shows.seat_map import aget_seat_map
+from shows.values_list import ValuesListMixin, render_values, values_plan
+
+
+class AsyncCatalogView(View):
+    """Async, JSON-only variant of a read action of ``viewset_class``
+    for ASGI deployments, with the same output, filters, permissions,
+    throttling, validators and catalog cache.
+
+    Rows are fetched with the async ORM, so a worker keeps serving other
+    connections while a request waits on the database or the cache."""
+
+    viewset_class = None
+    action = None
+
+    async def get(self, request, *args, **kwargs):
+        view = self.viewset_class(
+            action=self.action,
+            action_map={"get": self.action},
+            args=args,
+            kwargs=kwargs,
+            format_kwarg=None,
+            renderer_classes=[JSONRenderer],
+        )
+        view.headers = view.default_response_headers
+        request = view.request = view.initialize_request(
+            request, *args, **kwargs
+        )
+        async with concurrency_limit():
+            try:
+                # Authentication, permissions and throttles are the
+                # viewset's own, run in one hop to a worker thread.
+                await sync_to_async(view.initial)(request, *args, **kwargs)
+                response = await getattr(self, self.action)(view, request)
+            except Exception as exc:
+                response = view.handle_exception(exc)
+        return rendered(view.finalize_response(request, response))
+
+    async def list(self, view, request):
+        """ConditionalGetMixin.list on CatalogCacheMixin.list."""
+        queryset = view.filter_queryset(view.get_queryset())
+        response = Response(
+            await self.cached_data(
+                view, request, partial(self.list_data, view, queryset)
+            )
+        )
+        if isinstance(view, ConditionalGetMixin):
+            etag = data_etag(response.data, request)
+            not_modified = get_conditional_response(request, etag=etag)
+            if not_modified is not None:
+                response = not_modified
+            response["ETag"] = etag
+        return response
+
+    async def retrieve(self, view, request):
+        """ConditionalGetMixin.retrieve on CatalogCacheMixin.retrieve."""
+        get_data = partial(self.retrieve_data, view)
+        if not isinstance(view, ConditionalGetMixin):
+            return Response(await self.cached_data(view, request, get_data))
+
+        etag, last_modified = await view.aget_validators(
+            lookup_queryset(view), request
+        )
+        response = get_conditional_response(
+            request, etag=etag, last_modified=last_modified
+        )
+        if response is None:
+            response = Response(
+                await self.cached_data(view, request, get_data)
+            )
+        response["ETag"] = etag
+        if last_modified is not None:
+            response["Last-Modified"] = http_date(last_modified)
+        return response
+
+    async def seat_map(self, view, request):
+        return Response(
+            await aget_seat_map(
+                view.kwargs["pk"], partial(self.aget_object, view)
+            )
+        )
+
+    async def cached_data(self, view, request, get_data):
+        if not isinstance(view, CatalogCacheMixin):
+            return await get_data()
+
+        key = await sync_to_async(catalog_cache_key)(
+            request,
+            view.catalog_cache_resource,
+            view.action,
+            view.kwargs.get(view.lookup_url_kwarg or view.lookup_field),
+        )
+        data = await cache.aget(key)
+        if data is None:
+            data = await get_data()
+            await cache.aset(key, data, settings.CATALOG_CACHE_TIMEOUT)
+        return data
+
+    @staticmethod
+    async def list_data(view, queryset):
+        plan = None
+        if isinstance(view, ValuesListMixin):
+            plan = values_plan(queryset, view.get_serializer())
+        if plan is None:
+            def render(rows):
+                return view.get_serializer(rows, many=True).data
+        else:
+            queryset = view.values_queryset(queryset, plan)
+            render = partial(render_values, plan)
+
+        if view.paginator is not None:
+            # The paginator runs its own page query, and may read from the
+            # rows to build its links; both stay in one worker thread.
+            def paginated_data():
+                page = view.paginate_queryset(queryset)
+                return view.get_paginated_response(render(page)).data
+
+            return await sync_to_async(paginated_data)()
+        return render([row async for row in queryset])
+
+    async def retrieve_data(self, view):
+        return view.get_serializer(await self.aget_object(view)).data
+
+    @staticmethod
+    async def aget_object(view):
+        """GenericAPIView.get_object with the async ORM."""
+        queryset = view.filter_queryset(view.get_queryset())
+        lookup_url_kwarg = view.lookup_url_kwarg or view.lookup_field
+        try:
+            obj = await queryset.aget(
+                **{view.lookup_field: view.kwargs[lookup_url_kwarg]}
+            )
+        except (
+            queryset.model.DoesNotExist,
+            TypeError,
+            ValueError,
+            DjangoValidationError,
+        ):
+            raise Http404(
+                f"No {queryset.model._meta.object_name} matches the given "
+                f"query."
+            )
+        view.check_object_permissions(view.request, obj)
+        return obj
+
+
+_limits = weakref.WeakKeyDictionary()
+
+
+def concurrency_limit():
+    """Bound the requests of an event loop running at once.
+
+    Each ASGI request runs its ORM calls in a thread of its own, holding
+    its own database connection, so without a bound a burst of clients
+    turns into as many threads and connections. Requests over the limit
+    wait on the event loop, which costs next to nothing."""
+    loop = asyncio.get_running_loop()
+    if loop not in _limits:
+        _limits[loop] = asyncio.Semaphore(
+            settings.ASYNC_VIEW_CONCURRENCY
+        )
+    return _limits[loop]
+
+
+def rendered(response):
+    """Django renders a deferred response in a worker thread; hand it
+    the finished bytes instead."""
+    if not hasattr(response, "render"):
+        return response
+    response.render()
+    return HttpResponse(
+        response.content,
+        status=response.status_code,
+        headers=dict(response.items()),
+    )
@@ -0,0 +1,93 @@
+import hashlib
+import uuid
+from urllib.parse import urlencode
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from rest_framework import status
+from rest_framework.response import Response
+
+
+def catalog_version_key(resource):
+    return f"catalog:{resource}:version"
+
+
+def catalog_version(resource):
+    """Current generation of a catalog resource; every cached response
+    of the resource is keyed on it."""
+    key = catalog_version_key(resource)
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, uuid.uuid4().hex, timeout=None)
+        version = cache.get(key)
+    return version
+
+
+def invalidate_catalog(*resources):
+    """Start a new generation of the resources, orphaning their cached
+    responses. The bump is repeated on commit so a read racing the write
+    cannot cache pre-commit rows under the new generation."""
+
+    def bump():
+        cache.set_many(
+            {
+                catalog_version_key(resource): uuid.uuid4().hex
+                for resource in resources
+            },
+            timeout=None,
+        )
+
+    bump()
+    transaction.on_commit(bump)
+
+
+def catalog_cache_key(request, resource, action, pk=None):
+    """Cache key of a response, independent of query parameter order.
+    The host is part of it because image fields are absolute URLs."""
+    params = urlencode(
+        [
+            (name, values)
+            for name, values in sorted(request.query_params.lists())
+            if any(values)
+        ],
+        doseq=True,
+    )
+    digest = hashlib.md5(
+        f"{request.build_absolute_uri('/')}?{params}".encode()
+    ).hexdigest()
+    return (
+        f"catalog:{resource}:{catalog_version(resource)}:"
+        f"{action}:{pk}:{digest}"
+    )
+
+
+class CatalogCacheMixin:
+    """Serve list and retrieve from the cache until a write to
+    ``catalog_cache_resource`` invalidates it (see shows.signals)."""
+
+    catalog_cache_resource = None
+
+    def list(self, request, *args, **kwargs):
+        return self.cached_response(super().list, request, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.cached_response(
+            super().retrieve, request, *args, **kwargs
+        )
+
+    def cached_response(self, view, request, *args, **kwargs):
+        key = catalog_cache_key(
+            request,
+            self.catalog_cache_resource,
+            self.action,
+            kwargs.get(self.lookup_url_kwarg or self.lookup_field),
+        )
+        data = cache.get(key)
+        if data is not None:
+            return Response(data)
+
+        response = view(request, *args, **kwargs)
+        if response.status_code == status.HTTP_200_OK:
+            cache.set(key, response.data, settings.CATALOG_CACHE_TIMEOUT)
+        return response
@@ -0,0 +1,116 @@
+import hashlib
+
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.db.models import Count, Max
+from django.http import Http404
+from django.utils import timezone
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date
+from rest_framework.renderers import JSONRenderer
+
+
+def data_etag(data, request):
+    """Weak ETag of response data as the accepted renderer serves it."""
+    digest = hashlib.md5(
+        request.accepted_renderer.format.encode()
+        + JSONRenderer().render(data)
+    ).hexdigest()
+    return f'W/"{digest}"'
+
+
+def lookup_queryset(view):
+    """The view's queryset filtered on the URL's lookup, as get_object
+    would; a lookup the field cannot take is a 404, not a server error."""
+    lookup_url_kwarg = view.lookup_url_kwarg or view.lookup_field
+    try:
+        return view.get_queryset().filter(
+            **{view.lookup_field: view.kwargs[lookup_url_kwarg]}
+        )
+    except (TypeError, ValueError, DjangoValidationError):
+        raise Http404(
+            f"No {view.get_queryset().model._meta.object_name} matches the "
+            f"given query."
+        )
+
+
+class ConditionalGetMixin:
+    """Answer list and retrieve with 304 Not Modified when the client's
+    validators still match.
+
+    A list's ETag is a digest of the page served, so it costs no query
+    beyond the page's own, or none on a catalog cache hit. An object's
+    validators come from one aggregate query over its row, run instead
+    of serializing it; ``conditional_updated_fields`` are the
+    ``updated_at`` lookups its representation depends on, including
+    those of nested objects."""
+
+    conditional_updated_fields = ("updated_at",)
+
+    def list(self, request, *args, **kwargs):
+        response = super().list(request, *args, **kwargs)
+        if response.status_code != 200:
+            return response
+        etag = data_etag(response.data, request)
+        not_modified = get_conditional_response(request, etag=etag)
+        if not_modified is not None:
+            response = not_modified
+        response["ETag"] = etag
+        return response
+
+    def retrieve(self, request, *args, **kwargs):
+        etag, last_modified = self.get_validators(
+            lookup_queryset(self), request
+        )
+        response = get_conditional_response(
+            request, etag=etag, last_modified=last_modified
+        )
+        if response is None:
+            response = super().retrieve(request, *args, **kwargs)
+        if response.status_code in (200, 304):
+            response["ETag"] = etag
+            if last_modified is not None:
+                response["Last-Modified"] = http_date(last_modified)
+        return response
+
+    def get_validators(self, queryset, request):
+        return self.validators_from_probe(
+            queryset.order_by().aggregate(**self.validator_aggregates()),
+            request,
+        )
+
+    async def aget_validators(self, queryset, request):
+        return self.validators_from_probe(
+            await queryset.order_by().aaggregate(
+                **self.validator_aggregates()
+            ),
+            request,
+        )
+
+    def validator_aggregates(self):
+        return {
+            "count": Count("pk"),
+            **{
+                f"updated_{index}": Max(field)
+                for index, field in enumerate(self.conditional_updated_fields)
+            },
+        }
+
+    def validators_from_probe(self, probe, request):
+        """ETag over the row count and latest updates of the object's
+        row, Last-Modified from the latest update."""
+        count = probe.pop("count")
+        updated = [value for value in probe.values() if value is not None]
+        etag = hashlib.md5(
+            ":".join(
+                [
+                    request.accepted_renderer.format,
+                    str(count),
+                    *(value.isoformat() for value in updated),
+                ]
+            ).encode()
+        ).hexdigest()
+
+        last_modified = None
+        if updated:
+            last_modified = int(timezone.make_aware(max(updated)).timestamp())
+        return f'W/"{etag}"', last_modified
@@ -0,0 +1,78 @@
+import csv
+import json
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import F
+from django.http import StreamingHttpResponse
+from rest_framework.renderers import BaseRenderer
+
+EXPORT_CHUNK_SIZE = 2000
+
+
+class Echo:
+    """File-like object handing each written CSV line back to the
+    caller instead of buffering it."""
+
+    def write(self, value):
+        return value
+
+
+class NDJSONRenderer(BaseRenderer):
+    media_type = "application/x-ndjson"
+    format = "ndjson"
+    charset = "utf-8"
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        return self.line(data).encode()
+
+    def line(self, row):
+        return json.dumps(row, cls=DjangoJSONEncoder) + "\n"
+
+    def stream(self, columns, rows):
+        for row in rows:
+            yield self.line({column: row[column] for column in columns})
+
+
+class CSVRenderer(BaseRenderer):
+    media_type = "text/csv"
+    format = "csv"
+    charset = "utf-8"
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        """Errors are the only responses rendered whole: one line per
+        field and message."""
+        writer = csv.writer(Echo())
+        if not isinstance(data, dict):
+            data = {"detail": data}
+        return "".join(
+            writer.writerow([key, value]) for key, value in data.items()
+        ).encode()
+
+    def stream(self, columns, rows):
+        writer = csv.writer(Echo())
+        yield writer.writerow(columns)
+        for row in rows:
+            yield writer.writerow([row[column] for column in columns])
+
+
+def export_response(request, queryset, columns, filename):
+    """Stream ``queryset`` in the negotiated format. ``columns`` maps
+    each output column to a lookup or expression. Rows come from a
+    server-side cursor, so memory does not grow with the export size."""
+    renderer = request.accepted_renderer
+    rows = queryset.values(
+        *(name for name, lookup in columns.items() if name == lookup),
+        **{
+            name: F(lookup) if isinstance(lookup, str) else lookup
+            for name, lookup in columns.items()
+            if name != lookup
+        },
+    ).iterator(chunk_size=EXPORT_CHUNK_SIZE)
+    response = StreamingHttpResponse(
+        renderer.stream(list(columns), rows),
+        content_type=f"{renderer.media_type}; charset={renderer.charset}",
+    )
+    response["Content-Disposition"] = (
+        f'attachment; filename="{filename}.{renderer.format}"'
+    )
+    return response
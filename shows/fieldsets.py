@@ -0,0 +1,188 @@
+from django.core.exceptions import FieldDoesNotExist
+from django.db.models import Prefetch
+from django.utils.module_loading import import_string
+from rest_framework import serializers
+from rest_framework.exceptions import ValidationError
+
+from shows.pagination import ordering_fields
+
+
+class UnplannableField(Exception):
+    """A field reads data that cannot be told from its source."""
+
+
+class QueryPlan:
+    """Columns and relations needed to render serializer fields."""
+
+    def __init__(self, queryset):
+        self.model = queryset.model
+        self.annotations = set(queryset.query.annotations)
+        self.only = []
+        self.select_related = []
+        self.prefetch_related = []
+
+    def apply(self, queryset):
+        queryset = queryset.select_related(None).prefetch_related(None)
+        if self.select_related:
+            queryset = queryset.select_related(*self.select_related)
+        return queryset.only(*self.only).prefetch_related(
+            *self.prefetch_related
+        )
+
+    def add_fields(self, fields, model, prefix=""):
+        for field in fields:
+            if field.write_only:
+                continue
+            if field.source == "*":
+                if not isinstance(field, serializers.BaseSerializer):
+                    raise UnplannableField(field.field_name)
+                self.add_fields(field.fields.values(), model, prefix)
+            else:
+                self.add_source(field, model, prefix)
+
+    def add_source(self, field, model, prefix):
+        for index, attr in enumerate(field.source_attrs):
+            last = index == len(field.source_attrs) - 1
+            try:
+                model_field = model._meta.get_field(attr)
+            except FieldDoesNotExist:
+                if not prefix and attr in self.annotations:
+                    return
+                # A property: it may read any column of the row.
+                self.add_all_columns(model, prefix)
+                return
+
+            if not model_field.is_relation:
+                self.only.append(prefix + attr)
+                return
+            if model_field.many_to_many or model_field.one_to_many:
+                if not last:
+                    raise UnplannableField(field.field_name)
+                self.add_prefetch(field, model_field, prefix + attr)
+                return
+            if not model_field.concrete:
+                raise UnplannableField(field.field_name)
+            if last and isinstance(field, serializers.PrimaryKeyRelatedField):
+                self.only.append(prefix + attr)
+                return
+
+            self.only.append(prefix + attr)
+            self.select_related.append(prefix + attr)
+            model = model_field.related_model
+            prefix += f"{attr}__"
+        self.add_object(field, model, prefix)
+
+    def add_object(self, field, model, prefix):
+        """Columns for a related object rendered by ``field``."""
+        if isinstance(field, serializers.BaseSerializer):
+            self.add_fields(field.fields.values(), model, prefix)
+        elif isinstance(field, serializers.PrimaryKeyRelatedField):
+            self.only.append(prefix + model._meta.pk.name)
+        elif isinstance(field, serializers.SlugRelatedField):
+            self.only.append(prefix + field.slug_field)
+        else:
+            self.add_all_columns(model, prefix)
+
+    def add_all_columns(self, model, prefix):
+        self.only += [
+            prefix + model_field.name
+            for model_field in model._meta.concrete_fields
+        ]
+
+    def add_prefetch(self, field, model_field, lookup):
+        if isinstance(field, serializers.ManyRelatedField):
+            child = field.child_relation
+        elif isinstance(field, serializers.ListSerializer):
+            child = field.child
+        else:
+            raise UnplannableField(field.field_name)
+
+        related_model = model_field.related_model
+        plan = QueryPlan(related_model._default_manager.all())
+        plan.add_object(child, related_model, "")
+        if model_field.one_to_many:
+            # Prefetching matches the rows to their parent by this key.
+            plan.only.append(model_field.field.name)
+        self.prefetch_related.append(
+            Prefetch(
+                lookup,
+                queryset=plan.apply(related_model._default_manager.all()),
+            )
+        )
+
+
+def fieldset_queryset(queryset, serializer, extra_fields=()):
+    """Load only what ``serializer`` renders, and ``extra_fields``, or
+    return ``queryset`` unchanged when that cannot be worked out."""
+    plan = QueryPlan(queryset)
+    try:
+        plan.add_fields(serializer.fields.values(), queryset.model)
+    except UnplannableField:
+        return queryset
+    plan.only += extra_fields
+    return plan.apply(queryset)
+
+
+def split_param(request, name):
+    value = request.query_params.get(name)
+    if value is None:
+        return None
+    return [item.strip() for item in value.split(",") if item.strip()]
+
+
+class SparseFieldsetMixin:
+    """``?fields=`` limits the list output to the named columns and
+    ``?expand=`` nests the relations the serializer declares expandable;
+    the queryset loads just what the resulting serializer needs."""
+
+    def get_serializer(self, *args, **kwargs):
+        if self.action == "list":
+            kwargs.setdefault("fields", split_param(self.request, "fields"))
+            kwargs.setdefault(
+                "expand", split_param(self.request, "expand") or ()
+            )
+        return super().get_serializer(*args, **kwargs)
+
+    def filter_queryset(self, queryset):
+        queryset = super().filter_queryset(queryset)
+        if self.action == "list":
+            # The paginator reads its ordering from the page's rows.
+            queryset = fieldset_queryset(
+                queryset,
+                self.get_serializer(),
+                ordering_fields(self.paginator),
+            )
+        return queryset
+
+
+class ExpandableFieldsMixin:
+    """Serializer side of SparseFieldsetMixin.
+
+    ``Meta.expandable_fields`` maps a field name to a serializer class (or
+    its name in the same module) and the keyword arguments to build it
+    with when the field is expanded."""
+
+    def __init__(self, *args, fields=None, expand=(), **kwargs):
+        super().__init__(*args, **kwargs)
+        expandable = getattr(self.Meta, "expandable_fields", {})
+        unknown = set(expand) - set(expandable)
+        if unknown:
+            raise ValidationError(
+                {"expand": f"cannot expand {', '.join(sorted(unknown))}"}
+            )
+        for name in expand:
+            serializer_class, serializer_kwargs = expandable[name]
+            if isinstance(serializer_class, str):
+                serializer_class = import_string(
+                    f"{type(self).__module__}.{serializer_class}"
+                )
+            self.fields[name] = serializer_class(**serializer_kwargs)
+
+        if fields is not None:
+            unknown = set(fields) - set(self.fields)
+            if unknown:
+                raise ValidationError(
+                    {"fields": f"unknown fields {', '.join(sorted(unknown))}"}
+                )
+            for name in set(self.fields) - set(fields):
+                self.fields.pop(name)
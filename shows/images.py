@@ -0,0 +1,81 @@
+import io
+import pathlib
+
+from django.core.files.base import ContentFile
+from PIL import Image, ImageOps
+
+from shows.storage import image_storage
+
+# Bounding boxes, smallest first: variants keep the aspect ratio and are
+# never upscaled.
+IMAGE_VARIANTS = {
+    "thumbnail": (160, 160),
+    "card": (640, 480),
+    "hero": (1920, 1080),
+}
+IMAGE_FORMATS = {
+    "webp": ("WEBP", {"quality": 80, "method": 4}),
+    "jpeg": ("JPEG", {"quality": 82, "optimize": True, "progressive": True}),
+}
+
+
+def encode(image, image_format):
+    pil_format, options = IMAGE_FORMATS[image_format]
+    if pil_format == "JPEG" and image.mode != "RGB":
+        image = image.convert("RGBA")
+        flattened = Image.new("RGB", image.size, "white")
+        flattened.paste(image, mask=image.getchannel("A"))
+        image = flattened
+    elif image.mode not in ("RGB", "RGBA"):
+        image = image.convert("RGBA")
+    output = io.BytesIO()
+    image.save(output, pil_format, **options)
+    return output.getvalue()
+
+
+def render_variants(data):
+    """Every variant of the image in ``data`` in every format, as
+    ``{variant: {format: bytes}}``. Runs in worker processes, so it only
+    takes and returns plain data."""
+    with Image.open(io.BytesIO(data)) as image:
+        # JPEGs can be decoded straight at a fraction of their size; the
+        # square box leaves room for EXIF rotation.
+        longest = max(max(size) for size in IMAGE_VARIANTS.values())
+        image.draft("RGB", (longest, longest))
+        image = ImageOps.exif_transpose(image)
+        rendered = {}
+        # Each box fits in the previous one, so every variant is resized
+        # from the last instead of from the full original.
+        for variant, size in reversed(IMAGE_VARIANTS.items()):
+            image = image.copy()
+            image.thumbnail(size, Image.Resampling.LANCZOS)
+            rendered[variant] = {
+                image_format: encode(image, image_format)
+                for image_format in IMAGE_FORMATS
+            }
+        return rendered
+
+
+def variant_name(source, variant, image_format):
+    """Variants live next to the original: ``<stem>.<variant>.<format>``."""
+    path = pathlib.PurePosixPath(source)
+    return str(path.with_name(f"{path.stem}.{variant}.{image_format}"))
+
+
+def store_variants(source, rendered):
+    """Save rendered variants and describe them for
+    ``AstronomyShow.image_variants``. Variants are derived from a
+    content-addressed original, so their names are stable too."""
+    return {
+        "source": source,
+        "variants": {
+            variant: {
+                image_format: image_storage.save(
+                    variant_name(source, variant, image_format),
+                    ContentFile(data),
+                )
+                for image_format, data in formats.items()
+            }
+            for variant, formats in rendered.items()
+        },
+    }
@@ -0,0 +1,263 @@
+import asyncio
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import time
+import uuid
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management import BaseCommand, CommandError
+from django.urls import reverse
+
+from shows.models import ShowSession
+from user.tokens import UserRefreshToken
+
+
+class Command(BaseCommand):
+    """Django command to load test the catalog on WSGI and ASGI servers"""
+
+    help = (
+        "Serve the project with gunicorn (sync views) and with uvicorn "
+        "(async views) in turn, with the same number of worker processes, "
+        "and report requests per second and latency percentiles under many "
+        "concurrent keep-alive clients."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--clients", type=int, default=1000)
+        parser.add_argument(
+            "--duration",
+            type=float,
+            default=20,
+            help="Seconds measured per server.",
+        )
+        parser.add_argument(
+            "--warmup",
+            type=float,
+            default=5,
+            help="Seconds of load before measuring.",
+        )
+        parser.add_argument("--workers", type=int, default=2)
+        parser.add_argument(
+            "--threads",
+            type=int,
+            default=16,
+            help="Threads per gunicorn worker.",
+        )
+
+    def handle(self, *args, **options):
+        show_session = ShowSession.objects.order_by("show_time").last()
+        if show_session is None:
+            raise CommandError("There are no show sessions to request.")
+        user = get_user_model().objects.create_user(
+            email=f"benchmark-{uuid.uuid4().hex}@example.com",
+            password=uuid.uuid4().hex,
+        )
+        token = str(UserRefreshToken.for_user(user).access_token)
+        workers, threads = options["workers"], options["threads"]
+        servers = [
+            (
+                f"WSGI, gunicorn {workers}x{threads} threads",
+                "",
+                [
+                    "gunicorn",
+                    "Planetarium.wsgi:application",
+                    "--worker-class=gthread",
+                    f"--workers={workers}",
+                    f"--threads={threads}",
+                    "--log-level=warning",
+                    "--bind=127.0.0.1:{port}",
+                ],
+            ),
+            (
+                f"ASGI, uvicorn {workers} workers",
+                "async-",
+                [
+                    "uvicorn",
+                    "Planetarium.asgi:application",
+                    f"--workers={workers}",
+                    "--log-level=warning",
+                    "--no-access-log",
+                    "--host=127.0.0.1",
+                    "--port={port}",
+                ],
+            ),
+        ]
+        try:
+            for name, route_prefix, command in servers:
+                paths = self.paths(route_prefix, show_session)
+                with Server(command) as port:
+                    result = asyncio.run(
+                        load(
+                            port,
+                            paths,
+                            token,
+                            options["clients"],
+                            options["warmup"],
+                            options["duration"],
+                        )
+                    )
+                self.report(name, result, options["duration"])
+        finally:
+            user.delete()
+
+    @staticmethod
+    def paths(route_prefix, show_session):
+        """One request of each read endpoint, the list filtered the way a
+        dome's daily programme is."""
+
+        def url(name, *args):
+            return reverse(f"shows:{route_prefix}{name}", args=args)
+
+        return [
+            url("astronomyshow-list"),
+            url("showtheme-list"),
+            url("planetariumdome-list"),
+            url("astronomyshow-detail", show_session.astronomy_show_id),
+            url("showsession-list")
+            + f"?planetarium_dome={show_session.planetarium_dome_id}"
+            + f"&date={show_session.show_time.date()}",
+            url("showsession-detail", show_session.id),
+            url("showsession-seat-map", show_session.id),
+        ]
+
+    def report(self, name, result, duration):
+        latencies, statuses = result
+        if not latencies:
+            self.stdout.write(f"{name}: no responses")
+            return
+        percentiles = statistics.quantiles(latencies, n=100)
+        failed = sum(
+            count
+            for status, count in statuses.items()
+            if status not in (200, 304)
+        )
+        self.stdout.write(
+            f"{name}: {len(latencies) / duration:.0f} requests/s, "
+            f"p50 {percentiles[49] * 1000:.0f} ms, "
+            f"p99 {percentiles[98] * 1000:.0f} ms, "
+            f"{failed} failed "
+            f"({', '.join(f'{s}: {c}' for s, c in sorted(statuses.items()))})"
+        )
+
+
+class Server:
+    """A server subprocess on a free local port, using the benchmark
+    settings."""
+
+    def __init__(self, command):
+        with socket.socket() as probe:
+            probe.bind(("127.0.0.1", 0))
+            self.port = probe.getsockname()[1]
+        self.command = [part.format(port=self.port) for part in command]
+
+    def __enter__(self):
+        env = {
+            **os.environ,
+            "DJANGO_SETTINGS_MODULE": "Planetarium.benchmark_settings",
+        }
+        self.process = subprocess.Popen(
+            [sys.executable, "-m", *self.command],
+            cwd=settings.BASE_DIR,
+            env=env,
+        )
+        deadline = time.monotonic() + 30
+        while time.monotonic() < deadline:
+            if self.process.poll() is not None:
+                raise CommandError(f"{self.command[0]} exited")
+            try:
+                socket.create_connection(("127.0.0.1", self.port)).close()
+                return self.port
+            except OSError:
+                time.sleep(0.2)
+        self.process.kill()
+        raise CommandError(f"{self.command[0]} did not start")
+
+    def __exit__(self, *exc_info):
+        self.process.terminate()
+        self.process.wait()
+
+
+async def load(port, paths, token, clients, warmup, duration):
+    """Keep ``clients`` connections busy, each sending its next request
+    as soon as the previous response is in. Returns the latencies of the
+    responses completed after the warmup and the count of each status."""
+    loop = asyncio.get_running_loop()
+    measure_from = loop.time() + warmup
+    requests = [
+        (
+            f"GET {path} HTTP/1.1\r\n"
+            f"Host: localhost\r\n"
+            f"Authorization: Bearer {token}\r\n"
+            f"\r\n"
+        ).encode()
+        for path in paths
+    ]
+    latencies = []
+    statuses = {}
+
+    async def client(offset):
+        reader = writer = None
+        sent = offset
+        try:
+            while True:
+                if writer is None:
+                    try:
+                        reader, writer = await asyncio.open_connection(
+                            "127.0.0.1", port
+                        )
+                    except OSError:
+                        await asyncio.sleep(0.1)
+                        continue
+                started = loop.time()
+                try:
+                    writer.write(requests[sent % len(requests)])
+                    status, keep_alive = await read_response(reader)
+                except (OSError, asyncio.IncompleteReadError):
+                    status, keep_alive = 0, False
+                sent += 1
+                if loop.time() >= measure_from:
+                    latencies.append(loop.time() - started)
+                    statuses[status] = statuses.get(status, 0) + 1
+                if not keep_alive:
+                    writer.close()
+                    writer = None
+        finally:
+            if writer is not None:
+                writer.close()
+
+    tasks = [
+        asyncio.create_task(client(offset)) for offset in range(clients)
+    ]
+    await asyncio.sleep(warmup + duration)
+    for task in tasks:
+        task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
+    return latencies, statuses
+
+
+async def read_response(reader):
+    """Status of an HTTP/1.1 response, read to its end, and whether the
+    connection stays open."""
+    head = await reader.readuntil(b"\r\n\r\n")
+    status_line, *header_lines = head.decode("latin-1").split("\r\n")
+    headers = {}
+    for line in header_lines:
+        if line:
+            name, _, value = line.partition(":")
+            headers[name.strip().lower()] = value.strip()
+    if headers.get("transfer-encoding") == "chunked":
+        while True:
+            size = int((await reader.readuntil(b"\r\n")).split(b";")[0], 16)
+            await reader.readexactly(size + 2)
+            if not size:
+                break
+    else:
+        await reader.readexactly(int(headers.get("content-length", 0)))
+    return (
+        int(status_line.split()[1]),
+        headers.get("connection", "").lower() != "close",
+    )
@@ -0,0 +1,137 @@
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+
+from django.contrib.auth import get_user_model
+from django.core.management import BaseCommand, CommandError
+from django.db import transaction
+from rest_framework.renderers import JSONRenderer
+
+from shows.models import (
+    AstronomyShow,
+    PlanetariumDome,
+    Reservation,
+    ShowSession,
+    Ticket,
+)
+from shows.serializers import ShowSessionListSerializer, TicketListSerializer
+from shows.values_list import render_values, values_plan
+
+DOME_ROWS = DOME_SEATS_IN_ROW = 50
+
+
+class Command(BaseCommand):
+    """Django command to compare serializer and values() list rendering"""
+
+    help = (
+        "Render generated ticket and show session lists through the "
+        "serializers and through values() rows, reporting rows per second "
+        "and peak memory. The generated rows are rolled back afterwards."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rows", type=int, default=100_000)
+
+    def handle(self, *args, **options):
+        rows = options["rows"]
+        with transaction.atomic():
+            self.populate(rows)
+            cases = [
+                (
+                    "tickets",
+                    Ticket.objects.select_related(
+                        "show_session__astronomy_show",
+                        "show_session__planetarium_dome",
+                        "reservation__user",
+                    ).order_by("-id"),
+                    TicketListSerializer,
+                ),
+                (
+                    "show sessions",
+                    ShowSession.objects.with_availability().select_related(
+                        "astronomy_show", "planetarium_dome"
+                    ).order_by("show_time", "id"),
+                    ShowSessionListSerializer,
+                ),
+            ]
+            for name, queryset, serializer_class in cases:
+                self.compare(name, queryset, serializer_class)
+            transaction.set_rollback(True)
+
+    def populate(self, rows):
+        self.stdout.write(f"Generating {rows} tickets and show sessions...")
+        user = get_user_model().objects.create_user(
+            email="benchmark@planetarium.local", password="benchmark"
+        )
+        astronomy_show = AstronomyShow.objects.create(
+            title="Benchmark show", description="Generated for benchmarks"
+        )
+        dome = PlanetariumDome.objects.create(
+            name="Benchmark dome",
+            rows=DOME_ROWS,
+            seats_in_row=DOME_SEATS_IN_ROW,
+        )
+        start = datetime(2030, 1, 1)
+        show_sessions = ShowSession.objects.bulk_create(
+            (
+                ShowSession(
+                    astronomy_show=astronomy_show,
+                    planetarium_dome=dome,
+                    show_time=start + timedelta(minutes=index),
+                    duration=timedelta(minutes=1),
+                    price="12.50",
+                )
+                for index in range(rows)
+            ),
+            batch_size=5000,
+        )
+        reservation = Reservation.objects.create(user=user)
+        seats = DOME_ROWS * DOME_SEATS_IN_ROW
+        Ticket.objects.bulk_create(
+            (
+                Ticket(
+                    row=index % seats // DOME_SEATS_IN_ROW + 1,
+                    seat=index % DOME_SEATS_IN_ROW + 1,
+                    show_session=show_sessions[index // seats],
+                    reservation=reservation,
+                )
+                for index in range(rows)
+            ),
+            batch_size=5000,
+        )
+
+    def compare(self, name, queryset, serializer_class):
+        def serialized():
+            return JSONRenderer().render(
+                serializer_class(queryset.all(), many=True).data
+            )
+
+        def from_values():
+            plan = values_plan(queryset, serializer_class())
+            rows = queryset.values(
+                *dict.fromkeys(lookup for _, lookup in plan)
+            )
+            return JSONRenderer().render(render_values(plan, rows))
+
+        results = {}
+        for label, render in (
+            ("serializer", serialized),
+            ("values()", from_values),
+        ):
+            start = time.perf_counter()
+            content = render()
+            elapsed = time.perf_counter() - start
+
+            tracemalloc.start()
+            render()
+            peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+
+            results[label] = content
+            count = queryset.count()
+            self.stdout.write(
+                f"{name}, {label}: {count / elapsed:,.0f} rows/s, "
+                f"peak {peak / 2 ** 20:.1f} MiB"
+            )
+        if results["serializer"] != results["values()"]:
+            raise CommandError(f"{name}: the outputs differ")
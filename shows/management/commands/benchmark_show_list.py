@@ -0,0 +1,94 @@
+import random
+import statistics
+import time
+
+from django.core.management import BaseCommand
+from django.db import connection, transaction
+
+from shows.models import AstronomyShow, ShowTheme
+
+
+class Command(BaseCommand):
+    """Django command to time astronomy show list queries on a large
+    generated catalog"""
+
+    help = (
+        "Compare the old DISTINCT join against the EXISTS theme filter. "
+        "The generated catalog is rolled back afterwards."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--shows", type=int, default=100_000)
+        parser.add_argument("--themes", type=int, default=50)
+        parser.add_argument("--themes-per-show", type=int, default=3)
+        parser.add_argument("--repeat", type=int, default=5)
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            self.populate(
+                options["shows"],
+                options["themes"],
+                options["themes_per_show"],
+            )
+            theme = ShowTheme.objects.order_by("pk").first().name
+            cases = [
+                (
+                    "all shows",
+                    AstronomyShow.objects.distinct(),
+                    AstronomyShow.objects.all(),
+                ),
+                (
+                    f"show_theme={theme!r}",
+                    AstronomyShow.objects.filter(
+                        show_theme__name__icontains=theme
+                    ).distinct(),
+                    AstronomyShow.objects.with_theme_name(theme),
+                ),
+            ]
+            for name, before, after in cases:
+                self.stdout.write(
+                    f"{name}: DISTINCT join "
+                    f"{self.timed(before, options['repeat'])}, "
+                    f"EXISTS {self.timed(after, options['repeat'])}"
+                )
+            transaction.set_rollback(True)
+
+    def populate(self, shows, themes, themes_per_show):
+        self.stdout.write(f"Generating {shows} shows...")
+        theme_objects = ShowTheme.objects.bulk_create(
+            ShowTheme(name=f"Benchmark theme {i}") for i in range(themes)
+        )
+        show_objects = AstronomyShow.objects.bulk_create(
+            (
+                AstronomyShow(
+                    title=f"Benchmark show {i}",
+                    description="Generated for benchmark_show_list",
+                )
+                for i in range(shows)
+            ),
+            batch_size=5000,
+        )
+        through = AstronomyShow.show_theme.through
+        through.objects.bulk_create(
+            (
+                through(astronomyshow_id=show.pk, showtheme_id=theme.pk)
+                for show in show_objects
+                for theme in random.sample(theme_objects, themes_per_show)
+            ),
+            batch_size=10000,
+        )
+        with connection.cursor() as cursor:
+            for model in (AstronomyShow, ShowTheme, through):
+                cursor.execute(f"ANALYZE {model._meta.db_table}")
+
+    @staticmethod
+    def timed(queryset, repeat):
+        timings = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            rows = len(queryset.all())
+            timings.append(time.perf_counter() - start)
+        return (
+            f"{statistics.median(timings) * 1000:.1f} ms median "
+            f"({rows} rows)"
+        )
@@ -0,0 +1,68 @@
+from datetime import timedelta
+
+from django.core.management import BaseCommand
+from django.utils import timezone
+
+from shows.models import ASTRONOMY_SHOW_IMAGE_DIRECTORY, AstronomyShow
+from shows.storage import image_storage
+
+
+class Command(BaseCommand):
+    """Django command to delete show images nothing refers to"""
+
+    help = (
+        "Delete files under the show image directory that are neither a "
+        "show's image nor one of its rendered variants."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--min-age",
+            type=int,
+            default=3600,
+            help="Keep files younger than MIN_AGE seconds: an upload is "
+                 "stored before its show is saved.",
+        )
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="List the files instead of deleting them.",
+        )
+
+    def handle(self, *args, **options):
+        referenced = self.referenced()
+        cutoff = timezone.now() - timedelta(seconds=options["min_age"])
+        deleted = freed = 0
+        files = []
+        if image_storage.exists(ASTRONOMY_SHOW_IMAGE_DIRECTORY):
+            _, files = image_storage.listdir(ASTRONOMY_SHOW_IMAGE_DIRECTORY)
+        for filename in files:
+            name = f"{ASTRONOMY_SHOW_IMAGE_DIRECTORY}/{filename}"
+            if (
+                name in referenced
+                or image_storage.get_modified_time(name) > cutoff
+            ):
+                continue
+            freed += image_storage.size(name)
+            deleted += 1
+            if options["dry_run"]:
+                self.stdout.write(name)
+            else:
+                image_storage.delete(name)
+
+        action = "Would delete" if options["dry_run"] else "Deleted"
+        self.stdout.write(
+            f"{action} {deleted} unreferenced files "
+            f"({freed / 2 ** 20:.1f} MiB)"
+        )
+
+    @staticmethod
+    def referenced():
+        referenced = set()
+        for image, image_variants in AstronomyShow.objects.exclude(
+            image=""
+        ).filter(image__isnull=False).values_list("image", "image_variants"):
+            referenced.add(image)
+            for formats in image_variants.get("variants", {}).values():
+                referenced.update(formats.values())
+        return referenced
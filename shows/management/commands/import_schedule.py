@@ -0,0 +1,348 @@
+import csv
+import io
+import json
+import time
+from datetime import timedelta
+from pathlib import Path
+
+from django.core.exceptions import ValidationError
+from django.core.management import BaseCommand, CommandError
+from django.db import IntegrityError, connection, transaction
+from django.utils import timezone
+
+from shows.catalog_cache import invalidate_catalog
+from shows.models import AstronomyShow, PlanetariumDome, ShowSession, ShowTheme
+from shows.seat_map import invalidate_seat_maps
+
+RECORD_TYPES = ("theme", "show", "dome", "session")
+
+
+class Command(BaseCommand):
+    """Django command to bulk import a schedule of themes, shows, domes
+    and show sessions"""
+
+    help = (
+        "Upsert themes, shows, domes and sessions from a CSV or JSONL "
+        "file. Every record has a `type` (theme, show, dome or session); "
+        "relations are given by name: a show's `themes` (a list, or "
+        "separated by ';' in CSV), a session's `show` title and `dome` "
+        "name. A session's `duration` is HH:MM:SS and defaults to an "
+        "hour. Re-running a file updates rows instead of duplicating them."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", type=Path)
+        parser.add_argument(
+            "--format",
+            choices=["csv", "jsonl"],
+            help="File format, guessed from the extension by default.",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=1000,
+            help="Rows per INSERT statement.",
+        )
+
+    def handle(self, *args, **options):
+        self.batch_size = options["batch_size"]
+        started = time.perf_counter()
+        records = self.read(
+            options["path"],
+            options["format"] or options["path"].suffix.lstrip("."),
+        )
+
+        try:
+            with transaction.atomic():
+                theme_ids = self.timed("themes", self.import_themes, records)
+                dome_ids = self.timed("domes", self.import_domes, records)
+                show_ids = self.timed(
+                    "shows", self.import_shows, records, theme_ids
+                )
+                self.timed(
+                    "sessions",
+                    self.import_sessions,
+                    records,
+                    show_ids,
+                    dome_ids,
+                )
+        except IntegrityError as error:
+            # Sessions overlapping in a dome are only caught by the
+            # exclusion constraint.
+            raise CommandError(str(error).splitlines()[0])
+
+        # bulk_create skips the signals that keep these up to date.
+        AstronomyShow.objects.filter(
+            pk__in=show_ids.values()
+        ).update_search_vector()
+        invalidate_catalog("show_theme", "astronomy_show", "planetarium_dome")
+        invalidate_seat_maps(
+            *ShowSession.objects.filter(
+                planetarium_dome__in=dome_ids.values()
+            ).values_list("id", flat=True)
+        )
+
+        total = sum(len(items) for items in records.values())
+        elapsed = time.perf_counter() - started
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Imported {total} records in {elapsed:.2f}s "
+                f"({total / elapsed:,.0f} records/s)"
+            )
+        )
+
+    def read(self, path, file_format):
+        """Records grouped by type as (line number, record) pairs."""
+        if file_format not in ("csv", "jsonl"):
+            raise CommandError("use --format csv or --format jsonl")
+        records = {record_type: [] for record_type in RECORD_TYPES}
+        with path.open(newline="", encoding="utf-8") as file:
+            if file_format == "csv":
+                rows = enumerate(csv.DictReader(file), start=2)
+            else:
+                rows = (
+                    (number, self.parse_json(number, line))
+                    for number, line in enumerate(file, start=1)
+                    if line.strip()
+                )
+            for number, record in rows:
+                record = {
+                    key: value
+                    for key, value in record.items()
+                    if value not in ("", None)
+                }
+                if record.get("type") not in RECORD_TYPES:
+                    raise CommandError(
+                        f"line {number}: type must be one of "
+                        f"{', '.join(RECORD_TYPES)}"
+                    )
+                records[record["type"]].append((number, record))
+        return records
+
+    @staticmethod
+    def parse_json(number, line):
+        try:
+            record = json.loads(line)
+        except ValueError as error:
+            raise CommandError(f"line {number}: {error}")
+        if not isinstance(record, dict):
+            raise CommandError(f"line {number}: expected an object")
+        return record
+
+    def timed(self, name, step, *args):
+        started = time.perf_counter()
+        ids = step(*args)
+        elapsed = time.perf_counter() - started
+        self.stdout.write(
+            f"{name}: {len(ids)} in {elapsed:.2f}s "
+            f"({len(ids) / elapsed if elapsed else 0:,.0f}/s)"
+        )
+        return ids
+
+    @staticmethod
+    def field(number, record, name):
+        try:
+            return record[name]
+        except KeyError:
+            raise CommandError(
+                f"line {number}: {record['type']} needs a {name}"
+            )
+
+    @staticmethod
+    def clean(number, obj, exclude=()):
+        try:
+            obj.clean_fields(exclude=exclude)
+        except ValidationError as error:
+            raise CommandError(f"line {number}: {error.message_dict}")
+        return obj
+
+    @staticmethod
+    def clean_value(number, name, value):
+        """Clean one ShowSession column without building an instance,
+        which costs more than the whole upsert for large schedules."""
+        try:
+            return ShowSession._meta.get_field(name).clean(value, None)
+        except ValidationError as error:
+            raise CommandError(
+                f"line {number}: {({name: error.messages})}"
+            )
+
+    @staticmethod
+    def show_themes(record):
+        themes = record.get("themes", [])
+        if isinstance(themes, str):
+            themes = themes.split(";")
+        return [name.strip() for name in themes if name.strip()]
+
+    def import_themes(self, records):
+        names = {}
+        for number, record in records["show"]:
+            names.update(dict.fromkeys(self.show_themes(record), number))
+        for number, record in records["theme"]:
+            names[self.field(number, record, "name")] = number
+        ShowTheme.objects.bulk_create(
+            [
+                self.clean(number, ShowTheme(name=name))
+                for name, number in names.items()
+            ],
+            batch_size=self.batch_size,
+            ignore_conflicts=True,
+        )
+        return dict(
+            ShowTheme.objects.filter(name__in=names).values_list("name", "id")
+        )
+
+    def import_domes(self, records):
+        domes = {}
+        for number, record in records["dome"]:
+            dome = PlanetariumDome(
+                name=self.field(number, record, "name"),
+                rows=self.field(number, record, "rows"),
+                seats_in_row=self.field(number, record, "seats_in_row"),
+            )
+            domes[dome.name] = self.clean(number, dome)
+        PlanetariumDome.objects.bulk_create(
+            domes.values(),
+            batch_size=self.batch_size,
+            update_conflicts=True,
+            unique_fields=["name"],
+            update_fields=["rows", "seats_in_row", "updated_at"],
+        )
+        return dict(
+            PlanetariumDome.objects.filter(name__in=domes).values_list(
+                "name", "id"
+            )
+        )
+
+    def import_shows(self, records, theme_ids):
+        shows = {}
+        themes = {}
+        for number, record in records["show"]:
+            show = AstronomyShow(
+                title=self.field(number, record, "title"),
+                description=self.field(number, record, "description"),
+            )
+            shows[show.title] = self.clean(
+                number, show, exclude=["show_theme", "image"]
+            )
+            themes[show.title] = self.show_themes(record)
+        AstronomyShow.objects.bulk_create(
+            shows.values(),
+            batch_size=self.batch_size,
+            update_conflicts=True,
+            unique_fields=["title"],
+            update_fields=["description", "updated_at"],
+        )
+        show_ids = dict(
+            AstronomyShow.objects.filter(title__in=shows).values_list(
+                "title", "id"
+            )
+        )
+        through = AstronomyShow.show_theme.through
+        through.objects.bulk_create(
+            [
+                through(
+                    astronomyshow_id=show_ids[title],
+                    showtheme_id=theme_ids[name],
+                )
+                for title, names in themes.items()
+                for name in names
+            ],
+            batch_size=self.batch_size,
+            ignore_conflicts=True,
+        )
+        return show_ids
+
+    def import_sessions(self, records, show_ids, dome_ids):
+        show_ids = {
+            **self.existing_ids(
+                AstronomyShow, "title", records, "show", show_ids
+            ),
+            **show_ids,
+        }
+        dome_ids = {
+            **self.existing_ids(
+                PlanetariumDome, "name", records, "dome", dome_ids
+            ),
+            **dome_ids,
+        }
+
+        sessions = {}
+        for number, record in records["session"]:
+            title = self.field(number, record, "show")
+            name = self.field(number, record, "dome")
+            if title not in show_ids:
+                raise CommandError(f"line {number}: unknown show {title!r}")
+            if name not in dome_ids:
+                raise CommandError(f"line {number}: unknown dome {name!r}")
+            show_time = self.clean_value(
+                number, "show_time", self.field(number, record, "show_time")
+            )
+            sessions[dome_ids[name], show_time] = (
+                show_ids[title],
+                self.clean_value(
+                    number,
+                    "duration",
+                    record.get("duration", timedelta(hours=1)),
+                ),
+                self.clean_value(number, "price", record.get("price", 0)),
+            )
+        self.copy_sessions(sessions)
+        return sessions
+
+    @staticmethod
+    def copy_sessions(sessions):
+        """COPY ``{(dome id, show time): (show id, duration, price)}`` into a
+        staging table and upsert from there in one statement; this skips
+        the per-row cost of building INSERT statements."""
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        for (dome_id, show_time), row in sessions.items():
+            show_id, duration, price = row
+            writer.writerow([
+                show_id,
+                dome_id,
+                show_time.isoformat(),
+                f"{duration.total_seconds()} seconds",
+                price,
+            ])
+        buffer.seek(0)
+
+        table = ShowSession._meta.db_table
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "CREATE TEMPORARY TABLE import_show_session ("
+                "astronomy_show_id bigint, planetarium_dome_id bigint, "
+                "show_time timestamp, duration interval, price numeric)"
+            )
+            cursor.copy_expert(
+                "COPY import_show_session FROM STDIN WITH (FORMAT csv)",
+                buffer,
+            )
+            cursor.execute(
+                f"INSERT INTO {table} (astronomy_show_id, "
+                "planetarium_dome_id, show_time, duration, price, "
+                "sold_count, updated_at) "
+                "SELECT astronomy_show_id, planetarium_dome_id, show_time, "
+                "duration, price, 0, %s FROM import_show_session "
+                "ON CONFLICT (planetarium_dome_id, show_time) DO UPDATE SET "
+                "astronomy_show_id = EXCLUDED.astronomy_show_id, "
+                "duration = EXCLUDED.duration, price = EXCLUDED.price, "
+                "updated_at = EXCLUDED.updated_at",
+                [timezone.now()],
+            )
+            cursor.execute("DROP TABLE import_show_session")
+
+    @staticmethod
+    def existing_ids(model, natural_key, records, field, imported):
+        """Ids of rows the sessions refer to without importing them."""
+        missing = {
+            record[field]
+            for _, record in records["session"]
+            if field in record
+        } - set(imported)
+        return dict(
+            model.objects.filter(
+                **{f"{natural_key}__in": missing}
+            ).values_list(natural_key, "id")
+        )
@@ -0,0 +1,108 @@
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from django.core.management import BaseCommand
+from django.utils import timezone
+
+from shows.catalog_cache import invalidate_catalog
+from shows.images import render_variants, store_variants
+from shows.models import AstronomyShow
+from shows.storage import image_storage
+
+
+class Command(BaseCommand):
+    """Django command to render the variants of uploaded show images"""
+
+    help = (
+        "Render thumbnail, card and hero variants in WebP and JPEG for "
+        "show images that do not have them yet, in a pool of worker "
+        "processes."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=None,
+            help="Worker processes, one per CPU by default.",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=20,
+            help="Images picked up at a time.",
+        )
+        parser.add_argument(
+            "--interval",
+            type=int,
+            default=0,
+            help="Keep running and look for new images every INTERVAL "
+                 "seconds.",
+        )
+
+    def handle(self, *args, **options):
+        with ProcessPoolExecutor(max_workers=options["workers"]) as pool:
+            while True:
+                processed = self.process(pool, options["batch_size"])
+                self.stdout.write(f"Processed {processed} show images")
+                if not options["interval"]:
+                    break
+                time.sleep(options["interval"])
+
+    def process(self, pool, batch_size):
+        processed = 0
+        while True:
+            batch = list(
+                AstronomyShow.objects.with_pending_image().values_list(
+                    "pk", "image"
+                )[:batch_size]
+            )
+            if not batch:
+                return processed
+            rendered = self.rendered_elsewhere([source for _, source in batch])
+            jobs = []
+            for pk, source in batch:
+                if source in rendered:
+                    processed += self.save(pk, source, rendered[source])
+                    continue
+                try:
+                    with image_storage.open(source) as file:
+                        future = pool.submit(render_variants, file.read())
+                    jobs.append((pk, source, future))
+                except OSError as error:
+                    processed += self.failed(pk, source, error)
+            for pk, source, future in jobs:
+                try:
+                    image_variants = store_variants(source, future.result())
+                except Exception as error:
+                    processed += self.failed(pk, source, error)
+                else:
+                    processed += self.save(pk, source, image_variants)
+            invalidate_catalog("astronomy_show")
+
+    @staticmethod
+    def rendered_elsewhere(sources):
+        """Variants already rendered for another show with the same
+        image, which content-addressed names make a shared file."""
+        return {
+            source: image_variants
+            for source, image_variants in AstronomyShow.objects.filter(
+                image__in=sources
+            ).exclude(image_variants={}).exclude(
+                image_variants__has_key="error"
+            ).values_list("image", "image_variants")
+        }
+
+    def failed(self, pk, source, error):
+        self.stderr.write(f"{source}: {error}")
+        # Not retried until the image is replaced.
+        return self.save(
+            pk, source, {"source": source, "variants": {}, "error": str(error)}
+        )
+
+    @staticmethod
+    def save(pk, source, image_variants):
+        # The image may have been replaced in the meantime.
+        return AstronomyShow.objects.filter(pk=pk, image=source).update(
+            image_variants=image_variants, updated_at=timezone.now()
+        )
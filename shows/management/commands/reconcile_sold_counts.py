@@ -0,0 +1,67 @@
+from django.core.management import BaseCommand
+from django.db import transaction
+from django.db.models import Count
+from django.utils import timezone
+
+from shows.models import ShowSession, Ticket
+
+
+class Command(BaseCommand):
+    """Django command to recount sold tickets of every show session"""
+
+    help = "Fix show sessions whose sold_count drifted from their tickets."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=500,
+            help="Number of show sessions recounted per transaction.",
+        )
+
+    def handle(self, *args, **options):
+        checked = fixed = 0
+        last_id = 0
+        while True:
+            batch, drifted = self.reconcile_batch(
+                last_id, options["batch_size"]
+            )
+            if not batch:
+                break
+            checked += len(batch)
+            fixed += drifted
+            last_id = batch[-1]
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Checked {checked} show sessions, fixed {fixed}"
+            )
+        )
+
+    @staticmethod
+    def reconcile_batch(after_id, batch_size):
+        """Recount one batch of sessions while holding their row locks,
+        so concurrent bookings wait instead of being counted twice."""
+        with transaction.atomic():
+            stored = dict(
+                ShowSession.objects.select_for_update().filter(
+                    pk__gt=after_id
+                ).order_by("pk").values_list("pk", "sold_count")[:batch_size]
+            )
+            sold = dict(
+                Ticket.objects.filter(show_session__in=stored).order_by()
+                .values("show_session").annotate(count=Count("id"))
+                .values_list("show_session", "count")
+            )
+            now = timezone.now()
+            drifted = [
+                ShowSession(
+                    pk=pk, sold_count=sold.get(pk, 0), updated_at=now
+                )
+                for pk, sold_count in stored.items()
+                if sold.get(pk, 0) != sold_count
+            ]
+            ShowSession.objects.bulk_update(
+                drifted, ["sold_count", "updated_at"]
+            )
+        return sorted(stored), len(drifted)
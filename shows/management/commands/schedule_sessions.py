@@ -0,0 +1,90 @@
+import time
+from datetime import timedelta
+
+from django.core.management import BaseCommand, CommandError
+
+from shows.models import AstronomyShow, PlanetariumDome
+from shows.serializers import WEEKDAYS, ShowSessionScheduleSerializer
+
+
+def parse_weekdays(value):
+    """``tue-sun``, ``mon,wed,fri`` or a mix of both as weekday names;
+    ranges may wrap around the week, as in ``fri-mon``."""
+    weekdays = []
+    for part in value.lower().split(","):
+        first, _, last = part.strip().partition("-")
+        if first not in WEEKDAYS or (last and last not in WEEKDAYS):
+            raise CommandError(
+                f"unknown weekday in {part!r}, use {', '.join(WEEKDAYS)}"
+            )
+        start = WEEKDAYS.index(first)
+        length = (WEEKDAYS.index(last or first) - start) % 7 + 1
+        weekdays += [
+            WEEKDAYS[(start + offset) % 7] for offset in range(length)
+        ]
+    return weekdays
+
+
+class Command(BaseCommand):
+    """Django command to create the sessions of a recurring schedule"""
+
+    help = (
+        "Create a show's sessions in a dome at the given times on the "
+        "given weekdays between two dates, e.g. --weekdays tue-sun "
+        "--times 14:00,16:00,19:00. Nothing is created if any show time "
+        "is already taken."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--show", required=True, help="Show title.")
+        parser.add_argument("--dome", required=True, help="Dome name.")
+        parser.add_argument("--from", dest="start_date", required=True)
+        parser.add_argument("--to", dest="end_date", required=True)
+        parser.add_argument("--times", required=True)
+        parser.add_argument("--weekdays", default="mon-sun")
+        parser.add_argument(
+            "--duration", type=int, default=60, help="Minutes."
+        )
+        parser.add_argument("--price", required=True)
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        serializer = ShowSessionScheduleSerializer(
+            data={
+                "astronomy_show": self.lookup(
+                    AstronomyShow, title=options["show"]
+                ),
+                "planetarium_dome": self.lookup(
+                    PlanetariumDome, name=options["dome"]
+                ),
+                "price": options["price"],
+                "start_date": options["start_date"],
+                "end_date": options["end_date"],
+                "weekdays": parse_weekdays(options["weekdays"]),
+                "times": options["times"].split(","),
+                "duration": timedelta(minutes=options["duration"]),
+            }
+        )
+        if not serializer.is_valid():
+            raise CommandError(serializer.errors)
+        serializer.save()
+
+        created = len(serializer.data["show_sessions"])
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Created {created} show sessions in "
+                f"{time.perf_counter() - started:.2f}s"
+            )
+        )
+
+    @staticmethod
+    def lookup(model, **natural_key):
+        try:
+            return model.objects.values_list("id", flat=True).get(
+                **natural_key
+            )
+        except model.DoesNotExist:
+            raise CommandError(
+                f"unknown {model._meta.verbose_name} "
+                f"{next(iter(natural_key.values()))!r}"
+            )
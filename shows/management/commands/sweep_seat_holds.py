@@ -0,0 +1,47 @@
+import time
+
+from django.core.management import BaseCommand
+
+from shows.models import SeatHold
+
+
+class Command(BaseCommand):
+    """Django command to delete expired seat holds in batches"""
+
+    help = "Delete expired seat holds in batches."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=1000,
+            help="Number of holds deleted per statement.",
+        )
+        parser.add_argument(
+            "--interval",
+            type=int,
+            default=0,
+            help="Keep running and sweep every INTERVAL seconds.",
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            deleted = self.sweep(options["batch_size"])
+            self.stdout.write(f"Deleted {deleted} expired seat holds")
+            if not options["interval"]:
+                break
+            time.sleep(options["interval"])
+
+    @staticmethod
+    def sweep(batch_size):
+        deleted = 0
+        while True:
+            batch = list(
+                SeatHold.objects.expired().values_list(
+                    "pk", flat=True
+                )[:batch_size]
+            )
+            if not batch:
+                return deleted
+            count, _ = SeatHold.objects.filter(pk__in=batch).delete()
+            deleted += count
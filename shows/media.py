@@ -0,0 +1,147 @@
+import mimetypes
+import posixpath
+import re
+from pathlib import Path
+from urllib.parse import quote
+
+from django.conf import settings
+from django.http import (
+    FileResponse,
+    Http404,
+    HttpResponse,
+    StreamingHttpResponse,
+)
+from django.utils._os import safe_join
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, parse_http_date_safe
+
+from shows.storage import IMMUTABLE_CACHE_CONTROL
+
+BYTE_RANGE = re.compile(r"^bytes=(\d*)-(\d*)$")
+CHUNK_SIZE = 64 * 1024
+
+
+class RangeNotSatisfiable(Exception):
+    pass
+
+
+def byte_range(header, size):
+    """``(start, stop)`` of the single byte range in a ``Range`` header,
+    or None to send the whole file. Multiple ranges are answered with the
+    whole file, which HTTP allows."""
+    match = BYTE_RANGE.match(header.strip())
+    if not match or match.groups() == ("", ""):
+        return None
+    first, last = match.groups()
+    if not first:
+        suffix = int(last)
+        if not suffix or not size:
+            raise RangeNotSatisfiable
+        return max(size - suffix, 0), size
+    start = int(first)
+    if last and int(last) < start:
+        return None
+    if start >= size:
+        raise RangeNotSatisfiable
+    return start, min(int(last) + 1, size) if last else size
+
+
+def if_range_matches(request, etag, last_modified):
+    if_range = request.META.get("HTTP_IF_RANGE")
+    if if_range is None:
+        return True
+    if if_range.startswith('"'):
+        return if_range == etag
+    return parse_http_date_safe(if_range) == last_modified
+
+
+def read_range(path, start, stop):
+    with open(path, "rb") as file:
+        file.seek(start)
+        remaining = stop - start
+        while remaining:
+            chunk = file.read(min(CHUNK_SIZE, remaining))
+            if not chunk:
+                return
+            remaining -= len(chunk)
+            yield chunk
+
+
+def offloaded_response(full_path, relative_path):
+    """An empty response telling the web server in front to send the
+    file itself, ranges included."""
+    header = settings.MEDIA_SENDFILE_HEADER
+    response = HttpResponse()
+    if header.lower() == "x-accel-redirect":
+        location = settings.MEDIA_ACCEL_REDIRECT_LOCATION.rstrip("/")
+        response[header] = quote(f"{location}/{relative_path}")
+    else:
+        response[header] = str(full_path)
+    return response
+
+
+def file_response(request, full_path, size, etag, last_modified):
+    requested = request.META.get("HTTP_RANGE")
+    try:
+        ranged = (
+            requested is not None
+            and if_range_matches(request, etag, last_modified)
+            and byte_range(requested, size)
+        )
+    except RangeNotSatisfiable:
+        response = HttpResponse(status=416)
+        response["Content-Range"] = f"bytes */{size}"
+        return response
+    if ranged:
+        start, stop = ranged
+        response = StreamingHttpResponse(
+            read_range(full_path, start, stop), status=206
+        )
+        response["Content-Range"] = f"bytes {start}-{stop - 1}/{size}"
+        response["Content-Length"] = str(stop - start)
+    else:
+        response = FileResponse(open(full_path, "rb"))
+    response["Accept-Ranges"] = "bytes"
+    return response
+
+
+def serve_media(request, path):
+    """Serve uploaded media. Uploads are never overwritten in place (new
+    content gets a new name), so browsers and proxies may cache a URL
+    for good.
+
+    Conditional requests are answered from the file's modification time
+    and size. With ``MEDIA_SENDFILE_HEADER`` set the bytes are left to
+    the web server in front; otherwise they are streamed from here,
+    honouring single byte ranges."""
+    relative_path = posixpath.normpath(path).lstrip("/")
+    full_path = Path(safe_join(settings.MEDIA_ROOT, relative_path))
+    if not full_path.is_file():
+        raise Http404("File does not exist")
+    stat = full_path.stat()
+    etag = f'"{stat.st_mtime_ns:x}-{stat.st_size:x}"'
+    last_modified = int(stat.st_mtime)
+
+    response = get_conditional_response(
+        request, etag=etag, last_modified=last_modified
+    )
+    if response is None:
+        if settings.MEDIA_SENDFILE_HEADER:
+            response = offloaded_response(full_path, relative_path)
+        else:
+            response = file_response(
+                request, full_path, stat.st_size, etag, last_modified
+            )
+        if response.status_code != 416:
+            content_type, encoding = mimetypes.guess_type(full_path)
+            response["Content-Type"] = (
+                content_type or "application/octet-stream"
+            )
+            if encoding:
+                response["Content-Encoding"] = encoding
+    # Errors (416, 412) must not be cached as the file.
+    if response.status_code in (200, 206, 304):
+        response["ETag"] = etag
+        response["Last-Modified"] = http_date(last_modified)
+        response["Cache-Control"] = IMMUTABLE_CACHE_CONTROL
+    return response
@@ -0,0 +1,32 @@
+# Generated by Django 5.0.6 on 2026-10-17 04:05
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def count_sold_tickets(apps, schema_editor):
+    ShowSession = apps.get_model("shows", "ShowSession")
+    Ticket = apps.get_model("shows", "Ticket")
+    sold = Ticket.objects.filter(
+        show_session=OuterRef("pk")
+    ).order_by().values("show_session").annotate(
+        count=Count("id")
+    ).values("count")
+    ShowSession.objects.update(sold_count=Coalesce(Subquery(sold), 0))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("shows", "0005_seathold_seathold_unique_seat_hold"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="showsession",
+            name="sold_count",
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(count_sold_tickets, migrations.RunPython.noop),
+    ]
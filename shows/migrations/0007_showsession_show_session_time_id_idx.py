@@ -0,0 +1,19 @@
+# Generated by Django 5.0.6 on 2026-10-17 04:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("shows", "0006_showsession_sold_count"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="showsession",
+            index=models.Index(
+                fields=["show_time", "id"], name="show_session_time_id_idx"
+            ),
+        ),
+    ]
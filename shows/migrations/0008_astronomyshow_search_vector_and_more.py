@@ -0,0 +1,60 @@
+# Generated by Django 5.0.6 on 2026-10-17 04:14
+
+import django.contrib.postgres.indexes
+import django.contrib.postgres.search
+from django.contrib.postgres.operations import TrigramExtension
+from django.db import migrations
+
+
+def fill_search_vector(apps, schema_editor):
+    from django.contrib.postgres.aggregates import StringAgg
+    from django.contrib.postgres.search import SearchVector
+    from django.db.models import OuterRef, Subquery
+
+    AstronomyShow = apps.get_model("shows", "AstronomyShow")
+    ShowTheme = apps.get_model("shows", "ShowTheme")
+    theme_names = ShowTheme.objects.filter(
+        astronomy_shows=OuterRef("pk")
+    ).order_by().values("astronomy_shows").annotate(
+        names=StringAgg("name", " ")
+    ).values("names")
+    AstronomyShow.objects.update(
+        search_vector=(
+            SearchVector("title", weight="A", config="english")
+            + SearchVector(Subquery(theme_names), weight="B", config="english")
+            + SearchVector("description", weight="C", config="english")
+        )
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("shows", "0007_showsession_show_session_time_id_idx"),
+    ]
+
+    operations = [
+        TrigramExtension(),
+        migrations.AddField(
+            model_name="astronomyshow",
+            name="search_vector",
+            field=django.contrib.postgres.search.SearchVectorField(
+                editable=False, null=True
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="astronomyshow",
+            index=django.contrib.postgres.indexes.GinIndex(
+                fields=["search_vector"], name="astronomy_show_search_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="astronomyshow",
+            index=django.contrib.postgres.indexes.GinIndex(
+                fields=["title"],
+                name="astronomy_show_title_trgm_idx",
+                opclasses=["gin_trgm_ops"],
+            ),
+        ),
+        migrations.RunPython(fill_search_vector, migrations.RunPython.noop),
+    ]
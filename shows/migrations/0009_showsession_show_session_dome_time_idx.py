@@ -0,0 +1,20 @@
+# Generated by Django 5.0.6 on 2026-10-17 04:15
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("shows", "0008_astronomyshow_search_vector_and_more"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="showsession",
+            index=models.Index(
+                fields=["planetarium_dome", "show_time"],
+                name="show_session_dome_time_idx",
+            ),
+        ),
+    ]
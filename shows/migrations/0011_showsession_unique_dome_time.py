@@ -0,0 +1,60 @@
+# Generated by Django 5.0.6 on 2026-10-17 04:46
+
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def check_duplicate_sessions(apps, schema_editor):
+    """Refuse to go on while a dome has two sessions at the same time;
+    which one to keep, with its tickets, is not for a migration to say."""
+    ShowSession = apps.get_model("shows", "ShowSession")
+    duplicates = (
+        ShowSession.objects.order_by()
+        .values("planetarium_dome", "show_time")
+        .annotate(count=Count("id"))
+        .filter(count__gt=1)
+        .order_by("planetarium_dome", "show_time")
+    )
+    conflicts = [
+        f"dome {duplicate['planetarium_dome']} at "
+        f"{duplicate['show_time'].isoformat()}: sessions "
+        + ", ".join(
+            str(pk)
+            for pk in ShowSession.objects.filter(
+                planetarium_dome=duplicate["planetarium_dome"],
+                show_time=duplicate["show_time"],
+            )
+            .order_by("id")
+            .values_list("id", flat=True)
+        )
+        for duplicate in duplicates
+    ]
+    if conflicts:
+        raise RuntimeError(
+            "Show sessions share a dome and a show time; move or delete "
+            "all but one of each before migrating:\n" + "\n".join(conflicts)
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("shows", "0010_updated_at"),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name="showsession",
+            name="show_session_dome_time_idx",
+        ),
+        migrations.RunPython(
+            check_duplicate_sessions, migrations.RunPython.noop
+        ),
+        migrations.AddConstraint(
+            model_name="showsession",
+            constraint=models.UniqueConstraint(
+                fields=("planetarium_dome", "show_time"),
+                name="unique_show_session_dome_time",
+            ),
+        ),
+    ]
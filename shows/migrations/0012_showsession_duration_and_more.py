@@ -0,0 +1,96 @@
+# Generated by Django 5.0.6 on 2026-10-17 05:02
+
+import datetime
+import django.contrib.postgres.constraints
+import django.core.validators
+import django.db.models.expressions
+import shows.models
+from django.contrib.postgres.operations import BtreeGistExtension
+from django.db import migrations, models
+
+
+def fit_durations(apps, schema_editor):
+    """Existing sessions all get the default hour; shorten those that
+    would then run into the next session of their dome, so the overlap
+    constraint can be added."""
+    ShowSession = apps.get_model("shows", "ShowSession")
+    shortened = []
+    previous = None
+    for session in ShowSession.objects.order_by(
+        "planetarium_dome", "show_time"
+    ).only("planetarium_dome", "show_time", "duration").iterator():
+        if (
+            previous is not None
+            and previous.planetarium_dome_id == session.planetarium_dome_id
+            and previous.show_time + previous.duration > session.show_time
+        ):
+            previous.duration = session.show_time - previous.show_time
+            shortened.append(previous)
+        previous = session
+    ShowSession.objects.bulk_update(shortened, ["duration"], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("shows", "0011_showsession_unique_dome_time"),
+    ]
+
+    operations = [
+        BtreeGistExtension(),
+        migrations.AddField(
+            model_name="showsession",
+            name="duration",
+            field=models.DurationField(
+                default=datetime.timedelta(seconds=3600),
+                validators=[
+                    django.core.validators.MinValueValidator(
+                        datetime.timedelta(seconds=60)
+                    ),
+                    django.core.validators.MaxValueValidator(
+                        datetime.timedelta(days=1)
+                    ),
+                ],
+            ),
+        ),
+        migrations.RunPython(fit_durations, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name="showsession",
+            constraint=models.CheckConstraint(
+                check=models.Q(("duration__gt", datetime.timedelta(0))),
+                name="show_session_positive_duration",
+            ),
+        ),
+        migrations.AddConstraint(
+            model_name="showsession",
+            constraint=django.contrib.postgres.constraints.ExclusionConstraint(
+                expressions=[
+                    ("planetarium_dome", "="),
+                    (
+                        shows.models.TimeRange(
+                            models.Func(
+                                models.Value("UTC"),
+                                models.F("show_time"),
+                                function="timezone",
+                                output_field=models.DateTimeField(),
+                            ),
+                            django.db.models.expressions.CombinedExpression(
+                                models.Func(
+                                    models.Value("UTC"),
+                                    models.F("show_time"),
+                                    function="timezone",
+                                    output_field=models.DateTimeField(),
+                                ),
+                                "+",
+                                models.F("duration"),
+                            ),
+                            models.Value("[)"),
+                        ),
+                        "&&",
+                    ),
+                ],
+                name="exclude_overlapping_show_sessions",
+                violation_error_message="The dome is already booked at this time.",
+            ),
+        ),
+    ]
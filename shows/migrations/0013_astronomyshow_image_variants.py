@@ -0,0 +1,18 @@
+# Generated by Django 5.0.6 on 2026-10-17 05:07
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("shows", "0012_showsession_duration_and_more"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="astronomyshow",
+            name="image_variants",
+            field=models.JSONField(default=dict, editable=False),
+        ),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 5.0.6 on 2026-10-17 05:11
+
+import shows.models
+import shows.storage
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("shows", "0013_astronomyshow_image_variants"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="astronomyshow",
+            name="image",
+            field=models.ImageField(
+                null=True,
+                storage=shows.storage.ContentAddressedStorage(),
+                upload_to=shows.models.astronomy_show_image_path,
+            ),
+        ),
+    ]
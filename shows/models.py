@@ -1,20 +1,102 @@
 import pathlib
-import uuid
+from collections import Counter
+from datetime import timedelta
+
+from django.contrib.postgres.aggregates import StringAgg
+from django.contrib.postgres.constraints import ExclusionConstraint
+from django.contrib.postgres.fields import DateTimeRangeField, RangeOperators
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import (
+    SearchQuery,
+    SearchRank,
+    SearchVector,
+    SearchVectorField,
+    TrigramSimilarity,
+)
 from django.core.exceptions import ValidationError
 from django.core.validators import MinValueValidator, MaxValueValidator
 from django.utils.translation import gettext_lazy as _
-from django.db import models
-from django.db.models import UniqueConstraint
-from django.template.defaultfilters import slugify
+from django.db import models, transaction
+from django.db.models import Count, OuterRef, Subquery, UniqueConstraint
+from django.db.models.functions import Coalesce
+from django.utils import timezone
 from Planetarium import settings
+from shows.storage import content_hash, image_storage
+
+
+ASTRONOMY_SHOW_IMAGE_DIRECTORY = "upload/astronomy_show"
 
 
 def astronomy_show_image_path(instance, filename):
+    """Images are named after their content, so identical uploads share
+    one file and a URL always serves the same bytes."""
     filename = (
-        f"{slugify(instance.title)}-{uuid.uuid4()}"
-        f"{pathlib.Path(filename).suffix}"
+        f"{content_hash(instance.image)}"
+        f"{pathlib.Path(filename).suffix.lower()}"
     )
-    return pathlib.Path("upload/astronomy_show/") / filename
+    return pathlib.Path(ASTRONOMY_SHOW_IMAGE_DIRECTORY) / filename
+
+
+SEARCH_CONFIG = "english"
+
+
+def astronomy_show_search_vector():
+    """Weighted search document: title, then theme names, then
+    description."""
+    theme_names = ShowTheme.objects.filter(
+        astronomy_shows=models.OuterRef("pk")
+    ).order_by().values("astronomy_shows").annotate(
+        names=StringAgg("name", " ")
+    ).values("names")
+    return (
+        SearchVector("title", weight="A", config=SEARCH_CONFIG)
+        + SearchVector(
+            models.Subquery(theme_names), weight="B", config=SEARCH_CONFIG
+        )
+        + SearchVector("description", weight="C", config=SEARCH_CONFIG)
+    )
+
+
+class AstronomyShowQuerySet(models.QuerySet):
+    def with_theme_name(self, name):
+        """Shows with a theme whose name contains ``name``, as a semi-join
+        so that shows with several matching themes are not repeated."""
+        return self.filter(
+            models.Exists(
+                AstronomyShow.show_theme.through.objects.filter(
+                    astronomyshow=models.OuterRef("pk"),
+                    showtheme__name__icontains=name,
+                )
+            )
+        )
+
+    def with_pending_image(self):
+        """Shows whose image has no variants rendered yet."""
+        return self.exclude(image="").filter(
+            image__isnull=False, image_variants={}
+        )
+
+    def update_search_vector(self):
+        """Rebuild the search vector after the shows or their themes
+        changed; this also marks the shows as updated."""
+        return self.update(
+            search_vector=astronomy_show_search_vector(),
+            updated_at=timezone.now(),
+        )
+
+    def search(self, text):
+        query = SearchQuery(
+            text, config=SEARCH_CONFIG, search_type="websearch"
+        )
+        return self.filter(
+            models.Q(search_vector=query)
+            | models.Q(title__trigram_similar=text)
+        ).annotate(
+            rank=(
+                SearchRank(models.F("search_vector"), query)
+                + TrigramSimilarity("title", text)
+            )
+        ).order_by("-rank", "id")
 
 
 class AstronomyShow(models.Model):
@@ -23,7 +105,27 @@ class AstronomyShow(models.Model):
     show_theme = models.ManyToManyField(
         "ShowTheme", related_name="astronomy_shows"
     )
-    image = models.ImageField(upload_to=astronomy_show_image_path, null=True)
+    image = models.ImageField(
+        upload_to=astronomy_show_image_path, storage=image_storage, null=True
+    )
+    # {"source": image name, "variants": {variant: {format: file name}}}
+    image_variants = models.JSONField(default=dict, editable=False)
+    search_vector = SearchVectorField(null=True, editable=False)
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)
+
+    objects = AstronomyShowQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            GinIndex(
+                fields=["search_vector"], name="astronomy_show_search_idx"
+            ),
+            GinIndex(
+                fields=["title"],
+                name="astronomy_show_title_trgm_idx",
+                opclasses=["gin_trgm_ops"],
+            ),
+        ]
 
     def __str__(self):
         return f"name_show: {self.title}, description: {self.description}"
@@ -31,6 +133,7 @@ class AstronomyShow(models.Model):
 
 class ShowTheme(models.Model):
     name = models.CharField(max_length=256, unique=True)
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)
 
     def __str__(self):
         return self.name
@@ -43,6 +146,56 @@ def validate_price(value):
         )
 
 
+class TimeRange(models.Func):
+    """``tsrange`` over wall-clock times. DateTimeField columns are
+    ``timestamptz`` and adding an interval to one is not immutable, so
+    indexed ranges are built from the UTC wall-clock time instead."""
+
+    function = "tsrange"
+    output_field = DateTimeRangeField()
+
+
+def wall_clock(expression):
+    return models.Func(
+        models.Value("UTC"),
+        expression,
+        function="timezone",
+        output_field=models.DateTimeField(),
+    )
+
+
+def show_session_time_range():
+    """The half-open range a session occupies its dome for. Queries must
+    build it the same way to use the exclusion constraint's index."""
+    return TimeRange(
+        wall_clock(models.F("show_time")),
+        wall_clock(models.F("show_time")) + models.F("duration"),
+        models.Value("[)"),
+    )
+
+
+class ShowSessionQuerySet(models.QuerySet):
+    def overlapping(self, start, end):
+        """Sessions occupying their dome at any time in [start, end)."""
+        return self.alias(time_range=show_session_time_range()).filter(
+            time_range__overlap=TimeRange(
+                models.Value(start), models.Value(end), models.Value("[)")
+            )
+        )
+
+    def with_availability(self):
+        return self.annotate(
+            capacity=(
+                models.F("planetarium_dome__rows")
+                * models.F("planetarium_dome__seats_in_row")
+            ),
+            tickets_sold=models.F("sold_count"),
+            tickets_available=(
+                models.F("capacity") - models.F("tickets_sold")
+            ),
+        )
+
+
 class ShowSession(models.Model):
     astronomy_show = models.ForeignKey(
         AstronomyShow, on_delete=models.CASCADE, related_name="show_sessions"
@@ -53,9 +206,58 @@ class ShowSession(models.Model):
         related_name="dome_sessions"
     )
     show_time = models.DateTimeField()
+    duration = models.DurationField(
+        default=timedelta(hours=1),
+        validators=[
+            MinValueValidator(timedelta(minutes=1)),
+            MaxValueValidator(timedelta(hours=24)),
+        ],
+    )
     price = models.DecimalField(
         max_digits=10, decimal_places=2, validators=[validate_price], default=0
     )
+    sold_count = models.PositiveIntegerField(default=0, editable=False)
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)
+
+    objects = ShowSessionQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=["show_time", "id"], name="show_session_time_id_idx"
+            ),
+        ]
+        constraints = [
+            models.UniqueConstraint(
+                fields=["planetarium_dome", "show_time"],
+                name="unique_show_session_dome_time",
+            ),
+            models.CheckConstraint(
+                check=models.Q(duration__gt=timedelta(0)),
+                name="show_session_positive_duration",
+            ),
+            ExclusionConstraint(
+                name="exclude_overlapping_show_sessions",
+                expressions=[
+                    ("planetarium_dome", RangeOperators.EQUAL),
+                    (show_session_time_range(), RangeOperators.OVERLAPS),
+                ],
+                violation_error_message=_(
+                    "The dome is already booked at this time."
+                ),
+            ),
+        ]
+
+    @property
+    def end_time(self):
+        return self.show_time + self.duration
+
+    @classmethod
+    def change_sold_count(cls, show_session_id, delta):
+        cls.objects.filter(pk=show_session_id).update(
+            sold_count=models.F("sold_count") + delta,
+            updated_at=timezone.now(),
+        )
 
     def __str__(self):
         return (f"Show session: {self.astronomy_show.title}, "
@@ -71,6 +273,7 @@ class PlanetariumDome(models.Model):
     seats_in_row = models.PositiveIntegerField(
         validators=[MinValueValidator(1), MaxValueValidator(50)]
     )
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)
 
     @property
     def capacity(self):
@@ -102,6 +305,33 @@ class Reservation(models.Model):
         return f"reservation for: {self.user}, created at: {self.created_at}"
 
 
+class TicketQuerySet(models.QuerySet):
+    def bulk_create(self, objs, *args, **kwargs):
+        """Add the created tickets to their show sessions' sold_count,
+        which the skipped signals would have done, one update per show
+        session."""
+        with transaction.atomic(using=self.db):
+            tickets = super().bulk_create(objs, *args, **kwargs)
+            sold = Counter(ticket.show_session_id for ticket in tickets)
+            if kwargs.get("ignore_conflicts") or kwargs.get(
+                "update_conflicts"
+            ):
+                # Which tickets were written is unknown; count them.
+                tickets_sold = Ticket.objects.filter(
+                    show_session=OuterRef("pk")
+                ).order_by().values("show_session").annotate(
+                    count=Count("id")
+                ).values("count")
+                ShowSession.objects.filter(pk__in=sold).update(
+                    sold_count=Coalesce(Subquery(tickets_sold), 0),
+                    updated_at=timezone.now(),
+                )
+            else:
+                for show_session_id, count in sold.items():
+                    ShowSession.change_sold_count(show_session_id, count)
+        return tickets
+
+
 class Ticket(models.Model):
     row = models.PositiveIntegerField()
     seat = models.PositiveIntegerField()
@@ -112,6 +342,8 @@ class Ticket(models.Model):
         Reservation, on_delete=models.CASCADE, related_name="tickets"
     )
 
+    objects = TicketQuerySet.as_manager()
+
     class Meta:
         constraints = [
             UniqueConstraint(
@@ -132,6 +364,12 @@ class Ticket(models.Model):
                 "the seat must be from 1 to  {}".format(num_seats_in_row)
             )
 
+    def save(self, *args, **kwargs):
+        # Keeps the ticket and the sold_count update from post_save in one
+        # transaction.
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+
     def clean(self):
         Ticket.validate_seats_row(
             self.row,
@@ -147,3 +385,46 @@ class Ticket(models.Model):
             f"show_session: {self.show_session}, "
             f"reservation: {self.reservation.user}"
         )
+
+
+class SeatHoldQuerySet(models.QuerySet):
+    def active(self):
+        return self.filter(expires_at__gt=timezone.now())
+
+    def expired(self):
+        return self.filter(expires_at__lte=timezone.now())
+
+
+class SeatHold(models.Model):
+    row = models.PositiveIntegerField()
+    seat = models.PositiveIntegerField()
+    show_session = models.ForeignKey(
+        ShowSession, on_delete=models.CASCADE, related_name="seat_holds"
+    )
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name="seat_holds"
+    )
+    expires_at = models.DateTimeField(db_index=True)
+
+    objects = SeatHoldQuerySet.as_manager()
+
+    class Meta:
+        constraints = [
+            UniqueConstraint(
+                fields=["row", "seat", "show_session"],
+                name="unique_seat_hold"
+            )
+        ]
+
+    @property
+    def is_active(self):
+        return self.expires_at > timezone.now()
+
+    def __str__(self):
+        return (
+            f"row: {self.row}, seat: {self.seat}, "
+            f"show_session: {self.show_session}, "
+            f"held by: {self.user} until {self.expires_at}"
+        )
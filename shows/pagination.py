@@ -0,0 +1,25 @@
+from rest_framework.pagination import CursorPagination
+
+
+def ordering_fields(paginator):
+    """Fields a cursor paginator reads from the page's rows to build its
+    links."""
+    ordering = getattr(paginator, "ordering", None) or ()
+    if isinstance(ordering, str):
+        ordering = (ordering,)
+    return [field.lstrip("-") for field in ordering]
+
+
+class IdCursorPagination(CursorPagination):
+    """Newest first, keyed on the primary key index."""
+
+    ordering = "-id"
+    page_size = 20
+    page_size_query_param = "page_size"
+    max_page_size = 100
+
+
+class ShowSessionCursorPagination(IdCursorPagination):
+    """Chronological, keyed on the (show_time, id) index."""
+
+    ordering = ("show_time", "id")
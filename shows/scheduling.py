@@ -0,0 +1,47 @@
+from bisect import bisect_left, bisect_right
+
+from django.db.models import F
+
+from shows.models import ShowSession
+
+
+def dome_bookings(dome_id, start, end):
+    """(start, end) of the sessions occupying the dome at any time in
+    [start, end), ordered by start. The range lookup is answered by the
+    exclusion constraint's GiST index, however long the history is."""
+    return ShowSession.objects.filter(
+        planetarium_dome_id=dome_id
+    ).overlapping(start, end).order_by("show_time").values_list(
+        "show_time", F("show_time") + F("duration")
+    )
+
+
+def conflicting_show_times(dome_id, show_times, duration):
+    """The sorted ``show_times`` whose sessions of ``duration`` would
+    overlap one already booked in the dome."""
+    if not show_times:
+        return []
+    conflicts = set()
+    for booked_from, booked_until in dome_bookings(
+        dome_id, show_times[0], show_times[-1] + duration
+    ):
+        conflicts.update(
+            show_times[
+                bisect_right(show_times, booked_from - duration):
+                bisect_left(show_times, booked_until)
+            ]
+        )
+    return sorted(conflicts)
+
+
+def find_free_slots(dome_id, start, end):
+    """The gaps between the dome's sessions in [start, end)."""
+    slots = []
+    free_from = start
+    for booked_from, booked_until in dome_bookings(dome_id, start, end):
+        if booked_from > free_from:
+            slots.append((free_from, booked_from))
+        free_from = max(free_from, booked_until)
+    if free_from < end:
+        slots.append((free_from, end))
+    return slots
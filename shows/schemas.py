@@ -3,6 +3,21 @@ from drf_spectacular.utils import (
     extend_schema, OpenApiParameter, OpenApiExample
 )
 
+
+def sparse_fieldset_parameters(*expandable):
+    parameters = [
+        OpenApiParameter(name="fields", type=OpenApiTypes.STR,
+                         description="Comma-separated fields to return"),
+    ]
+    if expandable:
+        parameters.append(
+            OpenApiParameter(name="expand", type=OpenApiTypes.STR,
+                             description="Comma-separated relations to "
+                                         "nest: " + ", ".join(expandable))
+        )
+    return parameters
+
+
 ticket_list_schema = extend_schema(
         parameters=[
             OpenApiParameter(name="show_session", type=OpenApiTypes.STR,
@@ -11,6 +26,7 @@ ticket_list_schema = extend_schema(
                              description="Filter by reservation(username)"),
             OpenApiParameter(name="planetarium_dome", type=OpenApiTypes.STR,
                              description="Filter by planetarium_dome(name)"),
+            *sparse_fieldset_parameters("show_session", "reservation"),
         ],
         examples=[
             OpenApiExample(
@@ -61,6 +77,12 @@ astronomy_show_list_schema = extend_schema(
                              description="Filter by show_name(title)"),
             OpenApiParameter(name="description", type=OpenApiTypes.STR,
                              description="Filter by description(description)"),
+            OpenApiParameter(name="q", type=OpenApiTypes.STR,
+                             description="Full-text search over title, "
+                                         "description and theme names "
+                                         "with fuzzy title matching; "
+                                         "results are ranked by relevance"),
+            *sparse_fieldset_parameters("show_theme"),
         ],
         examples=[
             OpenApiExample(
@@ -138,10 +160,26 @@ show_session_list_schema = extend_schema(
                              description="Filter by description(description)"),
             OpenApiParameter(name="name", type=OpenApiTypes.STR,
                              description="Filter by name(name)"),
+            OpenApiParameter(name="planetarium_dome", type=OpenApiTypes.INT,
+                             description="Filter by planetarium_dome(id)"),
+            OpenApiParameter(name="date", type=OpenApiTypes.DATE,
+                             description="Sessions starting on this day"),
             OpenApiParameter(name="show_time", type=OpenApiTypes.DATE,
-                             description="Filter by show_time(show_time)"),
+                             description="Same as date", deprecated=True),
+            OpenApiParameter(name="show_time_after",
+                             type=OpenApiTypes.DATETIME,
+                             description="Sessions starting at or after "
+                                         "this date or time"),
+            OpenApiParameter(name="show_time_before",
+                             type=OpenApiTypes.DATETIME,
+                             description="Sessions starting before "
+                                         "this date or time"),
             OpenApiParameter(name="price", type=OpenApiTypes.DECIMAL,
                              description="Filter by price"),
+            OpenApiParameter(name="available__gte", type=OpenApiTypes.INT,
+                             description="Only sessions with at least "
+                                         "this many tickets available"),
+            *sparse_fieldset_parameters("astronomy_show", "planetarium_dome"),
         ],
         examples=[
             OpenApiExample(
@@ -162,7 +200,10 @@ show_session_list_schema = extend_schema(
                             "seats_in_row": 30
                         },
                         "show_time": "2024-06-10T14:00:00Z",
-                        "price": "20.00"
+                        "price": "20.00",
+                        "capacity": 600,
+                        "tickets_sold": 120,
+                        "tickets_available": 480
                     }
                 ]
             ),
@@ -194,7 +235,8 @@ reservation_list_schema = extend_schema(
                 name="email",
                 type=OpenApiTypes.STR,
                 description="Filter by user(email)",
-            )
+            ),
+            *sparse_fieldset_parameters(),
         ],
         examples=[
             OpenApiExample(
@@ -247,3 +289,234 @@ reservation_list_schema = extend_schema(
             ),
         ]
     )
+
+show_session_seat_map_schema = extend_schema(
+        responses={200: OpenApiTypes.OBJECT},
+        description="Seat occupancy of a show session. `occupied` is a "
+                    "base64 bitset of `rows * seats_in_row` bits in "
+                    "row-major order: seat (row, seat) is bit "
+                    "`(row - 1) * seats_in_row + (seat - 1)`, counted "
+                    "from the most significant bit of the first byte. "
+                    "`held` uses the same layout for active seat holds.",
+        examples=[
+            OpenApiExample(
+                "Seat Map Example",
+                summary="Example of a show session seat map",
+                description="Row 1, seats 1 and 2 are sold, "
+                            "row 2, seat 1 is held.",
+                value={
+                    "show_session": 1,
+                    "rows": 2,
+                    "seats_in_row": 4,
+                    "capacity": 8,
+                    "tickets_sold": 2,
+                    "seats_held": 1,
+                    "occupied": "wA==",
+                    "held": "CA==",
+                    "held_until": "2024-06-10T13:50:00"
+                }
+            ),
+        ]
+    )
+
+ticket_book_schema = extend_schema(
+        description="Book several seats of one show session under a single "
+                    "reservation. Either every seat is booked or none is.",
+        examples=[
+            OpenApiExample(
+                "Book Example",
+                summary="Example of booking several seats",
+                description="An example request body for booking seats.",
+                value={
+                    "show_session": 1,
+                    "seats": [
+                        {"row": 5, "seat": 10},
+                        {"row": 5, "seat": 11}
+                    ]
+                },
+                request_only=True
+            ),
+            OpenApiExample(
+                "Booked Example",
+                summary="Example of a booking response",
+                description="An example response body for booked seats.",
+                value={
+                    "show_session": 1,
+                    "reservation": 7,
+                    "tickets": [
+                        {"id": 21, "row": 5, "seat": 10,
+                         "show_session": 1, "reservation": 7},
+                        {"id": 22, "row": 5, "seat": 11,
+                         "show_session": 1, "reservation": 7}
+                    ]
+                },
+                response_only=True
+            ),
+        ]
+    )
+
+seat_hold_create_schema = extend_schema(
+        description="Hold seats of one show session for the current user "
+                    "until `expires_at`. Held seats cannot be booked or "
+                    "held by anyone else and are shown in the seat map.",
+        examples=[
+            OpenApiExample(
+                "Hold Example",
+                summary="Example of holding seats",
+                description="An example request body for holding seats.",
+                value={
+                    "show_session": 1,
+                    "seats": [
+                        {"row": 5, "seat": 10},
+                        {"row": 5, "seat": 11}
+                    ]
+                },
+                request_only=True
+            ),
+            OpenApiExample(
+                "Held Example",
+                summary="Example of a hold response",
+                description="An example response body for held seats.",
+                value={
+                    "show_session": 1,
+                    "expires_at": "2024-06-10 13:50:00",
+                    "holds": [
+                        {"id": 3, "row": 5, "seat": 10, "show_session": 1,
+                         "expires_at": "2024-06-10 13:50:00"},
+                        {"id": 4, "row": 5, "seat": 11, "show_session": 1,
+                         "expires_at": "2024-06-10 13:50:00"}
+                    ]
+                },
+                response_only=True
+            ),
+        ]
+    )
+
+show_session_auto_assign_schema = extend_schema(
+        description="Suggest the best block of `party_size` adjacent free "
+                    "seats in one row, preferring the centre of the dome. "
+                    "Seats are not held or booked by this call.",
+        examples=[
+            OpenApiExample(
+                "Auto Assign Example",
+                summary="Example of asking for seats",
+                description="An example request body for auto-assigning "
+                            "seats.",
+                value={"party_size": 3},
+                request_only=True
+            ),
+            OpenApiExample(
+                "Assigned Example",
+                summary="Example of assigned seats",
+                description="An example response body with assigned seats.",
+                value={"show_session": 1, "row": 10, "seats": [14, 15, 16]},
+                response_only=True
+            ),
+        ]
+    )
+
+show_session_schedule_schema = extend_schema(
+        description="Create every session of a recurring schedule at once: "
+                    "each of `times` on each of `weekdays` from "
+                    "`start_date` to `end_date` inclusive. Nothing is "
+                    "created if any of the show times is already taken "
+                    "in the dome.",
+        examples=[
+            OpenApiExample(
+                "Schedule Example",
+                summary="Example of a recurring schedule",
+                description="Tuesday to Sunday at 14:00, 16:00 and 19:00 "
+                            "for the summer.",
+                value={
+                    "astronomy_show": 1,
+                    "planetarium_dome": 1,
+                    "price": "12.50",
+                    "start_date": "2024-06-01",
+                    "end_date": "2024-08-31",
+                    "weekdays": ["tue", "wed", "thu", "fri", "sat", "sun"],
+                    "times": ["14:00", "16:00", "19:00"],
+                },
+                request_only=True
+            ),
+        ]
+    )
+
+planetarium_dome_free_slots_schema = extend_schema(
+        parameters=[
+            OpenApiParameter(
+                "date",
+                type=OpenApiTypes.DATE,
+                required=True,
+                description="Day to find free time on (ex. ?date=2024-06-20)",
+            ),
+            OpenApiParameter(
+                "min_duration",
+                type=OpenApiTypes.INT,
+                description="Only return gaps of at least this many minutes "
+                            "(ex. ?min_duration=90)",
+            ),
+        ],
+        responses={200: OpenApiTypes.OBJECT},
+        description="Gaps between the sessions booked in the dome on "
+                    "`date`, from midnight to midnight.",
+        examples=[
+            OpenApiExample(
+                "Free Slots Example",
+                summary="Example of a dome's free time",
+                description="Sessions are booked from 14:00 to 15:00 and "
+                            "from 19:00 to 20:30.",
+                value={
+                    "planetarium_dome": 1,
+                    "date": "2024-06-20",
+                    "free_slots": [
+                        {"start": "2024-06-20 00:00:00",
+                         "end": "2024-06-20 14:00:00"},
+                        {"start": "2024-06-20 15:00:00",
+                         "end": "2024-06-20 19:00:00"},
+                        {"start": "2024-06-20 20:30:00",
+                         "end": "2024-06-21 00:00:00"},
+                    ],
+                },
+            ),
+        ]
+    )
+
+
+def export_parameters():
+    return [
+        OpenApiParameter(name="format", type=OpenApiTypes.STR,
+                         enum=["ndjson", "csv"],
+                         description="Export format, also negotiable "
+                                     "through the Accept header"),
+        OpenApiParameter(name="show_session", type=OpenApiTypes.INT,
+                         description="Filter by show session id"),
+        OpenApiParameter(name="planetarium_dome", type=OpenApiTypes.INT,
+                         description="Filter by planetarium dome id"),
+        OpenApiParameter(name="show_time_after",
+                         type=OpenApiTypes.DATETIME,
+                         description="Sessions at or after this date "
+                                     "or datetime"),
+        OpenApiParameter(name="show_time_before",
+                         type=OpenApiTypes.DATETIME,
+                         description="Sessions strictly before this "
+                                     "date or datetime"),
+    ]
+
+
+ticket_export_schema = extend_schema(
+        parameters=export_parameters(),
+        responses={(200, "application/x-ndjson"): OpenApiTypes.STR,
+                   (200, "text/csv"): OpenApiTypes.STR},
+        description="Stream every ticket matching the filters, one row "
+                    "per ticket with its session, show, dome, price and "
+                    "buyer. Staff only.",
+    )
+
+reservation_export_schema = extend_schema(
+        parameters=export_parameters(),
+        responses={(200, "application/x-ndjson"): OpenApiTypes.STR,
+                   (200, "text/csv"): OpenApiTypes.STR},
+        description="Stream reservations having a ticket that matches the "
+                    "filters, with their ticket count and total price. "
+                    "Staff only.",
+    )
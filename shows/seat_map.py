@@ -0,0 +1,185 @@
+import base64
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils import timezone
+
+from shows.models import Ticket, SeatHold
+
+
+def seat_map_cache_key(show_session_id):
+    return f"seat_map:{show_session_id}"
+
+
+def seat_index(row, seat, seats_in_row):
+    """Position of a seat in the row-major seat bitmap."""
+    return (row - 1) * seats_in_row + (seat - 1)
+
+
+def encode_seats(seats, rows, seats_in_row):
+    """Pack (row, seat) pairs into a base64 bitset, most significant
+    bit of the first byte being row 1, seat 1."""
+    bitmap = bytearray((rows * seats_in_row + 7) // 8)
+    for row, seat in seats:
+        index = seat_index(row, seat, seats_in_row)
+        bitmap[index >> 3] |= 0x80 >> (index & 7)
+    return base64.b64encode(bitmap).decode()
+
+
+def decode_seats(encoded):
+    """Unpack a base64 bitset into an int, row 1 seat 1 being the highest
+    bit, together with its width in bits."""
+    bitmap = base64.b64decode(encoded)
+    return int.from_bytes(bitmap, "big"), len(bitmap) * 8
+
+
+def taken_seats(show_session):
+    return Ticket.objects.filter(show_session=show_session).values_list(
+        "row", "seat"
+    )
+
+
+def held_seats(show_session):
+    return SeatHold.objects.active().filter(
+        show_session=show_session
+    ).values_list("row", "seat", "expires_at")
+
+
+def build_seat_map(show_session):
+    return seat_map_from(
+        show_session,
+        list(taken_seats(show_session)),
+        list(held_seats(show_session)),
+    )
+
+
+async def abuild_seat_map(show_session):
+    return seat_map_from(
+        show_session,
+        [seat async for seat in taken_seats(show_session)],
+        [seat async for seat in held_seats(show_session)],
+    )
+
+
+def seat_map_from(show_session, taken, holds):
+    dome = show_session.planetarium_dome
+    return {
+        "show_session": show_session.id,
+        "rows": dome.rows,
+        "seats_in_row": dome.seats_in_row,
+        "capacity": dome.capacity,
+        "tickets_sold": len(taken),
+        "seats_held": len(holds),
+        "occupied": encode_seats(taken, dome.rows, dome.seats_in_row),
+        "held": encode_seats(
+            [(row, seat) for row, seat, _ in holds],
+            dome.rows,
+            dome.seats_in_row,
+        ),
+        "held_until": min(
+            (expires_at for _, _, expires_at in holds), default=None
+        ),
+    }
+
+
+def seat_map_timeout(seat_map):
+    """Cache a seat map no longer than its first hold stays active."""
+    timeout = settings.SEAT_MAP_CACHE_TIMEOUT
+    if seat_map["held_until"] is not None:
+        remaining = seat_map["held_until"] - timezone.now()
+        timeout = max(0, min(timeout, int(remaining.total_seconds())))
+    return timeout
+
+
+def get_seat_map(show_session_id, get_show_session):
+    """Return the cached seat map, building it on a miss.
+
+    ``get_show_session`` is only called on a cache miss, so polling a
+    warm seat map does not touch the database at all.
+    """
+    try:
+        # Signals invalidate the key of the integer id, however the URL
+        # spells it ("05").
+        key = seat_map_cache_key(int(show_session_id))
+    except (TypeError, ValueError):
+        return build_seat_map(get_show_session())
+    seat_map = cache.get(key)
+    if seat_map is None:
+        seat_map = build_seat_map(get_show_session())
+        cache.set(key, seat_map, seat_map_timeout(seat_map))
+    return seat_map
+
+
+async def aget_seat_map(show_session_id, aget_show_session):
+    """get_seat_map for async views."""
+    try:
+        key = seat_map_cache_key(int(show_session_id))
+    except (TypeError, ValueError):
+        return await abuild_seat_map(await aget_show_session())
+    seat_map = await cache.aget(key)
+    if seat_map is None:
+        seat_map = await abuild_seat_map(await aget_show_session())
+        await cache.aset(key, seat_map, seat_map_timeout(seat_map))
+    return seat_map
+
+
+def invalidate_seat_maps(*show_session_ids):
+    cache.delete_many(
+        [seat_map_cache_key(show_session_id)
+         for show_session_id in show_session_ids]
+    )
+
+
+def find_best_block(seat_map, party_size):
+    """Find ``party_size`` adjacent free seats in one row, as close to
+    the centre of the dome as possible.
+
+    Each row is scanned as a bitmask: AND-ing the free mask with itself
+    shifted ``party_size - 1`` times leaves one bit per possible block
+    start, and the start closest to the centre of the row is picked with
+    two bit operations. Rows are visited from the centre outwards, so
+    the scan stops as soon as no further row can beat the best block.
+    Returns ``(row, [seats])`` or ``None`` when nothing fits.
+    """
+    rows, seats_in_row = seat_map["rows"], seat_map["seats_in_row"]
+    if party_size > seats_in_row:
+        return None
+    occupied, width = decode_seats(seat_map["occupied"])
+    held, _ = decode_seats(seat_map["held"])
+    taken = occupied | held
+    full = (1 << seats_in_row) - 1
+    centre_row = (rows - 1) / 2
+    # Bit b of a row mask is seat ``seats_in_row - b``; the grid is
+    # symmetric, so the ideal block start is the same in both directions.
+    centre_start = (seats_in_row - party_size) / 2
+    target = int(centre_start)
+    below_target = (1 << (target + 1)) - 1
+
+    best = None
+    for row in sorted(range(rows), key=lambda r: abs(r - centre_row)):
+        row_score = (row - centre_row) ** 2
+        if best is not None and row_score >= best[0]:
+            break
+        free = ~(taken >> (width - (row + 1) * seats_in_row)) & full
+        starts = free
+        for shift in range(1, party_size):
+            starts &= free >> shift
+        if not starts:
+            continue
+        candidates = []
+        above = starts >> target
+        if above:
+            candidates.append((above & -above).bit_length() - 1 + target)
+        below = starts & below_target
+        if below:
+            candidates.append(below.bit_length() - 1)
+        for start in candidates:
+            score = row_score + (start - centre_start) ** 2
+            if best is None or score < best[0]:
+                best = (score, row, start)
+
+    if best is None:
+        return None
+    _, row, start = best
+    first_seat = seats_in_row - start - party_size + 1
+    return row + 1, list(range(first_seat, first_seat + party_size))
@@ -1,14 +1,24 @@
+import operator
+from datetime import datetime, timedelta
 from decimal import Decimal
+from functools import reduce
 
+from django.conf import settings
 from django.contrib.auth import get_user_model
+from django.db import transaction, IntegrityError
+from django.db.models import Q
+from django.utils import timezone
 from django.core.validators import (
     RegexValidator,
     MinValueValidator,
     MaxValueValidator
 )
+from drf_spectacular.types import OpenApiTypes
+from drf_spectacular.utils import extend_schema_field
 from rest_framework import serializers
 from rest_framework.validators import UniqueTogetherValidator, UniqueValidator
 
+from shows.fieldsets import ExpandableFieldsMixin
 from shows.models import (
     Ticket,
     Reservation,
@@ -16,7 +26,11 @@ from shows.models import (
     AstronomyShow,
     PlanetariumDome,
     ShowTheme,
+    SeatHold,
 )
+from shows.scheduling import conflicting_show_times
+from shows.seat_map import invalidate_seat_maps
+from shows.storage import image_storage
 from user.serializers import UserSerializer
 
 
@@ -59,7 +73,32 @@ class AstronomyShowSerializer(serializers.ModelSerializer):
         fields = ("title", "description", "show_theme")
 
 
-class ShowSessionSerializer(serializers.ModelSerializer):
+class DomeAvailabilityMixin:
+    """Reject sessions overlapping another one in the same dome with a
+    validation error instead of the exclusion constraint's IntegrityError.
+    """
+
+    def validate(self, attrs):
+        attrs = super().validate(attrs)
+        instance = self.instance or ShowSession()
+        dome = attrs.get("planetarium_dome")
+        dome_id = dome.id if dome else instance.planetarium_dome_id
+        show_time = attrs.get("show_time", instance.show_time)
+        duration = attrs.get("duration", instance.duration)
+        if ShowSession.objects.filter(
+            planetarium_dome_id=dome_id
+        ).overlapping(show_time, show_time + duration).exclude(
+            pk=instance.pk
+        ).exists():
+            raise serializers.ValidationError(
+                {"show_time": "the dome is already booked at this time"}
+            )
+        return attrs
+
+
+class ShowSessionSerializer(
+    DomeAvailabilityMixin, serializers.ModelSerializer
+):
     price = serializers.DecimalField(
         max_digits=10,
         decimal_places=2,
@@ -69,10 +108,22 @@ class ShowSessionSerializer(serializers.ModelSerializer):
         ],
     )
     show_time = serializers.DateTimeField(format="%Y-%m-%d %H:%M:%S")
+    capacity = serializers.IntegerField(read_only=True)
+    tickets_sold = serializers.IntegerField(read_only=True)
+    tickets_available = serializers.IntegerField(read_only=True)
 
     class Meta:
         model = ShowSession
-        fields = ("astronomy_show", "planetarium_dome", "show_time", "price")
+        fields = (
+            "astronomy_show",
+            "planetarium_dome",
+            "show_time",
+            "duration",
+            "price",
+            "capacity",
+            "tickets_sold",
+            "tickets_available",
+        )
 
 
 class TicketSerializer(serializers.ModelSerializer):
@@ -101,7 +152,9 @@ class ReservationSerializer(serializers.ModelSerializer):
         read_only_fields = ["id", "user", "created_at"]
 
 
-class TicketListSerializer(serializers.ModelSerializer):
+class TicketListSerializer(
+    ExpandableFieldsMixin, serializers.ModelSerializer
+):
     show_session = serializers.CharField(
         source="show_session.astronomy_show.title", read_only=True
     )
@@ -122,6 +175,15 @@ class TicketListSerializer(serializers.ModelSerializer):
             "reservation",
             "planetarium_dome",
         )
+        expandable_fields = {
+            "show_session": (
+                "ShowSessionTicketSerializer", {"read_only": True}
+            ),
+            "reservation": (
+                UserSerializer,
+                {"source": "reservation.user", "read_only": True},
+            ),
+        }
 
 
 class TicketCreateSerializer(serializers.ModelSerializer):
@@ -142,26 +204,178 @@ class TicketCreateSerializer(serializers.ModelSerializer):
             attrs["show_session"].planetarium_dome.seats_in_row,
             serializers.ValidationError,
         )
+        if SeatHold.objects.active().filter(
+            row=attrs["row"],
+            seat=attrs["seat"],
+            show_session=attrs["show_session"],
+        ).exclude(user=self.context["request"].user).exists():
+            raise serializers.ValidationError(
+                "the seat is held by another user"
+            )
         return attrs
 
 
-class UserTicketSerializer(serializers.ModelSerializer):
-    class Meta:
-        model = get_user_model()
-        fields = ("email",)
+class SeatSerializer(serializers.Serializer):
+    row = serializers.IntegerField(min_value=1)
+    seat = serializers.IntegerField(min_value=1)
 
 
-class ReservationDetailSerializer(serializers.ModelSerializer):
-    tickets = serializers.SerializerMethodField()
-    user = UserSerializer()
+def seats_filter(seats):
+    """Q object matching any of the given (row, seat) pairs."""
+    return reduce(
+        operator.or_, (Q(row=row, seat=seat) for row, seat in seats)
+    )
+
+
+class SeatSelectionSerializer(serializers.Serializer):
+    show_session = serializers.PrimaryKeyRelatedField(
+        queryset=ShowSession.objects.select_related("planetarium_dome")
+    )
+    seats = SeatSerializer(many=True, allow_empty=False, write_only=True)
+
+    def validate(self, attrs):
+        dome = attrs["show_session"].planetarium_dome
+        seats = {(seat["row"], seat["seat"]) for seat in attrs["seats"]}
+        if len(seats) != len(attrs["seats"]):
+            raise serializers.ValidationError(
+                "the same seat is requested more than once"
+            )
+        for row, seat in seats:
+            Ticket.validate_seats_row(
+                row,
+                dome.rows,
+                seat,
+                dome.seats_in_row,
+                serializers.ValidationError,
+            )
+        rows = {row for row, _ in seats}
+        taken = seats.intersection(
+            Ticket.objects.filter(
+                show_session=attrs["show_session"], row__in=rows
+            ).values_list("row", "seat")
+        )
+        held = seats.intersection(
+            SeatHold.objects.active().filter(
+                show_session=attrs["show_session"], row__in=rows
+            ).exclude(
+                user=self.context["request"].user
+            ).values_list("row", "seat")
+        )
+        if taken or held:
+            raise serializers.ValidationError(
+                {"seats": [
+                    f"row {row}, seat {seat} is already taken"
+                    for row, seat in sorted(taken)
+                ] + [
+                    f"row {row}, seat {seat} is held by another user"
+                    for row, seat in sorted(held)
+                ]}
+            )
+        attrs["seats"] = sorted(seats)
+        return attrs
+
+
+class TicketBookingSerializer(SeatSelectionSerializer):
+    reservation = serializers.PrimaryKeyRelatedField(read_only=True)
+    tickets = TicketSerializer(many=True, read_only=True)
+
+    def create(self, validated_data):
+        show_session = validated_data["show_session"]
+        seats = validated_data["seats"]
+        user = self.context["request"].user
+        try:
+            with transaction.atomic():
+                reservation = Reservation.objects.create(user=user)
+                tickets = Ticket.objects.bulk_create(
+                    Ticket(
+                        row=row,
+                        seat=seat,
+                        show_session=show_session,
+                        reservation=reservation,
+                    )
+                    for row, seat in seats
+                )
+                SeatHold.objects.filter(
+                    seats_filter(seats), show_session=show_session, user=user
+                ).delete()
+        except IntegrityError:
+            raise serializers.ValidationError(
+                {"seats": ["some of the seats have just been taken"]}
+            )
+        invalidate_seat_maps(show_session.id)
+        return {
+            "show_session": show_session,
+            "reservation": reservation,
+            "tickets": tickets,
+        }
+
+
+class AutoAssignSerializer(serializers.Serializer):
+    party_size = serializers.IntegerField(
+        min_value=1, max_value=50, write_only=True
+    )
+    show_session = serializers.IntegerField(read_only=True)
+    row = serializers.IntegerField(read_only=True)
+    seats = serializers.ListField(
+        child=serializers.IntegerField(), read_only=True
+    )
+
+
+class SeatHoldSerializer(serializers.ModelSerializer):
+    expires_at = serializers.DateTimeField(
+        format="%Y-%m-%d %H:%M:%S", read_only=True
+    )
 
     class Meta:
-        model = Reservation
-        fields = ["id", "user", "created_at", "tickets"]
+        model = SeatHold
+        fields = ("id", "row", "seat", "show_session", "expires_at")
 
-    def get_tickets(self, obj):
-        tickets = Ticket.objects.filter(reservation=obj)
-        return TicketDetailSerializer(tickets, many=True).data
+
+class SeatHoldCreateSerializer(SeatSelectionSerializer):
+    expires_at = serializers.DateTimeField(
+        format="%Y-%m-%d %H:%M:%S", read_only=True
+    )
+    holds = SeatHoldSerializer(many=True, read_only=True)
+
+    def create(self, validated_data):
+        show_session = validated_data["show_session"]
+        seats = validated_data["seats"]
+        user = self.context["request"].user
+        now = timezone.now()
+        expires_at = now + settings.SEAT_HOLD_TTL
+        try:
+            with transaction.atomic():
+                # Lapsed holds on these seats and the user's own holds
+                # are replaced; everything else is left to the sweeper.
+                SeatHold.objects.filter(
+                    seats_filter(seats), show_session=show_session
+                ).filter(Q(user=user) | Q(expires_at__lte=now)).delete()
+                holds = SeatHold.objects.bulk_create(
+                    SeatHold(
+                        row=row,
+                        seat=seat,
+                        show_session=show_session,
+                        user=user,
+                        expires_at=expires_at,
+                    )
+                    for row, seat in seats
+                )
+        except IntegrityError:
+            raise serializers.ValidationError(
+                {"seats": ["some of the seats have just been held"]}
+            )
+        invalidate_seat_maps(show_session.id)
+        return {
+            "show_session": show_session,
+            "expires_at": expires_at,
+            "holds": holds,
+        }
+
+
+class UserTicketSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = get_user_model()
+        fields = ("email",)
 
 
 class PlanetariumDomeTicketSerializer(serializers.ModelSerializer):
@@ -174,16 +388,14 @@ class PlanetariumDomeTicketSerializer(serializers.ModelSerializer):
 
 class AstronomyShowTicketSerializer(serializers.ModelSerializer):
     show_name = serializers.CharField(source="title")
-    show_theme = serializers.SerializerMethodField()
+    show_theme = serializers.SlugRelatedField(
+        many=True, read_only=True, slug_field="name"
+    )
 
     class Meta:
         model = AstronomyShow
         fields = ("show_name", "show_theme")
 
-    @staticmethod
-    def get_show_theme(obj):
-        return [theme.name for theme in obj.show_theme.all()]
-
 
 class ShowSessionTicketSerializer(serializers.ModelSerializer):
     planetarium_dome = PlanetariumDomeTicketSerializer()
@@ -195,25 +407,67 @@ class ShowSessionTicketSerializer(serializers.ModelSerializer):
 
 
 class TicketDetailSerializer(serializers.ModelSerializer):
-    reservation = serializers.SerializerMethodField()
+    reservation = UserSerializer(source="reservation.user", read_only=True)
     show_session = ShowSessionTicketSerializer()
 
     class Meta:
         model = Ticket
         fields = ("id", "row", "seat", "reservation", "show_session")
 
-    def get_reservation(self, obj):
-        return UserSerializer(obj.reservation.user).data
+
+class ReservationDetailSerializer(
+    ExpandableFieldsMixin, serializers.ModelSerializer
+):
+    tickets = TicketDetailSerializer(many=True, read_only=True)
+    user = UserSerializer()
+
+    class Meta:
+        model = Reservation
+        fields = ["id", "user", "created_at", "tickets"]
 
 
-class AstronomyShowListSerializer(serializers.ModelSerializer):
+@extend_schema_field(OpenApiTypes.OBJECT)
+class ImageVariantsField(serializers.Field):
+    """URLs of the rendered image variants by variant and format; empty
+    until process_show_images has rendered them."""
+
+    def __init__(self, **kwargs):
+        kwargs["read_only"] = True
+        super().__init__(**kwargs)
+
+    def to_representation(self, value):
+        request = self.context.get("request")
+        return {
+            variant: {
+                image_format: (
+                    request.build_absolute_uri(image_storage.url(name))
+                    if request is not None
+                    else image_storage.url(name)
+                )
+                for image_format, name in formats.items()
+            }
+            for variant, formats in value.get("variants", {}).items()
+        }
+
+
+class AstronomyShowListSerializer(
+    ExpandableFieldsMixin, serializers.ModelSerializer
+):
     show_theme = serializers.SlugRelatedField(
         many=True, read_only=True, slug_field="name"
     )
+    image_variants = ImageVariantsField()
 
     class Meta:
         model = AstronomyShow
-        fields = ("title", "description", "show_theme", "image")
+        fields = (
+            "title", "description", "show_theme", "image", "image_variants"
+        )
+        expandable_fields = {
+            "show_theme": (
+                ShowThemeSerializer, {"many": True, "read_only": True}
+            ),
+        }
 
 
 class AstronomyShowCreateSerializer(serializers.ModelSerializer):
@@ -223,9 +477,11 @@ class AstronomyShowCreateSerializer(serializers.ModelSerializer):
 
 
 class AstronomyShowImageSerializer(serializers.ModelSerializer):
+    image_variants = ImageVariantsField()
+
     class Meta:
         model = AstronomyShow
-        fields = ("id", "image")
+        fields = ("id", "image", "image_variants")
 
 
 class PlanetariumDomeListSerializer(serializers.ModelSerializer):
@@ -240,7 +496,9 @@ class PlanetariumDomeCreateSerializer(serializers.ModelSerializer):
         fields = ("id", "name", "rows", "seats_in_row")
 
 
-class ShowSessionListSerializer(serializers.ModelSerializer):
+class ShowSessionListSerializer(
+    ExpandableFieldsMixin, serializers.ModelSerializer
+):
     astronomy_show = serializers.SlugRelatedField(
         slug_field="title",
         read_only=True
@@ -249,16 +507,165 @@ class ShowSessionListSerializer(serializers.ModelSerializer):
         slug_field="name",
         read_only=True
     )
+    capacity = serializers.IntegerField(read_only=True)
+    tickets_sold = serializers.IntegerField(read_only=True)
+    tickets_available = serializers.IntegerField(read_only=True)
 
     class Meta:
         model = ShowSession
-        fields = ("astronomy_show", "planetarium_dome", "show_time", "price")
-
-
-class ShowSessionCreateSerializer(serializers.ModelSerializer):
+        fields = (
+            "astronomy_show",
+            "planetarium_dome",
+            "show_time",
+            "duration",
+            "price",
+            "capacity",
+            "tickets_sold",
+            "tickets_available",
+        )
+        expandable_fields = {
+            "astronomy_show": (
+                AstronomyShowListSerializer, {"read_only": True}
+            ),
+            "planetarium_dome": (
+                PlanetariumDomeListSerializer, {"read_only": True}
+            ),
+        }
+
+
+class ShowSessionCreateSerializer(
+    DomeAvailabilityMixin, serializers.ModelSerializer
+):
     class Meta:
         model = ShowSession
-        fields = ("astronomy_show", "planetarium_dome", "show_time", "price")
+        fields = (
+            "astronomy_show",
+            "planetarium_dome",
+            "show_time",
+            "duration",
+            "price",
+        )
+
+
+WEEKDAYS = ("mon", "tue", "wed", "thu", "fri", "sat", "sun")
+SCHEDULE_MAX_SESSIONS = 5000
+
+
+def expand_schedule(start_date, end_date, weekdays, times):
+    """Every show time the schedule produces, in order."""
+    days = (
+        start_date + timedelta(days=offset)
+        for offset in range((end_date - start_date).days + 1)
+    )
+    return [
+        datetime.combine(day, show_time)
+        for day in days
+        if WEEKDAYS[day.weekday()] in weekdays
+        for show_time in sorted(set(times))
+    ]
+
+
+class ShowSessionScheduleSerializer(serializers.Serializer):
+    astronomy_show = serializers.PrimaryKeyRelatedField(
+        queryset=AstronomyShow.objects.all()
+    )
+    planetarium_dome = serializers.PrimaryKeyRelatedField(
+        queryset=PlanetariumDome.objects.all()
+    )
+    price = serializers.DecimalField(
+        max_digits=10,
+        decimal_places=2,
+        validators=[
+            MinValueValidator(Decimal("0.00")),
+            MaxValueValidator(Decimal("1000.00")),
+        ],
+    )
+    start_date = serializers.DateField()
+    end_date = serializers.DateField()
+    weekdays = serializers.MultipleChoiceField(
+        choices=WEEKDAYS, default=set(WEEKDAYS)
+    )
+    times = serializers.ListField(
+        child=serializers.TimeField(), allow_empty=False
+    )
+    duration = serializers.DurationField(
+        default=timedelta(hours=1),
+        min_value=timedelta(minutes=1),
+        max_value=timedelta(hours=24),
+    )
+    show_sessions = serializers.ListField(
+        child=serializers.IntegerField(), read_only=True
+    )
+
+    def validate(self, attrs):
+        if attrs["end_date"] < attrs["start_date"]:
+            raise serializers.ValidationError(
+                {"end_date": "the schedule ends before it starts"}
+            )
+        show_times = expand_schedule(
+            attrs["start_date"],
+            attrs["end_date"],
+            attrs["weekdays"],
+            attrs["times"],
+        )
+        if not show_times:
+            raise serializers.ValidationError(
+                "the schedule does not produce any sessions"
+            )
+        if len(show_times) > SCHEDULE_MAX_SESSIONS:
+            raise serializers.ValidationError(
+                f"the schedule produces {len(show_times)} sessions, "
+                f"at most {SCHEDULE_MAX_SESSIONS} are allowed"
+            )
+        duration = attrs["duration"]
+        if any(
+            later - earlier < duration
+            for earlier, later in zip(show_times, show_times[1:])
+        ):
+            raise serializers.ValidationError(
+                {"times": "the sessions would overlap each other"}
+            )
+        taken = conflicting_show_times(
+            attrs["planetarium_dome"].id, show_times, duration
+        )
+        if taken:
+            raise serializers.ValidationError(
+                {"show_times": [
+                    f"{show_time:%Y-%m-%d %H:%M} is already taken"
+                    for show_time in taken
+                ]}
+            )
+        attrs["show_times"] = show_times
+        return attrs
+
+    def create(self, validated_data):
+        try:
+            with transaction.atomic():
+                show_sessions = ShowSession.objects.bulk_create(
+                    ShowSession(
+                        astronomy_show=validated_data["astronomy_show"],
+                        planetarium_dome=validated_data["planetarium_dome"],
+                        show_time=show_time,
+                        duration=validated_data["duration"],
+                        price=validated_data["price"],
+                    )
+                    for show_time in validated_data["show_times"]
+                )
+        except IntegrityError:
+            raise serializers.ValidationError(
+                {"show_times": ["some of the show times have just been taken"]}
+            )
+        return {
+            **validated_data,
+            "show_sessions": [
+                show_session.id for show_session in show_sessions
+            ],
+        }
+
+
+class FreeSlotSerializer(serializers.Serializer):
+    start = serializers.DateTimeField(format="%Y-%m-%d %H:%M:%S")
+    end = serializers.DateTimeField(format="%Y-%m-%d %H:%M:%S")
 
 
 class ReservationCreateSerializer(serializers.ModelSerializer):
@@ -0,0 +1,158 @@
+from django.db.models import Count, QuerySet
+from django.db.models.signals import (
+    post_save,
+    post_delete,
+    pre_save,
+    pre_delete,
+    m2m_changed,
+)
+from django.dispatch import receiver
+
+from shows.models import (
+    Reservation,
+    Ticket,
+    ShowSession,
+    PlanetariumDome,
+    AstronomyShow,
+    ShowTheme,
+)
+from shows.catalog_cache import invalidate_catalog
+from shows.seat_map import invalidate_seat_maps
+
+
+@receiver(pre_save, sender=Ticket)
+def ticket_moving(sender, instance, **kwargs):
+    instance.previous_show_session_id = (
+        Ticket.objects.filter(pk=instance.pk).values_list(
+            "show_session_id", flat=True
+        ).first()
+        if instance.pk
+        else None
+    )
+
+
+@receiver(post_save, sender=Ticket)
+def ticket_saved(sender, instance, created, **kwargs):
+    previous_id = instance.previous_show_session_id
+    if created or previous_id != instance.show_session_id:
+        ShowSession.change_sold_count(instance.show_session_id, 1)
+        if previous_id is not None:
+            ShowSession.change_sold_count(previous_id, -1)
+            invalidate_seat_maps(previous_id)
+    invalidate_seat_maps(instance.show_session_id)
+
+
+@receiver(post_delete, sender=Ticket)
+def ticket_deleted(sender, instance, origin, **kwargs):
+    # Tickets deleted with their reservation are counted per show session
+    # by reservation_deleted; those deleted with their show session need
+    # no count.
+    origin_model = origin.model if isinstance(origin, QuerySet) else (
+        type(origin)
+    )
+    if origin_model is not Ticket:
+        return
+    ShowSession.change_sold_count(instance.show_session_id, -1)
+    invalidate_seat_maps(instance.show_session_id)
+
+
+@receiver(pre_delete, sender=Reservation)
+def reservation_deleting(sender, instance, **kwargs):
+    instance.deleted_tickets_sold = dict(
+        instance.tickets.order_by()
+        .values("show_session")
+        .annotate(count=Count("id"))
+        .values_list("show_session", "count")
+    )
+
+
+@receiver(post_delete, sender=Reservation)
+def reservation_deleted(sender, instance, **kwargs):
+    for show_session_id, count in instance.deleted_tickets_sold.items():
+        ShowSession.change_sold_count(show_session_id, -count)
+    invalidate_seat_maps(*instance.deleted_tickets_sold)
+
+
+@receiver([post_save, post_delete], sender=ShowSession)
+def show_session_changed(sender, instance, **kwargs):
+    invalidate_seat_maps(instance.id)
+
+
+@receiver(post_save, sender=PlanetariumDome)
+def planetarium_dome_changed(sender, instance, created, **kwargs):
+    if not created:
+        invalidate_seat_maps(
+            *instance.dome_sessions.values_list("id", flat=True)
+        )
+
+
+@receiver(pre_save, sender=AstronomyShow)
+def astronomy_show_image_changing(sender, instance, **kwargs):
+    # The variants were rendered from another image; this queues the new
+    # one for process_show_images.
+    if instance.image_variants.get("source") != instance.image.name:
+        instance.image_variants = {}
+
+
+@receiver(post_save, sender=AstronomyShow)
+def astronomy_show_saved(sender, instance, **kwargs):
+    AstronomyShow.objects.filter(pk=instance.pk).update_search_vector()
+
+
+@receiver(m2m_changed, sender=AstronomyShow.show_theme.through)
+def astronomy_show_themes_changed(
+    sender, instance, action, reverse, pk_set, **kwargs
+):
+    if action.startswith("post_"):
+        invalidate_catalog("astronomy_show")
+    if not reverse:
+        if action in ("post_add", "post_remove", "post_clear"):
+            AstronomyShow.objects.filter(
+                pk=instance.pk
+            ).update_search_vector()
+    elif action == "pre_clear":
+        instance.cleared_astronomy_show_ids = list(
+            instance.astronomy_shows.values_list("id", flat=True)
+        )
+    elif action == "post_clear":
+        AstronomyShow.objects.filter(
+            pk__in=instance.cleared_astronomy_show_ids
+        ).update_search_vector()
+    elif action in ("post_add", "post_remove"):
+        AstronomyShow.objects.filter(pk__in=pk_set).update_search_vector()
+
+
+@receiver(post_save, sender=ShowTheme)
+def show_theme_saved(sender, instance, created, **kwargs):
+    if not created:
+        instance.astronomy_shows.all().update_search_vector()
+
+
+@receiver(pre_delete, sender=ShowTheme)
+def show_theme_deleting(sender, instance, **kwargs):
+    instance.deleted_astronomy_show_ids = list(
+        instance.astronomy_shows.values_list("id", flat=True)
+    )
+
+
+@receiver(post_delete, sender=ShowTheme)
+def show_theme_deleted(sender, instance, **kwargs):
+    AstronomyShow.objects.filter(
+        pk__in=instance.deleted_astronomy_show_ids
+    ).update_search_vector()
+
+
+@receiver([post_save, post_delete], sender=AstronomyShow)
+def astronomy_show_catalog_changed(sender, **kwargs):
+    invalidate_catalog("astronomy_show")
+
+
+@receiver([post_save, post_delete], sender=ShowTheme)
+def show_theme_catalog_changed(sender, **kwargs):
+    # Astronomy show responses embed theme names.
+    invalidate_catalog("show_theme", "astronomy_show")
+
+
+@receiver([post_save, post_delete], sender=PlanetariumDome)
+def planetarium_dome_catalog_changed(sender, **kwargs):
+    invalidate_catalog("planetarium_dome")
@@ -0,0 +1,38 @@
+import hashlib
+import os
+import uuid
+
+from django.core.files.storage import FileSystemStorage
+
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+
+
+def content_hash(file):
+    digest = hashlib.sha256()
+    for chunk in file.chunks():
+        digest.update(chunk)
+    return digest.hexdigest()
+
+
+class ContentAddressedStorage(FileSystemStorage):
+    """Storage for files named after a hash of their content: a name that
+    exists already holds the same bytes, so saving it again is a no-op
+    and a stored file never changes."""
+
+    def get_available_name(self, name, max_length=None):
+        return name
+
+    def _save(self, name, content):
+        if self.exists(name):
+            # A fresh modification time keeps gc_media off a file that
+            # is about to be referenced again.
+            os.utime(self.path(name))
+            return name
+        # Write aside and rename into place, so a concurrent save of the
+        # same content only swaps in identical bytes.
+        temporary = super()._save(f"{name}.{uuid.uuid4().hex}.tmp", content)
+        os.replace(self.path(temporary), self.path(name))
+        return name
+
+
+image_storage = ContentAddressedStorage()
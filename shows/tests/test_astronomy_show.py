@@ -1,11 +1,22 @@
+import os
+import shutil
+import tempfile
+import time
+from io import BytesIO, StringIO
+
+from django.core.cache import cache
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
 from django.db import IntegrityError
-from django.test import TestCase
+from django.test import TestCase, override_settings
+from PIL import Image
 from django.urls import reverse
 from rest_framework.test import APIClient
 from rest_framework import status
 from rest_framework.exceptions import ValidationError
 
-from shows.models import AstronomyShow
+from shows.models import AstronomyShow, ShowTheme
 from shows.serializers import (
     AstronomyShowListSerializer,
     AstronomyShowCreateSerializer,
@@ -47,6 +58,22 @@ class AuthenticatedAstronomyShowApiTests(TestCase):
         self.assertEqual(res.status_code, status.HTTP_200_OK)
         self.assertEqual(res.data, serializer.data)
 
+    def test_list_sparse_fields_and_expand(self):
+        astronomy_show = sample_astronomy_show()
+        theme = sample_show_theme(name="Galaxies")
+        astronomy_show.show_theme.add(theme)
+
+        res = self.client.get(Astronomy_Show_URL, {"fields": "title"})
+        self.assertEqual(res.data, [{"title": astronomy_show.title}])
+
+        res = self.client.get(
+            Astronomy_Show_URL,
+            {"fields": "title,show_theme", "expand": "show_theme"},
+        )
+        self.assertEqual(
+            res.data[0]["show_theme"], [{"id": theme.id, "name": "Galaxies"}]
+        )
+
     def test_not_create_astronomy_show(self):
         payload = {"name": "Astronomy Show Test"}
         res = self.client.post(Astronomy_Show_URL, payload)
@@ -128,6 +155,15 @@ class AstronomyShowFilteringApiTests(TestCase):
         serializer3 = AstronomyShowListSerializer(astronomy_show_object_3)
         self.assertNotIn(serializer3.data, res.data)
 
+    def test_filter_show_theme_lists_show_once(self):
+        astronomy_show = sample_astronomy_show()
+        astronomy_show.show_theme.add(
+            sample_show_theme(name="Sample Theme 1"),
+            sample_show_theme(name="Sample Theme 2"),
+        )
+        res = self.client.get(Astronomy_Show_URL, {"show_theme": "sample"})
+        self.assertEqual(len(res.data), 1)
+
     def test_filter_astronomy_show_description(self):
         astronomy_show_object_1 = sample_astronomy_show()
         astronomy_show_object_1.show_theme.add(
@@ -220,3 +256,287 @@ class ShowThemeModelsTests(TestCase):
             astronomy_show_object_1.__str__(),
             f"name_show: {astronomy_show_object_1.title}, description: {astronomy_show_object_1.description}",
         )
+
+
+class AstronomyShowSearchApiTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.user = user_test()
+        self.client.force_authenticate(self.user)
+        self.galaxies = sample_astronomy_show(
+            title="Galactic Journey",
+            description="A tour of spiral galaxies and nebulae",
+        )
+        self.planets = sample_astronomy_show(
+            title="Red Planet",
+            description="Everything about Mars and its moons",
+        )
+        self.black_holes = sample_astronomy_show(
+            title="Into the Dark",
+            description="Stars, galaxies and what swallows them",
+        )
+
+    def search(self, text):
+        res = self.client.get(Astronomy_Show_URL, {"q": text})
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        return [show["title"] for show in res.data]
+
+    def test_search_ranks_title_over_description(self):
+        self.assertEqual(
+            self.search("galactic galaxies"), ["Galactic Journey"]
+        )
+        self.assertEqual(
+            self.search("galaxies"), ["Galactic Journey", "Into the Dark"]
+        )
+
+    def test_search_theme_names(self):
+        self.planets.show_theme.add(sample_show_theme(name="Solar System"))
+        self.assertEqual(self.search("solar"), ["Red Planet"])
+
+        ShowTheme.objects.filter(name="Solar System").get().delete()
+        self.assertEqual(self.search("solar"), [])
+
+    def test_search_follows_theme_rename(self):
+        theme = sample_show_theme(name="Cosmology")
+        theme.astronomy_shows.add(self.black_holes)
+        theme.name = "Black Holes"
+        theme.save()
+
+        self.assertEqual(self.search("holes"), ["Into the Dark"])
+
+    def test_fuzzy_title_search(self):
+        self.assertEqual(self.search("Galactik Jorney"), ["Galactic Journey"])
+
+
+class AstronomyShowCacheApiTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.user = user_test()
+        self.client.force_authenticate(self.user)
+        self.astronomy_show = sample_astronomy_show(
+            title="Galactic Journey", description="Spiral galaxies"
+        )
+        self.theme = sample_show_theme(name="Galaxies")
+        self.astronomy_show.show_theme.add(self.theme)
+
+    def test_repeated_list_is_served_from_cache(self):
+        self.client.get(
+            Astronomy_Show_URL,
+            {"show_name": "galactic", "description": "spiral"},
+        )
+        with self.assertNumQueries(0):
+            res = self.client.get(
+                f"{Astronomy_Show_URL}?description=spiral&show_name=galactic"
+            )
+        self.assertEqual(res.data[0]["title"], "Galactic Journey")
+
+    def test_theme_changes_invalidate_list(self):
+        self.client.get(Astronomy_Show_URL)
+        self.theme.name = "Nebulae"
+        self.theme.save()
+        res = self.client.get(Astronomy_Show_URL)
+        self.assertEqual(res.data[0]["show_theme"], ["Nebulae"])
+
+        self.astronomy_show.show_theme.clear()
+        res = self.client.get(Astronomy_Show_URL)
+        self.assertEqual(res.data[0]["show_theme"], [])
+
+    def test_show_changes_invalidate_detail(self):
+        url = reverse(
+            "shows:astronomyshow-detail", args=[self.astronomy_show.id]
+        )
+        self.client.get(url)
+        self.astronomy_show.title = "Galactic Voyage"
+        self.astronomy_show.save()
+        res = self.client.get(url)
+        self.assertEqual(res.data["title"], "Galactic Voyage")
+
+    def test_theme_changes_update_etag(self):
+        etag = self.client.get(Astronomy_Show_URL)["ETag"]
+        self.astronomy_show.show_theme.add(sample_show_theme(name="Stars"))
+
+        res = self.client.get(Astronomy_Show_URL, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        res = self.client.get(
+            Astronomy_Show_URL, HTTP_IF_NONE_MATCH=res["ETag"]
+        )
+        self.assertEqual(res.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_malformed_id_is_not_found(self):
+        for basename in (
+            "astronomyshow",
+            "showtheme",
+            "planetariumdome",
+            "showsession",
+        ):
+            with self.subTest(basename):
+                res = self.client.get(
+                    reverse(f"shows:{basename}-detail", args=["abc"])
+                )
+                self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
+
+
+class AstronomyShowImageTests(TestCase):
+    def setUp(self):
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root)
+        self.media_root = media_root
+        settings = override_settings(MEDIA_ROOT=media_root)
+        settings.enable()
+        self.addCleanup(settings.disable)
+        cache.clear()
+
+        self.client = APIClient()
+        self.client.force_authenticate(admin_test())
+        self.astronomy_show = sample_astronomy_show()
+        self.upload_url = reverse(
+            "shows:astronomyshow-upload-image", args=[self.astronomy_show.id]
+        )
+
+    @staticmethod
+    def image_file(size=(2400, 1200), image_format="PNG"):
+        mode = "RGBA" if image_format == "PNG" else "RGB"
+        output = BytesIO()
+        Image.new(mode, size, "navy").save(output, image_format)
+        return SimpleUploadedFile(
+            f"moon.{image_format.lower()}", output.getvalue()
+        )
+
+    def process_images(self):
+        call_command(
+            "process_show_images", workers=1, stdout=StringIO(),
+            stderr=StringIO(),
+        )
+
+    def test_upload_queues_variants(self):
+        res = self.client.post(
+            self.upload_url, {"image": self.image_file()}, format="multipart"
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(res.data["image_variants"], {})
+        self.assertQuerySetEqual(
+            AstronomyShow.objects.with_pending_image(), [self.astronomy_show]
+        )
+
+    def test_list_exposes_rendered_variants(self):
+        self.client.post(
+            self.upload_url, {"image": self.image_file()}, format="multipart"
+        )
+        self.process_images()
+
+        self.astronomy_show.refresh_from_db()
+        source = self.astronomy_show.image.name
+        variants = self.astronomy_show.image_variants["variants"]
+        for variant, box in (
+            ("thumbnail", (160, 80)),
+            ("card", (640, 320)),
+            ("hero", (1920, 960)),
+        ):
+            for image_format in ("webp", "jpeg"):
+                name = variants[variant][image_format]
+                self.assertEqual(
+                    name,
+                    source.rsplit(".", 1)[0] + f".{variant}.{image_format}",
+                )
+                with default_storage.open(name) as file, \
+                        Image.open(file) as image:
+                    self.assertEqual(image.size, box)
+
+        res = self.client.get(Astronomy_Show_URL)
+        image_variants = res.data[0]["image_variants"]
+        self.assertEqual(
+            image_variants["card"]["webp"],
+            "http://testserver" + default_storage.url(variants["card"]["webp"]),
+        )
+        self.assertFalse(AstronomyShow.objects.with_pending_image().exists())
+
+    def test_new_image_replaces_variants(self):
+        self.client.post(
+            self.upload_url, {"image": self.image_file()}, format="multipart"
+        )
+        self.process_images()
+
+        res = self.client.post(
+            self.upload_url,
+            {"image": self.image_file((300, 300), "JPEG")},
+            format="multipart",
+        )
+
+        self.assertEqual(res.data["image_variants"], {})
+        self.process_images()
+        self.astronomy_show.refresh_from_db()
+        self.assertEqual(
+            self.astronomy_show.image_variants["source"],
+            self.astronomy_show.image.name,
+        )
+
+    def test_unreadable_image_is_not_retried(self):
+        AstronomyShow.objects.filter(pk=self.astronomy_show.pk).update(
+            image="upload/astronomy_show/missing.png"
+        )
+
+        self.process_images()
+
+        self.astronomy_show.refresh_from_db()
+        self.assertIn("error", self.astronomy_show.image_variants)
+        self.assertFalse(AstronomyShow.objects.with_pending_image().exists())
+
+    def test_identical_uploads_share_a_file(self):
+        other_show = sample_astronomy_show(title="Other show")
+        names = []
+        for astronomy_show in (self.astronomy_show, other_show):
+            res = self.client.post(
+                reverse(
+                    "shows:astronomyshow-upload-image",
+                    args=[astronomy_show.id],
+                ),
+                {"image": self.image_file()},
+                format="multipart",
+            )
+            self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+            astronomy_show.refresh_from_db()
+            names.append(astronomy_show.image.name)
+
+        self.assertEqual(names[0], names[1])
+        self.assertEqual(
+            os.listdir(os.path.join(self.media_root, "upload/astronomy_show")),
+            [os.path.basename(names[0])],
+        )
+
+    def test_media_is_cached_for_good(self):
+        self.client.post(
+            self.upload_url, {"image": self.image_file()}, format="multipart"
+        )
+        self.astronomy_show.refresh_from_db()
+
+        res = self.client.get(self.astronomy_show.image.url)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            res["Cache-Control"], "public, max-age=31536000, immutable"
+        )
+
+    def test_gc_media_deletes_unreferenced_files(self):
+        self.client.post(
+            self.upload_url, {"image": self.image_file()}, format="multipart"
+        )
+        self.process_images()
+        self.astronomy_show.refresh_from_db()
+        directory = os.path.join(self.media_root, "upload/astronomy_show")
+        kept = set(os.listdir(directory))
+        for filename in ("old.png", "new.png"):
+            with open(os.path.join(directory, filename), "wb") as file:
+                file.write(b"orphan")
+        two_hours_ago = time.time() - 7200
+        os.utime(os.path.join(directory, "old.png"), (two_hours_ago,) * 2)
+        for path in kept:
+            os.utime(os.path.join(directory, path), (two_hours_ago,) * 2)
+
+        call_command("gc_media", dry_run=True, stdout=StringIO())
+        self.assertEqual(len(os.listdir(directory)), len(kept) + 2)
+
+        call_command("gc_media", stdout=StringIO())
+        self.assertEqual(set(os.listdir(directory)), kept | {"new.png"})
+        self.assertEqual(len(kept), 7)
@@ -0,0 +1,141 @@
+import json
+
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+
+from shows.models import Reservation, ShowSession, Ticket
+from shows.tests.default_test_data import (
+    sample_astronomy_show,
+    sample_planetarium_dome,
+    sample_show_theme,
+    user_test,
+)
+
+
+class AsyncCatalogViewTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.user = user_test()
+        self.client.force_authenticate(self.user)
+        theme = sample_show_theme(name="Planets")
+        astronomy_show = sample_astronomy_show(title="Moon")
+        astronomy_show.show_theme.add(theme)
+        dome = sample_planetarium_dome(name="North", rows=5, seats_in_row=5)
+        self.show_session, _ = ShowSession.objects.bulk_create(
+            ShowSession(
+                astronomy_show=astronomy_show,
+                planetarium_dome=dome,
+                show_time=show_time,
+                price=10,
+            )
+            for show_time in ("2024-06-11 12:00", "2024-06-12 12:00")
+        )
+        Ticket.objects.create(
+            row=2,
+            seat=3,
+            show_session=self.show_session,
+            reservation=Reservation.objects.create(user=self.user),
+        )
+        self.ids = {
+            "astronomyshow": astronomy_show.id,
+            "showtheme": theme.id,
+            "planetariumdome": dome.id,
+            "showsession": self.show_session.id,
+        }
+
+    def assert_same_response(self, name, args=(), query=""):
+        res = self.client.get(reverse(f"shows:{name}", args=args) + query)
+        async_res = self.client.get(
+            reverse(f"shows:async-{name}", args=args) + query
+        )
+
+        self.assertEqual(async_res.status_code, res.status_code)
+        self.assertEqual(async_res["Content-Type"], "application/json")
+        self.assertEqual(
+            json.loads(
+                async_res.content.decode().replace("/api/async/", "/api/")
+            ),
+            res.json(),
+        )
+        if async_res.content == res.content:
+            # Pagination links name the endpoint, and so change the ETag.
+            self.assertEqual(async_res.get("ETag"), res.get("ETag"))
+        return async_res
+
+    def test_same_output_as_sync_endpoints(self):
+        for basename, pk in self.ids.items():
+            with self.subTest(basename):
+                self.assert_same_response(f"{basename}-list")
+                self.assert_same_response(f"{basename}-detail", [pk])
+        self.assert_same_response(
+            "showsession-seat-map", [self.ids["showsession"]]
+        )
+
+    def test_same_filters_and_pagination(self):
+        self.assert_same_response("astronomyshow-list", query="?show_name=mo")
+        self.assert_same_response(
+            "astronomyshow-list", query="?fields=title&expand=show_theme"
+        )
+        self.assert_same_response("showsession-list", query="?page_size=1")
+        self.assert_same_response(
+            "showsession-list", query="?date=2024-06-12"
+        )
+        self.assert_same_response(
+            "showsession-list", query="?expand=planetarium_dome"
+        )
+        self.assert_same_response(
+            "showsession-list",
+            query="?page_size=1&fields=price,planetarium_dome"
+            "&expand=planetarium_dome",
+        )
+
+    def test_errors(self):
+        res = self.assert_same_response(
+            "showsession-list", query="?date=tomorrow"
+        )
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+        res = self.assert_same_response("astronomyshow-detail", [0])
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
+
+        self.client.force_authenticate(None)
+        res = self.assert_same_response("showtheme-list")
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_conditional_get(self):
+        url = reverse(
+            "shows:async-showsession-detail", args=[self.ids["showsession"]]
+        )
+        etag = self.client.get(url)["ETag"]
+
+        res = self.client.get(url, headers={"if-none-match": etag})
+
+        self.assertEqual(res.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_list_is_served_from_cache(self):
+        url = reverse("shows:async-showtheme-list")
+        self.client.get(url)
+
+        with self.assertNumQueries(0):
+            res = self.client.get(url)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+    async def test_served_by_asgi_handler(self):
+        res = await self.async_client.get(
+            reverse(
+                "shows:async-showsession-seat-map",
+                args=[self.ids["showsession"]],
+            ),
+            headers={
+                "authorization": f"Bearer {AccessToken.for_user(self.user)}"
+            },
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(json.loads(res.content)["tickets_sold"], 1)
@@ -0,0 +1,22 @@
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import TestCase
+
+from shows.models import AstronomyShow, ShowSession, ShowTheme
+from shows.tests.default_test_data import admin_test
+
+
+class InitialDataTests(TestCase):
+    def test_initial_data_loads(self):
+        # README: the superuser comes first and owns the reservation.
+        admin_test(id=1)
+        call_command("loaddata", "initial_data.json", stdout=StringIO())
+
+        self.assertEqual(ShowTheme.objects.count(), 2)
+        self.assertEqual(AstronomyShow.objects.count(), 2)
+        for show_session in ShowSession.objects.all():
+            self.assertIsNotNone(show_session.updated_at)
+            self.assertEqual(
+                show_session.sold_count, show_session.tickets.count()
+            )
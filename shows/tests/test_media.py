@@ -0,0 +1,140 @@
+import os
+import shutil
+import tempfile
+
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils.http import http_date
+from rest_framework import status
+from rest_framework.test import APIClient
+
+CONTENT = bytes(range(256)) * 4
+
+
+class MediaServingTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root)
+        settings = override_settings(MEDIA_ROOT=media_root)
+        settings.enable()
+        self.addCleanup(settings.disable)
+        os.makedirs(os.path.join(media_root, "upload"))
+        self.path = os.path.join(media_root, "upload", "image.png")
+        with open(self.path, "wb") as file:
+            file.write(CONTENT)
+        self.url = reverse("media", args=["upload/image.png"])
+
+    def get(self, **headers):
+        return self.client.get(self.url, headers=headers)
+
+    def test_whole_file(self):
+        res = self.get()
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(b"".join(res.streaming_content), CONTENT)
+        self.assertEqual(res["Content-Type"], "image/png")
+        self.assertEqual(res["Accept-Ranges"], "bytes")
+        self.assertIn("ETag", res)
+
+    def test_missing_file(self):
+        res = self.client.get(reverse("media", args=["upload/nothing.png"]))
+
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_byte_ranges(self):
+        for requested, expected, content_range in (
+            ("bytes=0-99", CONTENT[:100], "bytes 0-99/1024"),
+            ("bytes=1000-", CONTENT[1000:], "bytes 1000-1023/1024"),
+            ("bytes=-24", CONTENT[-24:], "bytes 1000-1023/1024"),
+            ("bytes=1000-5000", CONTENT[1000:], "bytes 1000-1023/1024"),
+        ):
+            with self.subTest(requested):
+                res = self.get(range=requested)
+
+                self.assertEqual(
+                    res.status_code, status.HTTP_206_PARTIAL_CONTENT
+                )
+                self.assertEqual(b"".join(res.streaming_content), expected)
+                self.assertEqual(res["Content-Range"], content_range)
+                self.assertEqual(res["Content-Length"], str(len(expected)))
+
+    def test_unsatisfiable_range(self):
+        res = self.get(range="bytes=2000-")
+
+        self.assertEqual(
+            res.status_code, status.HTTP_416_REQUESTED_RANGE_NOT_SATISFIABLE
+        )
+        self.assertEqual(res["Content-Range"], "bytes */1024")
+        self.assertNotIn("ETag", res)
+        self.assertNotIn("Last-Modified", res)
+        self.assertNotIn("immutable", res.get("Cache-Control", ""))
+
+    def test_multiple_ranges_get_whole_file(self):
+        res = self.get(range="bytes=0-1,5-6")
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+    def test_range_of_changed_file_gets_whole_file(self):
+        res = self.get(range="bytes=0-99", if_range='"stale"')
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(b"".join(res.streaming_content), CONTENT)
+
+        res = self.get(range="bytes=0-99", if_range=self.get()["ETag"])
+
+        self.assertEqual(res.status_code, status.HTTP_206_PARTIAL_CONTENT)
+
+    def test_conditional_get(self):
+        etag = self.get()["ETag"]
+
+        res = self.get(if_none_match=etag)
+
+        self.assertEqual(res.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(res["ETag"], etag)
+
+        res = self.get(
+            if_modified_since=http_date(os.stat(self.path).st_mtime)
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_etag_follows_mtime_and_size(self):
+        etag = self.get()["ETag"]
+        os.utime(self.path, (0, 0))
+
+        self.assertNotEqual(self.get()["ETag"], etag)
+
+    @override_settings(
+        MEDIA_SENDFILE_HEADER="X-Accel-Redirect",
+        MEDIA_ACCEL_REDIRECT_LOCATION="/protected-media/",
+    )
+    def test_accel_redirect_offload(self):
+        res = self.get(range="bytes=0-99")
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.content, b"")
+        self.assertEqual(
+            res["X-Accel-Redirect"], "/protected-media/upload/image.png"
+        )
+        self.assertEqual(res["Content-Type"], "image/png")
+        self.assertEqual(
+            res["Cache-Control"], "public, max-age=31536000, immutable"
+        )
+
+    @override_settings(MEDIA_SENDFILE_HEADER="X-Sendfile")
+    def test_sendfile_offload(self):
+        res = self.get()
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.content, b"")
+        self.assertEqual(res["X-Sendfile"], self.path)
+
+    @override_settings(MEDIA_SENDFILE_HEADER="X-Sendfile")
+    def test_offload_still_answers_conditional_get(self):
+        etag = self.get()["ETag"]
+
+        res = self.get(if_none_match=etag)
+
+        self.assertEqual(res.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertNotIn("X-Sendfile", res)
@@ -1,3 +1,5 @@
+import datetime
+
 from django.db import IntegrityError
 from django.test import TestCase
 from django.urls import reverse
@@ -6,7 +8,7 @@ from rest_framework.exceptions import ValidationError
 from rest_framework.test import APIClient
 from rest_framework import status
 
-from shows.models import PlanetariumDome
+from shows.models import PlanetariumDome, ShowSession
 from shows.serializers import (
     PlanetariumDomeListSerializer,
     PlanetariumDomeCreateSerializer,
@@ -15,6 +17,7 @@ from shows.tests.default_test_data import (
     user_test,
     admin_test,
     sample_planetarium_dome,
+    sample_astronomy_show,
 )
 
 Planetarium_Dome_URL = reverse("shows:planetariumdome-list")
@@ -195,3 +198,62 @@ class PlanetariumModelsTests(TestCase):
             planetarium_dome.__str__(),
             f"name: {planetarium_dome.name}, rows: {planetarium_dome.rows}, seats_in_row: {planetarium_dome.seats_in_row}",
         )
+
+
+class PlanetariumDomeFreeSlotsApiTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(user_test())
+        self.dome = sample_planetarium_dome()
+        astronomy_show = sample_astronomy_show()
+        for show_time, minutes in (
+            ("2024-06-19 23:30:00", 60),
+            ("2024-06-20 14:00:00", 60),
+            ("2024-06-20 15:00:00", 30),
+            ("2024-06-20 19:00:00", 90),
+        ):
+            ShowSession.objects.create(
+                astronomy_show=astronomy_show,
+                planetarium_dome=self.dome,
+                show_time=show_time,
+                duration=datetime.timedelta(minutes=minutes),
+            )
+        self.url = reverse(
+            "shows:planetariumdome-free-slots", args=[self.dome.id]
+        )
+
+    def test_free_slots(self):
+        res = self.client.get(self.url, {"date": "2024-06-20"})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            [(slot["start"], slot["end"]) for slot in res.data["free_slots"]],
+            [
+                ("2024-06-20 00:30:00", "2024-06-20 14:00:00"),
+                ("2024-06-20 15:30:00", "2024-06-20 19:00:00"),
+                ("2024-06-20 20:30:00", "2024-06-21 00:00:00"),
+            ],
+        )
+
+    def test_free_slots_min_duration(self):
+        res = self.client.get(
+            self.url, {"date": "2024-06-20", "min_duration": 240}
+        )
+
+        self.assertEqual(
+            [slot["start"] for slot in res.data["free_slots"]],
+            ["2024-06-20 00:30:00"],
+        )
+
+    def test_free_slots_requires_date(self):
+        for params in ({}, {"date": "June"}):
+            res = self.client.get(self.url, params)
+            self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_overlapping_sessions_are_rejected(self):
+        with self.assertRaises(IntegrityError):
+            ShowSession.objects.create(
+                astronomy_show=sample_astronomy_show(title="Other"),
+                planetarium_dome=self.dome,
+                show_time="2024-06-20 15:15:00",
+            )
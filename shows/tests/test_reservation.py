@@ -0,0 +1,122 @@
+import json
+
+from django.test import TestCase
+from django.urls import reverse
+from rest_framework.test import APIClient
+from rest_framework import status
+
+from shows.models import Reservation, Ticket, ShowSession
+from shows.tests.default_test_data import (
+    user_test,
+    admin_test,
+    sample_show_theme,
+    sample_show_session,
+)
+
+Reservation_URL = reverse("shows:reservation-list")
+Reservation_Export_URL = reverse("shows:reservation-export")
+
+
+class UnauthenticatedReservationApiTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+
+    def test_auth_required(self):
+        res = self.client.get(Reservation_URL)
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+
+class ReservationQueryCountTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.user = user_test()
+        self.client.force_authenticate(self.user)
+        self.show_session = sample_show_session()
+        self.show_session.astronomy_show.show_theme.add(
+            sample_show_theme(name="Galaxies"),
+            sample_show_theme(name="Stars"),
+        )
+        self.seat = 0
+
+    def reserve(self, reservations, tickets_per_reservation):
+        for _ in range(reservations):
+            reservation = Reservation.objects.create(user=self.user)
+            for _ in range(tickets_per_reservation):
+                self.seat += 1
+                Ticket.objects.create(
+                    row=1,
+                    seat=self.seat,
+                    show_session=self.show_session,
+                    reservation=reservation,
+                )
+
+    def test_list_query_count_does_not_grow(self):
+        self.reserve(1, 1)
+        with self.assertNumQueries(3):
+            self.client.get(Reservation_URL)
+
+        self.reserve(9, 4)
+        with self.assertNumQueries(3):
+            res = self.client.get(Reservation_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(res.data["results"]), 10)
+
+    def test_detail_query_count(self):
+        self.reserve(1, 5)
+        reservation = Reservation.objects.get()
+
+        with self.assertNumQueries(3):
+            res = self.client.get(
+                reverse("shows:reservation-detail", args=[reservation.id])
+            )
+
+        self.assertEqual(len(res.data["tickets"]), 5)
+        ticket = res.data["tickets"][0]
+        self.assertEqual(ticket["reservation"]["email"], self.user.email)
+        self.assertEqual(
+            ticket["show_session"]["astronomy_show"]["show_theme"],
+            ["Galaxies", "Stars"],
+        )
+
+    def test_sparse_list_skips_tickets(self):
+        self.reserve(3, 2)
+        with self.assertNumQueries(1):
+            res = self.client.get(
+                Reservation_URL, {"fields": "id,created_at"}
+            )
+
+        self.assertEqual(
+            list(res.data["results"][0]), ["id", "created_at"]
+        )
+
+
+class ReservationExportApiTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(admin_test())
+        self.user = user_test()
+        self.show_session = sample_show_session(price=12.5)
+        self.reservation = Reservation.objects.create(user=self.user)
+        for seat in (1, 2):
+            Ticket.objects.create(
+                row=1,
+                seat=seat,
+                show_session=self.show_session,
+                reservation=self.reservation,
+            )
+        Reservation.objects.create(user=self.user)
+
+    def test_export_reservations_with_matching_tickets(self):
+        res = self.client.get(
+            Reservation_Export_URL,
+            {"format": "ndjson", "show_session": self.show_session.id},
+        )
+
+        lines = b"".join(res.streaming_content).decode().splitlines()
+        self.assertEqual(len(lines), 1)
+        row = json.loads(lines[0])
+        self.assertEqual(row["id"], self.reservation.id)
+        self.assertEqual(row["email"], self.user.email)
+        self.assertEqual(row["ticket_count"], 2)
+        self.assertEqual(row["total_price"], "25.00")
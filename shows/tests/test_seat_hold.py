@@ -0,0 +1,154 @@
+import base64
+from datetime import timedelta
+from io import StringIO
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APIClient
+from rest_framework import status
+
+from shows.models import SeatHold, Ticket
+from shows.tests.default_test_data import (
+    user_test,
+    sample_show_session,
+    sample_planetarium_dome,
+)
+
+Seat_Hold_URL = reverse("shows:seathold-list")
+Ticket_Book_URL = reverse("shows:ticket-book")
+
+
+class UnauthenticatedSeatHoldApiTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+
+    def test_auth_required(self):
+        res = self.client.get(Seat_Hold_URL)
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+
+class SeatHoldApiTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.user = user_test()
+        self.other_user = user_test(
+            email="other@user.com", password="other_password"
+        )
+        self.client.force_authenticate(self.user)
+        self.show_session = sample_show_session(
+            planetarium_dome=sample_planetarium_dome(
+                name="Hold Dome", rows=2, seats_in_row=4
+            )
+        )
+
+    def hold(self, user, row, seat, expires_at=None):
+        return SeatHold.objects.create(
+            row=row,
+            seat=seat,
+            show_session=self.show_session,
+            user=user,
+            expires_at=expires_at or timezone.now() + timedelta(minutes=5),
+        )
+
+    def test_hold_seats(self):
+        payload = {
+            "show_session": self.show_session.id,
+            "seats": [{"row": 1, "seat": 1}, {"row": 1, "seat": 2}],
+        }
+        res = self.client.post(Seat_Hold_URL, payload, format="json")
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(len(res.data["holds"]), 2)
+        self.assertEqual(
+            SeatHold.objects.active().filter(user=self.user).count(), 2
+        )
+
+    def test_seat_held_by_other_user_rejected(self):
+        self.hold(self.other_user, 1, 1)
+        payload = {
+            "show_session": self.show_session.id,
+            "seats": [{"row": 1, "seat": 1}, {"row": 1, "seat": 2}],
+        }
+        res = self.client.post(Seat_Hold_URL, payload, format="json")
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(SeatHold.objects.filter(user=self.user).exists())
+
+        res = self.client.post(Ticket_Book_URL, payload, format="json")
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_expired_hold_is_replaced(self):
+        self.hold(
+            self.other_user, 1, 1, timezone.now() - timedelta(seconds=1)
+        )
+        payload = {
+            "show_session": self.show_session.id,
+            "seats": [{"row": 1, "seat": 1}],
+        }
+        res = self.client.post(Seat_Hold_URL, payload, format="json")
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(SeatHold.objects.get().user, self.user)
+
+    def test_booking_consumes_own_holds(self):
+        self.hold(self.user, 2, 3)
+        payload = {
+            "show_session": self.show_session.id,
+            "seats": [{"row": 2, "seat": 3}],
+        }
+        res = self.client.post(Ticket_Book_URL, payload, format="json")
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertFalse(SeatHold.objects.exists())
+        self.assertTrue(Ticket.objects.filter(row=2, seat=3).exists())
+
+    def test_seat_map_shows_holds(self):
+        self.hold(self.other_user, 2, 1)
+        res = self.client.get(
+            reverse(
+                "shows:showsession-seat-map", args=[self.show_session.id]
+            )
+        )
+
+        self.assertEqual(res.data["seats_held"], 1)
+        self.assertEqual(base64.b64decode(res.data["held"]), bytes([0x08]))
+
+    def test_release_hold(self):
+        hold = self.hold(self.user, 1, 4)
+        res = self.client.delete(
+            reverse("shows:seathold-detail", args=[hold.id])
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_204_NO_CONTENT)
+        self.assertFalse(SeatHold.objects.exists())
+
+
+class SweepSeatHoldsCommandTests(TestCase):
+    def test_sweep_deletes_only_expired_holds(self):
+        user = user_test()
+        show_session = sample_show_session()
+        now = timezone.now()
+        for seat in range(1, 6):
+            SeatHold.objects.create(
+                row=1,
+                seat=seat,
+                show_session=show_session,
+                user=user,
+                expires_at=now - timedelta(minutes=seat),
+            )
+        SeatHold.objects.create(
+            row=2,
+            seat=1,
+            show_session=show_session,
+            user=user,
+            expires_at=now + timedelta(minutes=5),
+        )
+
+        call_command("sweep_seat_holds", batch_size=2, stdout=StringIO())
+
+        self.assertEqual(SeatHold.objects.count(), 1)
+        self.assertEqual(SeatHold.objects.get().row, 2)
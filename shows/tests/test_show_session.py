@@ -1,11 +1,27 @@
+import base64
 import datetime
+import json
+import os
+import tempfile
+from io import StringIO
 
+from django.core.cache import cache
+from django.core.management import CommandError, call_command
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 from rest_framework.test import APIClient
 from rest_framework import status
+from rest_framework.renderers import JSONRenderer
 
-from shows.models import ShowSession
+from shows.models import (
+    AstronomyShow,
+    PlanetariumDome,
+    ShowSession,
+    Reservation,
+    Ticket,
+)
 from shows.serializers import ShowSessionListSerializer
 from shows.tests.default_test_data import (
     user_test,
@@ -19,6 +35,18 @@ from shows.tests.default_test_data import (
 Show_Session_URL = reverse("shows:showsession-list")
 
 
+def with_availability(show_session):
+    return ShowSession.objects.with_availability().get(pk=show_session.pk)
+
+
+def seat_map_url(show_session_id):
+    return reverse("shows:showsession-seat-map", args=[show_session_id])
+
+
+def auto_assign_url(show_session_id):
+    return reverse("shows:showsession-auto-assign", args=[show_session_id])
+
+
 class UnauthenticatedSAstronomyShowApiTests(TestCase):
     def setUp(self):
         self.client = APIClient()
@@ -70,11 +98,11 @@ class AuthenticatedShowSessionApiTests(TestCase):
         )
 
         res = self.client.get(Show_Session_URL)
-        serializer1 = ShowSessionListSerializer(show_session_object)
-        serializer2 = ShowSessionListSerializer(show_session_object_2)
+        serializer1 = ShowSessionListSerializer(with_availability(show_session_object))
+        serializer2 = ShowSessionListSerializer(with_availability(show_session_object_2))
         self.assertEqual(res.status_code, status.HTTP_200_OK)
-        self.assertIn(serializer1.data, res.data)
-        self.assertIn(serializer2.data, res.data)
+        self.assertIn(serializer1.data, res.data["results"])
+        self.assertIn(serializer2.data, res.data["results"])
 
     def test_not_create_show_session(self):
         """Show session object 1"""
@@ -96,6 +124,24 @@ class AuthenticatedShowSessionApiTests(TestCase):
         res = self.client.post(Show_Session_URL, payload)
         self.assertEqual(res.status_code, status.HTTP_403_FORBIDDEN)
 
+    def test_admin_create_overlapping_show_session(self):
+        self.client.force_authenticate(admin_test())
+        show_session = sample_show_session()
+        payload = {
+            "astronomy_show": show_session.astronomy_show.id,
+            "planetarium_dome": show_session.planetarium_dome.id,
+            "show_time": "2024-06-11 11:30:00",
+            "duration": "00:45:00",
+            "price": 10.00
+        }
+
+        res = self.client.post(Show_Session_URL, payload)
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+        payload["duration"] = "00:30:00"
+        res = self.client.post(Show_Session_URL, payload)
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+
     def test_admin_create_show_session(self):
         admin = admin_test()
         self.client.force_authenticate(admin)
@@ -154,12 +200,12 @@ class ShowSessionFilteringApiTests(TestCase):
             price=30.00
         )
         res = self.client.get(Show_Session_URL, {"show_name": "new"})
-        serializer1 = ShowSessionListSerializer(show_session_object_1)
-        serializer2 = ShowSessionListSerializer(show_session_object_2)
-        serializer3 = ShowSessionListSerializer(show_session_object_3)
-        self.assertNotIn(serializer1.data, res.data)
-        self.assertIn(serializer2.data, res.data)
-        self.assertIn(serializer3.data, res.data)
+        serializer1 = ShowSessionListSerializer(with_availability(show_session_object_1))
+        serializer2 = ShowSessionListSerializer(with_availability(show_session_object_2))
+        serializer3 = ShowSessionListSerializer(with_availability(show_session_object_3))
+        self.assertNotIn(serializer1.data, res.data["results"])
+        self.assertIn(serializer2.data, res.data["results"])
+        self.assertIn(serializer3.data, res.data["results"])
 
     def test_filter_show_session_astronomy_description(self):
         """Show session object 1"""
@@ -200,12 +246,12 @@ class ShowSessionFilteringApiTests(TestCase):
             price=30.00
         )
         res = self.client.get(Show_Session_URL, {"description": "new"})
-        serializer1 = ShowSessionListSerializer(show_session_object_1)
-        serializer2 = ShowSessionListSerializer(show_session_object_2)
-        serializer3 = ShowSessionListSerializer(show_session_object_3)
-        self.assertIn(serializer2.data, res.data)
-        self.assertIn(serializer3.data, res.data)
-        self.assertNotIn(serializer1.data, res.data)
+        serializer1 = ShowSessionListSerializer(with_availability(show_session_object_1))
+        serializer2 = ShowSessionListSerializer(with_availability(show_session_object_2))
+        serializer3 = ShowSessionListSerializer(with_availability(show_session_object_3))
+        self.assertIn(serializer2.data, res.data["results"])
+        self.assertIn(serializer3.data, res.data["results"])
+        self.assertNotIn(serializer1.data, res.data["results"])
 
     def test_filter_show_session_astronomy_planetarium_dome_name(self):
         """Show session object 1"""
@@ -259,12 +305,12 @@ class ShowSessionFilteringApiTests(TestCase):
             price=30.00
         )
         res = self.client.get(Show_Session_URL, {"name": "Planetarium"})
-        serializer1 = ShowSessionListSerializer(show_session_object_1)
-        serializer2 = ShowSessionListSerializer(show_session_object_2)
-        serializer3 = ShowSessionListSerializer(show_session_object_3)
-        self.assertIn(serializer1.data, res.data)
-        self.assertIn(serializer2.data, res.data)
-        self.assertNotIn(serializer3.data, res.data)
+        serializer1 = ShowSessionListSerializer(with_availability(show_session_object_1))
+        serializer2 = ShowSessionListSerializer(with_availability(show_session_object_2))
+        serializer3 = ShowSessionListSerializer(with_availability(show_session_object_3))
+        self.assertIn(serializer1.data, res.data["results"])
+        self.assertIn(serializer2.data, res.data["results"])
+        self.assertNotIn(serializer3.data, res.data["results"])
 
     def test_filter_show_session_show_time(self):
         """Show session object 1"""
@@ -318,12 +364,12 @@ class ShowSessionFilteringApiTests(TestCase):
             price=30.00
         )
         res = self.client.get(Show_Session_URL, {"show_time": "2024-06-20"})
-        serializer1 = ShowSessionListSerializer(show_session_object_1)
-        serializer2 = ShowSessionListSerializer(show_session_object_2)
-        serializer3 = ShowSessionListSerializer(show_session_object_3)
-        self.assertIn(serializer1.data, res.data)
-        self.assertIn(serializer2.data, res.data)
-        self.assertNotIn(serializer3.data, res.data)
+        serializer1 = ShowSessionListSerializer(with_availability(show_session_object_1))
+        serializer2 = ShowSessionListSerializer(with_availability(show_session_object_2))
+        serializer3 = ShowSessionListSerializer(with_availability(show_session_object_3))
+        self.assertIn(serializer1.data, res.data["results"])
+        self.assertIn(serializer2.data, res.data["results"])
+        self.assertNotIn(serializer3.data, res.data["results"])
 
 
 class ShowSessionModelsTestsStr(TestCase):
@@ -343,3 +389,751 @@ class ShowSessionModelsTestsStr(TestCase):
                 f"show time: {show_session_object_1.show_time}"
             ),
         )
+
+
+class ShowSessionSeatMapApiTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.user = user_test()
+        self.client.force_authenticate(self.user)
+        self.show_session = sample_show_session(
+            planetarium_dome=sample_planetarium_dome(
+                name="Small Dome", rows=2, seats_in_row=5
+            )
+        )
+        self.reservation = Reservation.objects.create(user=self.user)
+
+    def test_seat_map_bitset(self):
+        Ticket.objects.create(
+            row=1, seat=1,
+            show_session=self.show_session, reservation=self.reservation
+        )
+        Ticket.objects.create(
+            row=2, seat=5,
+            show_session=self.show_session, reservation=self.reservation
+        )
+        res = self.client.get(seat_map_url(self.show_session.id))
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data["capacity"], 10)
+        self.assertEqual(res.data["tickets_sold"], 2)
+        self.assertEqual(
+            base64.b64decode(res.data["occupied"]), bytes([0x80, 0x40])
+        )
+
+    def test_seat_map_cached_until_ticket_created(self):
+        self.client.get(seat_map_url(self.show_session.id))
+        with self.assertNumQueries(0):
+            res = self.client.get(seat_map_url(self.show_session.id))
+        self.assertEqual(res.data["tickets_sold"], 0)
+
+        Ticket.objects.create(
+            row=1, seat=2,
+            show_session=self.show_session, reservation=self.reservation
+        )
+        res = self.client.get(seat_map_url(self.show_session.id))
+        self.assertEqual(res.data["tickets_sold"], 1)
+        self.assertEqual(
+            base64.b64decode(res.data["occupied"]), bytes([0x40, 0x00])
+        )
+
+    def test_seat_map_cache_ignores_id_spelling(self):
+        padded_id = f"0{self.show_session.id}"
+        urls = [
+            seat_map_url(padded_id),
+            reverse("shows:async-showsession-seat-map", args=[padded_id]),
+        ]
+        for url in urls:
+            self.client.get(url)
+
+        Ticket.objects.create(
+            row=1, seat=2,
+            show_session=self.show_session, reservation=self.reservation
+        )
+
+        for url in urls:
+            with self.subTest(url):
+                res = self.client.get(url)
+                self.assertEqual(res.json()["tickets_sold"], 1)
+
+    def test_seat_map_not_found(self):
+        res = self.client.get(seat_map_url(self.show_session.id + 1))
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
+
+        res = self.client.get(seat_map_url("abc"))
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
+
+
+class ShowSessionAutoAssignApiTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.user = user_test()
+        self.client.force_authenticate(self.user)
+        self.show_session = sample_show_session(
+            planetarium_dome=sample_planetarium_dome(
+                name="Assign Dome", rows=5, seats_in_row=9
+            )
+        )
+        self.reservation = Reservation.objects.create(user=self.user)
+
+    def test_auto_assign_prefers_centre(self):
+        res = self.client.post(
+            auto_assign_url(self.show_session.id), {"party_size": 3}
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data["row"], 3)
+        self.assertEqual(res.data["seats"], [4, 5, 6])
+
+    def test_auto_assign_skips_taken_seats(self):
+        for row in range(1, 6):
+            Ticket.objects.create(
+                row=row, seat=5,
+                show_session=self.show_session, reservation=self.reservation
+            )
+        res = self.client.post(
+            auto_assign_url(self.show_session.id), {"party_size": 4}
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data["row"], 3)
+        self.assertIn(res.data["seats"], ([1, 2, 3, 4], [6, 7, 8, 9]))
+
+    def test_auto_assign_no_block_available(self):
+        res = self.client.post(
+            auto_assign_url(self.show_session.id), {"party_size": 10}
+        )
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class ShowSessionAvailabilityApiTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.user = user_test()
+        self.client.force_authenticate(self.user)
+        self.reservation = Reservation.objects.create(user=self.user)
+        self.small_session = sample_show_session(
+            planetarium_dome=sample_planetarium_dome(
+                name="Small Dome", rows=1, seats_in_row=2
+            )
+        )
+        self.big_session = ShowSession.objects.create(
+            astronomy_show=self.small_session.astronomy_show,
+            planetarium_dome=sample_planetarium_dome(
+                name="Big Dome", rows=2, seats_in_row=5
+            ),
+            show_time="2024-06-12 12:12:12",
+        )
+        for seat in (1, 2):
+            Ticket.objects.create(
+                row=1, seat=seat,
+                show_session=self.small_session,
+                reservation=self.reservation,
+            )
+        Ticket.objects.create(
+            row=1, seat=1,
+            show_session=self.big_session,
+            reservation=self.reservation,
+        )
+
+    def test_values_list_renders_like_serializer(self):
+        res = self.client.get(Show_Session_URL)
+
+        expected = ShowSessionListSerializer(
+            ShowSession.objects.with_availability().order_by(
+                "show_time", "id"
+            ),
+            many=True,
+        ).data
+        self.assertEqual(
+            JSONRenderer().render(res.data["results"]),
+            JSONRenderer().render(expected),
+        )
+
+    def test_list_counts_in_one_query(self):
+        with self.assertNumQueries(1):
+            res = self.client.get(Show_Session_URL)
+
+        counts = {
+            session["planetarium_dome"]: (
+                session["capacity"],
+                session["tickets_sold"],
+                session["tickets_available"],
+            )
+            for session in res.data["results"]
+        }
+        self.assertEqual(counts["Small Dome"], (2, 2, 0))
+        self.assertEqual(counts["Big Dome"], (10, 1, 9))
+
+    def test_detail_counts(self):
+        res = self.client.get(
+            reverse("shows:showsession-detail", args=[self.big_session.id])
+        )
+        self.assertEqual(res.data["tickets_available"], 9)
+
+    def test_filter_available(self):
+        res = self.client.get(Show_Session_URL, {"available__gte": 1})
+
+        self.assertEqual(
+            [session["planetarium_dome"] for session in res.data["results"]],
+            ["Big Dome"],
+        )
+
+    def test_filter_available_invalid(self):
+        res = self.client.get(Show_Session_URL, {"available__gte": "many"})
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class ShowSessionSoldCountTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.user = user_test()
+        self.client.force_authenticate(self.user)
+        self.show_session = sample_show_session()
+
+    def sold_count(self):
+        self.show_session.refresh_from_db()
+        return self.show_session.sold_count
+
+    def test_sold_count_follows_tickets(self):
+        reservation = Reservation.objects.create(user=self.user)
+        ticket = Ticket.objects.create(
+            row=1, seat=1,
+            show_session=self.show_session, reservation=reservation
+        )
+        self.assertEqual(self.sold_count(), 1)
+
+        self.client.post(
+            reverse("shows:ticket-book"),
+            {
+                "show_session": self.show_session.id,
+                "seats": [{"row": 2, "seat": 1}, {"row": 2, "seat": 2}],
+            },
+            format="json",
+        )
+        self.assertEqual(self.sold_count(), 3)
+
+        ticket.delete()
+        self.assertEqual(self.sold_count(), 2)
+
+        Reservation.objects.all().delete()
+        self.assertEqual(self.sold_count(), 0)
+
+    def test_sold_count_follows_moved_ticket(self):
+        other_session = ShowSession.objects.create(
+            astronomy_show=self.show_session.astronomy_show,
+            planetarium_dome=self.show_session.planetarium_dome,
+            show_time="2024-06-12 12:12:12",
+        )
+        ticket = Ticket.objects.create(
+            row=1, seat=1,
+            show_session=self.show_session,
+            reservation=Reservation.objects.create(user=self.user),
+        )
+        ticket.show_session = other_session
+        ticket.save()
+
+        other_session.refresh_from_db()
+        self.assertEqual(self.sold_count(), 0)
+        self.assertEqual(other_session.sold_count, 1)
+
+    def other_session(self):
+        return ShowSession.objects.create(
+            astronomy_show=self.show_session.astronomy_show,
+            planetarium_dome=self.show_session.planetarium_dome,
+            show_time="2024-06-12 12:12:12",
+        )
+
+    def test_sold_count_follows_bulk_created_tickets(self):
+        other_session = self.other_session()
+        reservation = Reservation.objects.create(user=self.user)
+
+        Ticket.objects.bulk_create(
+            Ticket(
+                row=1, seat=seat,
+                show_session=show_session, reservation=reservation,
+            )
+            for seat, show_session in (
+                (1, self.show_session),
+                (2, self.show_session),
+                (1, other_session),
+            )
+        )
+
+        other_session.refresh_from_db()
+        self.assertEqual(self.sold_count(), 2)
+        self.assertEqual(other_session.sold_count, 1)
+
+        Ticket.objects.bulk_create(
+            [
+                Ticket(
+                    row=1, seat=1,
+                    show_session=self.show_session, reservation=reservation,
+                ),
+                Ticket(
+                    row=1, seat=3,
+                    show_session=self.show_session, reservation=reservation,
+                ),
+            ],
+            ignore_conflicts=True,
+        )
+        self.assertEqual(self.sold_count(), 3)
+
+    def test_reservation_delete_updates_each_session_once(self):
+        other_session = self.other_session()
+        reservation = Reservation.objects.create(user=self.user)
+        Ticket.objects.bulk_create(
+            Ticket(
+                row=1, seat=seat,
+                show_session=show_session, reservation=reservation,
+            )
+            for seat in range(1, 5)
+            for show_session in (self.show_session, other_session)
+        )
+
+        with CaptureQueriesContext(connection) as queries:
+            reservation.delete()
+
+        self.assertEqual(
+            sum(
+                query["sql"].startswith('UPDATE "shows_showsession"')
+                for query in queries.captured_queries
+            ),
+            2,
+        )
+        other_session.refresh_from_db()
+        self.assertEqual(self.sold_count(), 0)
+        self.assertEqual(other_session.sold_count, 0)
+
+    def test_sold_count_follows_user_delete(self):
+        Ticket.objects.create(
+            row=1, seat=1,
+            show_session=self.show_session,
+            reservation=Reservation.objects.create(user=self.user),
+        )
+
+        self.user.delete()
+
+        self.assertEqual(self.sold_count(), 0)
+
+    def test_reconcile_sold_counts(self):
+        Ticket.objects.create(
+            row=1, seat=1,
+            show_session=self.show_session,
+            reservation=Reservation.objects.create(user=self.user),
+        )
+        ShowSession.objects.update(sold_count=7)
+
+        call_command("reconcile_sold_counts", batch_size=1, stdout=StringIO())
+
+        self.assertEqual(self.sold_count(), 1)
+
+
+class ShowSessionPaginationTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.user = user_test()
+        self.client.force_authenticate(self.user)
+        show_session = sample_show_session(show_time="2024-06-11 18:00:00")
+        other_dome = sample_planetarium_dome(name="Other Dome")
+        for show_time, planetarium_dome in (
+            ("2024-06-11 12:00:00", show_session.planetarium_dome),
+            ("2024-06-11 15:00:00", show_session.planetarium_dome),
+            ("2024-06-12 12:00:00", show_session.planetarium_dome),
+            ("2024-06-11 15:00:00", other_dome),
+        ):
+            ShowSession.objects.create(
+                astronomy_show=show_session.astronomy_show,
+                planetarium_dome=planetarium_dome,
+                show_time=show_time,
+            )
+
+    def test_cursor_pages_follow_show_time(self):
+        show_times = []
+        url = Show_Session_URL + "?page_size=2"
+        with CaptureQueriesContext(connection) as queries:
+            while url:
+                res = self.client.get(url)
+                self.assertEqual(res.status_code, status.HTTP_200_OK)
+                show_times += [
+                    session["show_time"] for session in res.data["results"]
+                ]
+                url = res.data["next"]
+
+        self.assertEqual(
+            show_times,
+            [
+                "2024-06-11T12:00:00",
+                "2024-06-11T15:00:00",
+                "2024-06-11T15:00:00",
+                "2024-06-11T18:00:00",
+                "2024-06-12T12:00:00",
+            ],
+        )
+        self.assertFalse(
+            any(
+                '"__count"' in query["sql"]
+                for query in queries.captured_queries
+            )
+        )
+
+    def test_sparse_page_loads_the_cursor_fields(self):
+        url = (
+            Show_Session_URL
+            + "?page_size=2&fields=price,planetarium_dome"
+            + "&expand=planetarium_dome"
+        )
+        res = self.client.get(url)
+
+        # One query for the page, its cursor links included.
+        with self.assertNumQueries(1):
+            res = self.client.get(res.data["next"])
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            set(res.data["results"][0]), {"price", "planetarium_dome"}
+        )
+        self.assertIsNotNone(res.data["previous"])
+
+
+class ShowSessionConditionalGetTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.user = user_test()
+        self.client.force_authenticate(self.user)
+        self.show_session = sample_show_session()
+        self.detail_url = reverse(
+            "shows:showsession-detail", args=[self.show_session.id]
+        )
+
+    def test_unchanged_list_is_not_modified(self):
+        etag = self.client.get(Show_Session_URL)["ETag"]
+
+        with self.assertNumQueries(1):
+            res = self.client.get(Show_Session_URL, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(res.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(res["ETag"], etag)
+        self.assertFalse(res.content)
+
+    def test_sales_and_related_changes_update_etag(self):
+        etags = [self.client.get(Show_Session_URL)["ETag"]]
+
+        Ticket.objects.create(
+            row=1,
+            seat=1,
+            show_session=self.show_session,
+            reservation=Reservation.objects.create(user=self.user),
+        )
+        etags.append(self.client.get(Show_Session_URL)["ETag"])
+
+        dome = self.show_session.planetarium_dome
+        dome.name = "Renamed Dome"
+        dome.save()
+        res = self.client.get(Show_Session_URL, HTTP_IF_NONE_MATCH=etags[-1])
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        etags.append(res["ETag"])
+
+        ShowSession.objects.create(
+            astronomy_show=self.show_session.astronomy_show,
+            planetarium_dome=dome,
+            show_time="2024-06-10 12:00:00",
+        )
+        etags.append(self.client.get(Show_Session_URL)["ETag"])
+
+        ShowSession.objects.filter(show_time="2024-06-10 12:00:00").delete()
+        etags.append(self.client.get(Show_Session_URL)["ETag"])
+
+        self.assertEqual(len(set(etags[:4])), 4)
+        # Back to the rows, and so the ETag, from before the insert.
+        self.assertEqual(etags[4], etags[2])
+
+    def test_detail_last_modified(self):
+        res = self.client.get(self.detail_url)
+        last_modified = res["Last-Modified"]
+
+        res = self.client.get(
+            self.detail_url, HTTP_IF_MODIFIED_SINCE=last_modified
+        )
+        self.assertEqual(res.status_code, status.HTTP_304_NOT_MODIFIED)
+
+
+class ShowSessionTimeRangeFilteringApiTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.user = user_test()
+        self.client.force_authenticate(self.user)
+        first = sample_show_session(
+            show_time="2024-06-19 23:30:00",
+            duration=datetime.timedelta(minutes=30),
+        )
+        self.other_dome = sample_planetarium_dome(name="Other Dome")
+        for show_time, dome in (
+            ("2024-06-20 00:00:00", first.planetarium_dome),
+            ("2024-06-20 19:00:00", self.other_dome),
+            ("2024-06-21 00:00:00", first.planetarium_dome),
+        ):
+            ShowSession.objects.create(
+                astronomy_show=first.astronomy_show,
+                planetarium_dome=dome,
+                show_time=show_time,
+            )
+
+    def show_times(self, params):
+        res = self.client.get(Show_Session_URL, params)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        return [session["show_time"] for session in res.data["results"]]
+
+    def test_filter_date(self):
+        self.assertEqual(
+            self.show_times({"date": "2024-06-20"}),
+            ["2024-06-20T00:00:00", "2024-06-20T19:00:00"],
+        )
+
+    def test_filter_show_time_range(self):
+        self.assertEqual(
+            self.show_times({
+                "show_time_after": "2024-06-19 23:30",
+                "show_time_before": "2024-06-21",
+            }),
+            [
+                "2024-06-19T23:30:00",
+                "2024-06-20T00:00:00",
+                "2024-06-20T19:00:00",
+            ],
+        )
+
+    def test_filter_dome_and_time(self):
+        self.assertEqual(
+            self.show_times({
+                "planetarium_dome": self.other_dome.id,
+                "show_time_after": "2024-06-20",
+            }),
+            ["2024-06-20T19:00:00"],
+        )
+
+    def test_filter_invalid_date(self):
+        res = self.client.get(Show_Session_URL, {"date": "2024-13-40"})
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+        res = self.client.get(Show_Session_URL, {"show_time_after": "soon"})
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class ImportScheduleCommandTests(TestCase):
+    records = [
+        {"type": "theme", "name": "Planets"},
+        {"type": "dome", "name": "Main Dome", "rows": 10, "seats_in_row": 12},
+        {
+            "type": "show",
+            "title": "Moon",
+            "description": "About the Moon",
+            "themes": ["Planets", "Moon"],
+        },
+        {
+            "type": "session",
+            "show": "Moon",
+            "dome": "Main Dome",
+            "show_time": "2030-01-01T18:00:00",
+            "price": "12.50",
+        },
+    ]
+
+    def import_schedule(self, records, suffix=".jsonl"):
+        with tempfile.NamedTemporaryFile(
+            "w", suffix=suffix, delete=False
+        ) as file:
+            if suffix == ".jsonl":
+                file.writelines(json.dumps(record) + "\n" for record in records)
+            else:
+                file.write(records)
+        self.addCleanup(os.remove, file.name)
+        call_command("import_schedule", file.name, stdout=StringIO())
+
+    def test_import_jsonl(self):
+        self.import_schedule(self.records)
+
+        show = AstronomyShow.objects.get(title="Moon")
+        self.assertEqual(
+            sorted(show.show_theme.values_list("name", flat=True)),
+            ["Moon", "Planets"],
+        )
+        self.assertTrue(AstronomyShow.objects.search("moon").exists())
+        show_session = ShowSession.objects.get()
+        self.assertEqual(show_session.astronomy_show, show)
+        self.assertEqual(show_session.planetarium_dome.seats_in_row, 12)
+        self.assertEqual(str(show_session.price), "12.50")
+
+    def test_reimport_updates_rows(self):
+        self.import_schedule(self.records)
+        self.import_schedule([
+            {"type": "dome", "name": "Main Dome", "rows": 8,
+             "seats_in_row": 12},
+            {**self.records[3], "price": "15.00"},
+        ])
+
+        self.assertEqual(PlanetariumDome.objects.get().rows, 8)
+        self.assertEqual(AstronomyShow.objects.count(), 1)
+        self.assertEqual(str(ShowSession.objects.get().price), "15.00")
+
+    def test_import_csv(self):
+        self.import_schedule(
+            "type,name,rows,seats_in_row,title,description,themes,"
+            "show,dome,show_time,price\n"
+            "dome,Main Dome,10,12,,,,,,,\n"
+            "show,,,,Moon,About the Moon,Planets;Moon,,,,\n"
+            "session,,,,,,,Moon,Main Dome,2030-01-01 18:00,12.50\n",
+            suffix=".csv",
+        )
+
+        self.assertEqual(ShowSession.objects.get().astronomy_show.title, "Moon")
+        self.assertEqual(
+            AstronomyShow.objects.get().show_theme.count(), 2
+        )
+
+    def test_unknown_show_rolls_back(self):
+        with self.assertRaisesMessage(CommandError, "unknown show 'Sun'"):
+            self.import_schedule(
+                self.records[:3] + [{**self.records[3], "show": "Sun"}]
+            )
+
+        self.assertFalse(AstronomyShow.objects.exists())
+
+    def test_overlapping_sessions(self):
+        with self.assertRaisesMessage(
+            CommandError, "exclude_overlapping_show_sessions"
+        ):
+            self.import_schedule(self.records + [
+                {**self.records[3], "show_time": "2030-01-01T18:30:00"},
+            ])
+
+    def test_invalid_dome(self):
+        with self.assertRaisesMessage(CommandError, "line 1"):
+            self.import_schedule([{**self.records[1], "rows": 500}])
+
+    def test_line_not_an_object(self):
+        for line in ([1], "x"):
+            with self.subTest(line):
+                with self.assertRaisesMessage(
+                    CommandError, "line 2: expected an object"
+                ):
+                    self.import_schedule([self.records[0], line])
+
+
+class ShowSessionScheduleApiTests(TestCase):
+    url = reverse("shows:showsession-schedule")
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(admin_test())
+        self.payload = {
+            "astronomy_show": sample_astronomy_show().id,
+            "planetarium_dome": sample_planetarium_dome().id,
+            "price": "12.50",
+            "start_date": "2030-01-01",
+            "end_date": "2030-01-14",
+            "weekdays": ["tue", "wed", "thu", "fri", "sat", "sun"],
+            "times": ["19:00", "14:00"],
+        }
+
+    def test_create_schedule(self):
+        with CaptureQueriesContext(connection) as queries:
+            res = self.client.post(self.url, self.payload, format="json")
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(len(res.data["show_sessions"]), 24)
+        self.assertEqual(ShowSession.objects.count(), 24)
+        # 2030-01-07 is a Monday.
+        self.assertFalse(
+            ShowSession.objects.filter(show_time__date="2030-01-07").exists()
+        )
+        self.assertEqual(
+            ShowSession.objects.order_by("show_time").first().show_time,
+            datetime.datetime(2030, 1, 1, 14),
+        )
+        inserts = [
+            query for query in queries.captured_queries
+            if query["sql"].startswith('INSERT INTO "shows_showsession"')
+        ]
+        self.assertEqual(len(inserts), 1)
+
+    def test_taken_show_time_creates_nothing(self):
+        ShowSession.objects.create(
+            astronomy_show_id=self.payload["astronomy_show"],
+            planetarium_dome_id=self.payload["planetarium_dome"],
+            show_time="2030-01-03 19:00",
+            price=10,
+        )
+
+        res = self.client.post(self.url, self.payload, format="json")
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(
+            res.data["show_times"], ["2030-01-03 19:00 is already taken"]
+        )
+        self.assertEqual(ShowSession.objects.count(), 1)
+
+    def test_overlapping_show_time_creates_nothing(self):
+        ShowSession.objects.create(
+            astronomy_show_id=self.payload["astronomy_show"],
+            planetarium_dome_id=self.payload["planetarium_dome"],
+            show_time="2030-01-05 12:00",
+            duration=datetime.timedelta(hours=3),
+            price=10,
+        )
+
+        res = self.client.post(
+            self.url, {**self.payload, "duration": "01:30:00"}, format="json"
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(
+            res.data["show_times"], ["2030-01-05 14:00 is already taken"]
+        )
+
+    def test_invalid_schedule(self):
+        for changes in (
+            {"end_date": "2029-12-31"},
+            {"weekdays": ["mon"], "end_date": "2030-01-06"},
+            {"end_date": "2040-01-01"},
+            {"weekdays": ["someday"]},
+            {"duration": "06:00:00"},
+        ):
+            res = self.client.post(
+                self.url, {**self.payload, **changes}, format="json"
+            )
+            self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(ShowSession.objects.exists())
+
+    def test_schedule_requires_admin(self):
+        self.client.force_authenticate(user_test())
+
+        res = self.client.post(self.url, self.payload, format="json")
+
+        self.assertEqual(res.status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_schedule_sessions_command(self):
+        call_command(
+            "schedule_sessions",
+            "--show", "Sample Astronomy Show",
+            "--dome", "Sample Planetarium Dome",
+            "--from", "2030-01-01",
+            "--to", "2030-01-14",
+            "--weekdays", "fri-mon",
+            "--times", "14:00,16:00",
+            "--price", "12.50",
+            stdout=StringIO(),
+        )
+
+        self.assertEqual(ShowSession.objects.count(), 16)
+
+        with self.assertRaisesMessage(CommandError, "unknown weekday"):
+            call_command(
+                "schedule_sessions",
+                "--show", "Sample Astronomy Show",
+                "--dome", "Sample Planetarium Dome",
+                "--from", "2030-01-01", "--to", "2030-01-02",
+                "--times", "14:00", "--price", "1", "--weekdays", "tue-xyz",
+            )
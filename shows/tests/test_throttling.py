@@ -0,0 +1,125 @@
+from unittest import mock
+
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient, APIRequestFactory
+
+from shows.tests.default_test_data import (
+    sample_planetarium_dome,
+    sample_show_session,
+    user_test,
+)
+from shows.throttling import UserRateThrottle
+from shows.views import TicketViewSet
+
+TICKET_URL = reverse("shows:ticket-list")
+TICKET_BOOK_URL = reverse("shows:ticket-book")
+
+
+class MinuteThrottle(UserRateThrottle):
+    rate = "10/min"
+
+
+class BookingThrottle(UserRateThrottle):
+    rate = "15/min"
+
+
+class View:
+    def __init__(self, action="list"):
+        self.action = action
+        self.throttle_costs = {"create": 4}
+
+
+class SlidingWindowRateThrottleTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.request = APIRequestFactory().get("/")
+        self.request.user = user_test()
+        self.now = 6000.0
+
+    def allow(self, action="list"):
+        throttle = MinuteThrottle()
+        throttle.timer = lambda: self.now
+        return throttle, throttle.allow_request(self.request, View(action))
+
+    def test_limit_within_window(self):
+        for _ in range(10):
+            self.assertTrue(self.allow()[1])
+
+        throttle, allowed = self.allow()
+
+        self.assertFalse(allowed)
+        self.assertEqual(throttle.wait(), 60)
+
+    def test_actions_cost_more(self):
+        self.assertTrue(self.allow("create")[1])
+        self.assertTrue(self.allow("create")[1])
+        self.assertFalse(self.allow("create")[1])
+
+        self.assertTrue(self.allow()[1])
+        self.assertTrue(self.allow()[1])
+        self.assertFalse(self.allow()[1])
+
+    def test_previous_window_slides_out(self):
+        for _ in range(10):
+            self.allow()
+
+        self.now += 60 + 3
+        throttle, allowed = self.allow()
+        self.assertFalse(allowed)
+        self.assertAlmostEqual(throttle.wait(), 3)
+
+        self.now += 4
+        self.assertTrue(self.allow()[1])
+
+    def test_counters_per_client(self):
+        for _ in range(10):
+            self.allow()
+
+        self.request.user = user_test(email="other@example.com")
+
+        self.assertTrue(self.allow()[1])
+
+
+class TicketThrottleTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.client.force_authenticate(user_test())
+        self.show_session = sample_show_session(
+            planetarium_dome=sample_planetarium_dome(
+                name="Throttle Dome", rows=10, seats_in_row=10
+            )
+        )
+        patcher = mock.patch.object(
+            TicketViewSet, "throttle_classes", [BookingThrottle]
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_booking_costs_more_than_browsing(self):
+        res = self.client.post(
+            TICKET_BOOK_URL,
+            {
+                "show_session": self.show_session.id,
+                "seats": [{"row": 1, "seat": 1}],
+            },
+            format="json",
+        )
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+
+        res = self.client.post(
+            TICKET_BOOK_URL,
+            {
+                "show_session": self.show_session.id,
+                "seats": [{"row": 1, "seat": 2}],
+            },
+            format="json",
+        )
+        self.assertEqual(res.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+        self.assertIn("Retry-After", res)
+
+        res = self.client.get(TICKET_URL)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
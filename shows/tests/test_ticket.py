@@ -1,7 +1,12 @@
+import csv
+import io
+import json
+
 from django.test import TestCase
 from django.urls import reverse
 from rest_framework.test import APIClient
 from rest_framework import status
+from rest_framework.renderers import JSONRenderer
 from shows.models import ShowSession, Ticket, Reservation
 from shows.serializers import TicketListSerializer
 from shows.tests.default_test_data import (
@@ -16,6 +21,8 @@ from django.db.utils import IntegrityError
 
 
 Ticket_URL = reverse("shows:ticket-list")
+Ticket_Book_URL = reverse("shows:ticket-book")
+Ticket_Export_URL = reverse("shows:ticket-export")
 
 
 class UnauthenticatedTicketApiTests(TestCase):
@@ -69,10 +76,10 @@ class AuthenticatedTicketApiTests(TestCase):
         res = self.client.get(Ticket_URL)
         expected_ticket_list = Ticket.objects.filter(
             reservation__user=self.user
-        )
+        ).order_by("-id")
         serializer = TicketListSerializer(expected_ticket_list, many=True)
         self.assertEqual(res.status_code, status.HTTP_200_OK)
-        self.assertEqual(res.data, serializer.data)
+        self.assertEqual(res.data["results"], serializer.data)
 
     def test_list_ticket(self):
         """Ticket object 1"""
@@ -120,10 +127,10 @@ class AuthenticatedTicketApiTests(TestCase):
         )
 
         res = self.client.get(Ticket_URL)
-        ticket_list = Ticket.objects.all()
+        ticket_list = Ticket.objects.order_by("-id")
         serializer = TicketListSerializer(ticket_list, many=True)
         self.assertEqual(res.status_code, status.HTTP_200_OK)
-        self.assertEqual(res.data, serializer.data)
+        self.assertEqual(res.data["results"], serializer.data)
 
     def test_create_ticket(self):
         """Ticket object 1"""
@@ -156,6 +163,142 @@ class AuthenticatedTicketApiTests(TestCase):
         self.assertNotEqual(res.status_code, status.HTTP_403_FORBIDDEN)
 
 
+class TicketSparseFieldsetApiTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.user = user_test()
+        self.client.force_authenticate(self.user)
+        show_session = sample_show_session()
+        show_session.astronomy_show.show_theme.add(
+            sample_show_theme(name="Galaxies")
+        )
+        Ticket.objects.create(
+            row=1,
+            seat=1,
+            show_session=show_session,
+            reservation=Reservation.objects.create(user=self.user),
+        )
+
+    def test_fields_limit_columns_and_relations(self):
+        with self.assertNumQueries(1) as queries:
+            res = self.client.get(Ticket_URL, {"fields": "id,row,seat"})
+
+        self.assertEqual(list(res.data["results"][0]), ["id", "row", "seat"])
+        self.assertNotIn(
+            "shows_showsession", queries.captured_queries[0]["sql"]
+        )
+
+    def test_expand_nests_relations(self):
+        res = self.client.get(
+            Ticket_URL, {"expand": "show_session,reservation"}
+        )
+
+        ticket = res.data["results"][0]
+        self.assertEqual(ticket["reservation"]["email"], self.user.email)
+        self.assertEqual(
+            ticket["show_session"]["astronomy_show"]["show_theme"],
+            ["Galaxies"],
+        )
+
+    def test_values_list_renders_like_serializer(self):
+        res = self.client.get(Ticket_URL)
+
+        expected = TicketListSerializer(
+            Ticket.objects.order_by("-id"), many=True
+        ).data
+        self.assertEqual(
+            JSONRenderer().render(res.data["results"]),
+            JSONRenderer().render(expected),
+        )
+
+    def test_unknown_fields_rejected(self):
+        res = self.client.get(Ticket_URL, {"fields": "id,secret"})
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+        res = self.client.get(Ticket_URL, {"expand": "row"})
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class TicketExportApiTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(admin_test())
+        self.user = user_test()
+        reservation = Reservation.objects.create(user=self.user)
+        self.show_session = sample_show_session()
+        self.later_session = ShowSession.objects.create(
+            astronomy_show=self.show_session.astronomy_show,
+            planetarium_dome=self.show_session.planetarium_dome,
+            show_time="2024-06-12 18:00:00",
+            price=15,
+        )
+        for show_session in (self.show_session, self.later_session):
+            Ticket.objects.create(
+                row=2,
+                seat=3,
+                show_session=show_session,
+                reservation=reservation,
+            )
+
+    def export(self, params):
+        res = self.client.get(Ticket_Export_URL, params)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertTrue(res.streaming)
+        return b"".join(res.streaming_content).decode()
+
+    def test_export_ndjson(self):
+        lines = self.export({"format": "ndjson"}).splitlines()
+
+        self.assertEqual(len(lines), 2)
+        self.assertEqual(
+            json.loads(lines[1]),
+            {
+                "id": self.later_session.tickets.get().id,
+                "row": 2,
+                "seat": 3,
+                "show_session": self.later_session.id,
+                "show_time": "2024-06-12T18:00:00",
+                "astronomy_show": self.show_session.astronomy_show.title,
+                "planetarium_dome": self.show_session.planetarium_dome.name,
+                "price": "15.00",
+                "reservation": self.later_session.tickets.get().reservation_id,
+                "email": self.user.email,
+                "reserved_at": json.loads(lines[0])["reserved_at"],
+            },
+        )
+
+    def test_export_csv_filtered_by_show_time(self):
+        rows = list(
+            csv.DictReader(
+                io.StringIO(
+                    self.export(
+                        {
+                            "format": "csv",
+                            "show_time_after": "2024-06-12",
+                            "planetarium_dome": (
+                                self.show_session.planetarium_dome_id
+                            ),
+                        }
+                    )
+                )
+            )
+        )
+
+        self.assertEqual(len(rows), 1)
+        self.assertEqual(rows[0]["show_session"], str(self.later_session.id))
+
+    def test_export_rejects_bad_filters(self):
+        res = self.client.get(
+            Ticket_Export_URL, {"format": "csv", "show_session": "first"}
+        )
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_export_is_staff_only(self):
+        self.client.force_authenticate(self.user)
+        res = self.client.get(Ticket_Export_URL, {"format": "ndjson"})
+        self.assertEqual(res.status_code, status.HTTP_403_FORBIDDEN)
+
+
 class TicketFilteringApiTests(TestCase):
     def setUp(self):
         self.client = APIClient()
@@ -235,9 +378,9 @@ class TicketFilteringApiTests(TestCase):
         serializer2 = TicketListSerializer(ticket_object_2)
         serializer3 = TicketListSerializer(ticket_object_3)
 
-        self.assertIn(serializer1.data, res.data)
-        self.assertIn(serializer2.data, res.data)
-        self.assertNotIn(serializer3.data, res.data)
+        self.assertIn(serializer1.data, res.data["results"])
+        self.assertIn(serializer2.data, res.data["results"])
+        self.assertNotIn(serializer3.data, res.data["results"])
 
     def test_filter_ticket_reservation_user(self):
         """Ticket object 1"""
@@ -317,9 +460,9 @@ class TicketFilteringApiTests(TestCase):
         serializer1 = TicketListSerializer(ticket_object_1)
         serializer2 = TicketListSerializer(ticket_object_2)
         serializer3 = TicketListSerializer(ticket_object_3)
-        self.assertIn(serializer1.data, res.data)
-        self.assertNotIn(serializer2.data, res.data)
-        self.assertNotIn(serializer3.data, res.data)
+        self.assertIn(serializer1.data, res.data["results"])
+        self.assertNotIn(serializer2.data, res.data["results"])
+        self.assertNotIn(serializer3.data, res.data["results"])
 
     def test_filter_ticket_show_session_planetarium_dome_name(self):
         """Ticket object 1"""
@@ -393,9 +536,9 @@ class TicketFilteringApiTests(TestCase):
         serializer2 = TicketListSerializer(ticket_object_2)
         serializer3 = TicketListSerializer(ticket_object_3)
 
-        self.assertIn(serializer1.data, res.data)
-        self.assertIn(serializer2.data, res.data)
-        self.assertNotIn(serializer3.data, res.data)
+        self.assertIn(serializer1.data, res.data["results"])
+        self.assertIn(serializer2.data, res.data["results"])
+        self.assertNotIn(serializer3.data, res.data["results"])
 
 
 class TicketModelsTests(TestCase):
@@ -495,3 +638,73 @@ class ReservationTest(TestCase):
         }
         response = self.client.post(Ticket_URL, data)
         self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+
+
+class TicketBookingApiTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.user = user_test()
+        self.client.force_authenticate(self.user)
+        self.show_session = sample_show_session(
+            planetarium_dome=sample_planetarium_dome(
+                name="Booking Dome", rows=10, seats_in_row=10
+            )
+        )
+
+    def test_book_seats_under_one_reservation(self):
+        payload = {
+            "show_session": self.show_session.id,
+            "seats": [
+                {"row": 5, "seat": 4},
+                {"row": 5, "seat": 5},
+                {"row": 5, "seat": 6},
+            ],
+        }
+        res = self.client.post(Ticket_Book_URL, payload, format="json")
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(len(res.data["tickets"]), 3)
+        self.assertEqual(Reservation.objects.count(), 1)
+        self.assertEqual(
+            Ticket.objects.filter(
+                reservation_id=res.data["reservation"]
+            ).count(),
+            3,
+        )
+
+    def test_book_fails_atomically_on_taken_seat(self):
+        Ticket.objects.create(
+            row=5,
+            seat=5,
+            show_session=self.show_session,
+            reservation=Reservation.objects.create(user=self.user),
+        )
+        payload = {
+            "show_session": self.show_session.id,
+            "seats": [{"row": 5, "seat": 4}, {"row": 5, "seat": 5}],
+        }
+        res = self.client.post(Ticket_Book_URL, payload, format="json")
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(Ticket.objects.count(), 1)
+        self.assertEqual(Reservation.objects.count(), 1)
+
+    def test_book_seat_outside_dome(self):
+        payload = {
+            "show_session": self.show_session.id,
+            "seats": [{"row": 11, "seat": 1}],
+        }
+        res = self.client.post(Ticket_Book_URL, payload, format="json")
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(Ticket.objects.exists())
+
+    def test_book_duplicate_seats(self):
+        payload = {
+            "show_session": self.show_session.id,
+            "seats": [{"row": 1, "seat": 1}, {"row": 1, "seat": 1}],
+        }
+        res = self.client.post(Ticket_Book_URL, payload, format="json")
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(Reservation.objects.exists())
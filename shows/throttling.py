@@ -0,0 +1,74 @@
+from rest_framework import throttling
+
+
+def throttle_cost(view):
+    """Units a request to ``view`` takes from the client's rate, from the
+    view's ``throttle_costs`` by action; one by default."""
+    costs = getattr(view, "throttle_costs", {})
+    return costs.get(getattr(view, "action", None), 1)
+
+
+class SlidingWindowRateThrottle(throttling.SimpleRateThrottle):
+    """SimpleRateThrottle with a sliding window counter: two integer
+    counters per client, for the current and the previous window, the
+    previous one weighted by how much of it still overlaps the last
+    ``duration`` seconds.
+
+    Counters are updated with the cache's atomic increment, so with a
+    shared cache (REDIS_URL) every worker counts against the same limit,
+    and a request's cost (see ``throttle_cost``) is taken in one step."""
+
+    def allow_request(self, request, view):
+        if self.rate is None:
+            return True
+
+        self.key = self.get_cache_key(request, view)
+        if self.key is None:
+            return True
+
+        self.cost = throttle_cost(view)
+        self.now = self.timer()
+        window, elapsed = divmod(self.now, self.duration)
+        self.overlap = 1 - elapsed / self.duration
+        current_key = f"{self.key}:{int(window)}"
+        self.previous = self.cache.get(f"{self.key}:{int(window) - 1}", 0)
+        self.current = self.add_cost(current_key)
+        if self.previous * self.overlap + self.current > self.num_requests:
+            # Hand the units back, a refused request is not counted.
+            self.current = self.cache.decr(current_key, self.cost)
+            return self.throttle_failure()
+        return self.throttle_success()
+
+    def add_cost(self, key):
+        try:
+            return self.cache.incr(key, self.cost)
+        except ValueError:
+            # Each window counter lives on as the next one's previous.
+            if self.cache.add(key, self.cost, 2 * self.duration):
+                return self.cost
+            return self.cache.incr(key, self.cost)
+
+    def throttle_success(self):
+        return True
+
+    def wait(self):
+        """Seconds until the previous window has slid out far enough for
+        the request to fit, or until the next window when the current
+        one alone leaves no room."""
+        remaining = self.overlap * self.duration
+        room = self.num_requests - self.current - self.cost
+        if room < 0 or not self.previous:
+            return remaining
+        return max(remaining - room / self.previous * self.duration, 0)
+
+
+class AnonRateThrottle(
+    SlidingWindowRateThrottle, throttling.AnonRateThrottle
+):
+    pass
+
+
+class UserRateThrottle(
+    SlidingWindowRateThrottle, throttling.UserRateThrottle
+):
+    pass
@@ -1,12 +1,15 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
+
+from .async_views import AsyncCatalogView
 from .views import (
     AstronomyShowViewSet,
     ShowThemeViewSet,
     PlanetariumDomeViewSet,
     ShowSessionViewSet,
     TicketViewSet,
-    ReservationViewSet
+    ReservationViewSet,
+    SeatHoldViewSet,
 )
 
 router = DefaultRouter()
@@ -16,10 +19,39 @@ router.register("planetarium-domes", PlanetariumDomeViewSet)
 router.register("show-sessions", ShowSessionViewSet)
 router.register("tickets", TicketViewSet)
 router.register("reservations", ReservationViewSet)
+router.register("seat-holds", SeatHoldViewSet)
 
+# Async read endpoints for ASGI deployments, named after the routes they
+# mirror.
+async_urlpatterns = [
+    path(
+        f"{prefix}/{route}",
+        AsyncCatalogView.as_view(viewset_class=viewset, action=action),
+        name=f"async-{basename}-{name}",
+    )
+    for prefix, viewset, basename in (
+        ("astronomy-shows", AstronomyShowViewSet, "astronomyshow"),
+        ("show-themes", ShowThemeViewSet, "showtheme"),
+        ("planetarium-domes", PlanetariumDomeViewSet, "planetariumdome"),
+        ("show-sessions", ShowSessionViewSet, "showsession"),
+    )
+    for route, action, name in (
+        ("", "list", "list"),
+        ("<int:pk>/", "retrieve", "detail"),
+    )
+] + [
+    path(
+        "show-sessions/<int:pk>/seat-map/",
+        AsyncCatalogView.as_view(
+            viewset_class=ShowSessionViewSet, action="seat_map"
+        ),
+        name="async-showsession-seat-map",
+    ),
+]
 
 urlpatterns = [
     path("", include(router.urls)),
+    path("async/", include(async_urlpatterns)),
 ]
 
 app_name = "shows"
@@ -0,0 +1,106 @@
+from django.core.exceptions import FieldDoesNotExist
+from rest_framework import serializers
+from rest_framework.response import Response
+
+from shows.pagination import ordering_fields
+
+
+def values_lookup(field, queryset):
+    """The values() lookup holding ``field``'s representation, or None
+    when rendering it needs a model instance."""
+    if field.source == "*" or isinstance(
+        field, (serializers.BaseSerializer, serializers.ManyRelatedField)
+    ):
+        return None
+
+    model = queryset.model
+    for index, attr in enumerate(field.source_attrs):
+        last = index == len(field.source_attrs) - 1
+        try:
+            model_field = model._meta.get_field(attr)
+        except FieldDoesNotExist:
+            if index == 0 and last and attr in queryset.query.annotations:
+                return attr
+            return None
+        if not model_field.is_relation:
+            return "__".join(field.source_attrs) if last else None
+        if not (model_field.many_to_one or model_field.one_to_one):
+            return None
+        if not model_field.concrete or (model_field.null and not last):
+            # DRF skips a dotted field whose relation is empty.
+            return None
+        model = model_field.related_model
+
+    lookup = "__".join(field.source_attrs)
+    if isinstance(field, serializers.SlugRelatedField):
+        return f"{lookup}__{field.slug_field}"
+    if isinstance(field, serializers.PrimaryKeyRelatedField):
+        return lookup
+    return None
+
+
+def values_plan(queryset, serializer):
+    """[(field, lookup)] pairs to render ``serializer`` from values()
+    rows, or None if any field needs model instances."""
+    plan = []
+    for field in serializer.fields.values():
+        if field.write_only:
+            continue
+        lookup = values_lookup(field, queryset)
+        if lookup is None:
+            return None
+        plan.append((field, lookup))
+    return plan
+
+
+def render_values(plan, rows):
+    """Represent values() rows the way the serializer represents model
+    instances."""
+    converters = [
+        (
+            field.field_name,
+            lookup,
+            None
+            if isinstance(field, serializers.RelatedField)
+            else field.to_representation,
+        )
+        for field, lookup in plan
+    ]
+    return [
+        {
+            name: (
+                row[lookup]
+                if convert is None or row[lookup] is None
+                else convert(row[lookup])
+            )
+            for name, lookup, convert in converters
+        }
+        for row in rows
+    ]
+
+
+class ValuesListMixin:
+    """List from values() rows instead of model instances whenever the
+    list serializer only emits flat columns; the output is the same."""
+
+    def list(self, request, *args, **kwargs):
+        queryset = self.filter_queryset(self.get_queryset())
+        plan = values_plan(queryset, self.get_serializer())
+        if plan is None:
+            return super().list(request, *args, **kwargs)
+
+        queryset = self.values_queryset(queryset, plan)
+        page = self.paginate_queryset(queryset)
+        if page is not None:
+            return self.get_paginated_response(render_values(plan, page))
+        return Response(render_values(plan, queryset))
+
+    def values_queryset(self, queryset, plan):
+        """values() rows with the planned lookups and the pagination
+        ordering."""
+        return queryset.prefetch_related(None).values(
+            *dict.fromkeys(
+                [lookup for _, lookup in plan]
+                + ordering_fields(self.paginator)
+            )
+        )
@@ -1,23 +1,48 @@
+from datetime import datetime, time, timedelta
+
+from django.db.models import Prefetch, Exists, OuterRef, Count, Sum
+from django.utils.dateparse import parse_date, parse_datetime
 from drf_spectacular.types import OpenApiTypes
 from drf_spectacular.utils import (
     OpenApiParameter, extend_schema, OpenApiExample
 )
-from rest_framework import viewsets, status
+from rest_framework import viewsets, status, mixins
 from rest_framework.decorators import action
-from rest_framework.permissions import IsAuthenticated
+from rest_framework.exceptions import ValidationError
+from rest_framework.permissions import IsAuthenticated, IsAdminUser
 from rest_framework.response import Response
 
+from shows.catalog_cache import CatalogCacheMixin
+from shows.conditional import ConditionalGetMixin
+from shows.export import NDJSONRenderer, CSVRenderer, export_response
+from shows.fieldsets import SparseFieldsetMixin
 from shows.models import (
-    Ticket, AstronomyShow, PlanetariumDome, ShowSession, Reservation, ShowTheme
+    Ticket,
+    AstronomyShow,
+    PlanetariumDome,
+    ShowSession,
+    Reservation,
+    ShowTheme,
+    SeatHold,
 )
+from shows.pagination import IdCursorPagination, ShowSessionCursorPagination
+from shows.scheduling import find_free_slots
 from shows.schemas import ticket_list_schema, astronomy_show_list_schema, \
     planetarium_dome_list_schema, show_session_list_schema, \
-    show_theme_list_schema, reservation_list_schema
+    show_theme_list_schema, reservation_list_schema, \
+    show_session_seat_map_schema, ticket_book_schema, \
+    seat_hold_create_schema, show_session_auto_assign_schema, \
+    ticket_export_schema, reservation_export_schema, \
+    show_session_schedule_schema, planetarium_dome_free_slots_schema
+from shows.seat_map import (
+    get_seat_map, invalidate_seat_maps, find_best_block
+)
 from shows.serializers import (
     TicketSerializer,
     TicketDetailSerializer,
     TicketCreateSerializer,
     TicketListSerializer,
+    TicketBookingSerializer,
     AstronomyShowListSerializer,
     AstronomyShowCreateSerializer,
     PlanetariumDomeListSerializer,
@@ -31,17 +56,106 @@ from shows.serializers import (
     ReservationSerializer,
     ReservationDetailSerializer,
     ReservationCreateSerializer,
-    ShowSessionSerializer
+    ShowSessionSerializer,
+    SeatHoldSerializer,
+    SeatHoldCreateSerializer,
+    AutoAssignSerializer,
+    ShowSessionScheduleSerializer,
+    FreeSlotSerializer,
 )
-
-
-class TicketViewSet(viewsets.ModelViewSet):
+from shows.values_list import ValuesListMixin
+
+
+def parse_show_time(param, value, date_only=False):
+    """Turn a date or datetime query parameter into a datetime so it can
+    be compared with the indexed show_time column directly."""
+    parsed = None
+    try:
+        if not date_only:
+            parsed = parse_datetime(value)
+        if parsed is None:
+            parsed_date = parse_date(value)
+            if parsed_date is not None:
+                parsed = datetime.combine(parsed_date, time.min)
+    except ValueError:
+        pass
+    if parsed is None:
+        expected = "YYYY-MM-DD"
+        if not date_only:
+            expected += " or YYYY-MM-DD HH:MM[:SS]"
+        raise ValidationError({param: f"expected {expected}"})
+    return parsed
+
+
+def filter_ticket_export(queryset, query_params):
+    """Narrow exported tickets to a show session, a dome and a show time
+    range."""
+    show_session = query_params.get("show_session")
+    dome_id = query_params.get("planetarium_dome")
+    after = query_params.get("show_time_after")
+    before = query_params.get("show_time_before")
+
+    if show_session:
+        if not show_session.isdigit():
+            raise ValidationError(
+                {"show_session": "a show session id is required"}
+            )
+        queryset = queryset.filter(show_session_id=show_session)
+    if dome_id:
+        if not dome_id.isdigit():
+            raise ValidationError(
+                {"planetarium_dome": "a dome id is required"}
+            )
+        queryset = queryset.filter(show_session__planetarium_dome_id=dome_id)
+    if after:
+        queryset = queryset.filter(
+            show_session__show_time__gte=parse_show_time(
+                "show_time_after", after
+            )
+        )
+    if before:
+        queryset = queryset.filter(
+            show_session__show_time__lt=parse_show_time(
+                "show_time_before", before
+            )
+        )
+    return queryset
+
+
+TICKET_EXPORT_COLUMNS = {
+    "id": "id",
+    "row": "row",
+    "seat": "seat",
+    "show_session": "show_session",
+    "show_time": "show_session__show_time",
+    "astronomy_show": "show_session__astronomy_show__title",
+    "planetarium_dome": "show_session__planetarium_dome__name",
+    "price": "show_session__price",
+    "reservation": "reservation",
+    "email": "reservation__user__email",
+    "reserved_at": "reservation__created_at",
+}
+
+RESERVATION_EXPORT_COLUMNS = {
+    "id": "id",
+    "email": "user__email",
+    "created_at": "created_at",
+    "ticket_count": Count("tickets"),
+    "total_price": Sum("tickets__show_session__price"),
+}
+
+
+class TicketViewSet(
+    SparseFieldsetMixin, ValuesListMixin, viewsets.ModelViewSet
+):
     queryset = Ticket.objects.select_related(
         'show_session__astronomy_show',
         'show_session__planetarium_dome',
         'reservation__user'
     ).prefetch_related('show_session__astronomy_show__show_theme')
     permission_classes = [IsAuthenticated]
+    pagination_class = IdCursorPagination
+    throttle_costs = {"create": 10, "book": 10}
 
     def get_serializer_class(self):
         if self.action == "list":
@@ -50,11 +164,13 @@ class TicketViewSet(viewsets.ModelViewSet):
             return TicketDetailSerializer
         elif self.action == "create":
             return TicketCreateSerializer
+        elif self.action == "book":
+            return TicketBookingSerializer
         return TicketSerializer
 
     def get_queryset(self):
         queryset = self.queryset.filter(
-            reservation__user=self.request.user).distinct()
+            reservation__user=self.request.user)
         show_session = self.request.query_params.get("show_session")
         reservation = self.request.query_params.get("reservation")
         dome = self.request.query_params.get("planetarium_dome")
@@ -73,15 +189,51 @@ class TicketViewSet(viewsets.ModelViewSet):
 
     def perform_create(self, serializer):
         reservation_obj = Reservation.objects.create(user=self.request.user)
-        serializer.save(reservation=reservation_obj)
+        ticket = serializer.save(reservation=reservation_obj)
+        SeatHold.objects.filter(
+            row=ticket.row,
+            seat=ticket.seat,
+            show_session=ticket.show_session,
+            user=self.request.user,
+        ).delete()
 
     @ticket_list_schema
     def list(self, request, *args, **kwargs):
         return super().list(request, *args, **kwargs)
 
+    @ticket_book_schema
+    @action(methods=["POST"], detail=False, url_path="book")
+    def book(self, request):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        serializer.save()
+        return Response(serializer.data, status=status.HTTP_201_CREATED)
 
-class AstronomyShowViewSet(viewsets.ModelViewSet):
+    @ticket_export_schema
+    @action(
+        methods=["GET"],
+        detail=False,
+        url_path="export",
+        permission_classes=[IsAdminUser],
+        renderer_classes=[NDJSONRenderer, CSVRenderer],
+    )
+    def export(self, request):
+        queryset = filter_ticket_export(
+            Ticket.objects.all(), request.query_params
+        ).order_by("id")
+        return export_response(
+            request, queryset, TICKET_EXPORT_COLUMNS, "tickets"
+        )
+
+
+class AstronomyShowViewSet(
+    ConditionalGetMixin,
+    CatalogCacheMixin,
+    SparseFieldsetMixin,
+    viewsets.ModelViewSet,
+):
     queryset = AstronomyShow.objects.all().prefetch_related("show_theme")
+    catalog_cache_resource = "astronomy_show"
 
     def get_serializer_class(self):
         if self.action == "list":
@@ -104,26 +256,32 @@ class AstronomyShowViewSet(viewsets.ModelViewSet):
         return Response(serializer.data, status=status.HTTP_201_CREATED)
 
     def get_queryset(self):
-        queryset = self.queryset
+        queryset = self.queryset.all()
         show_theme = self.request.query_params.get("show_theme")
         show_name = self.request.query_params.get("show_name")
         description = self.request.query_params.get("description")
+        search = self.request.query_params.get("q")
 
         if show_theme:
-            queryset = queryset.filter(show_theme__name__icontains=show_theme)
+            queryset = queryset.with_theme_name(show_theme)
         if show_name:
             queryset = queryset.filter(title__icontains=show_name)
         if description:
             queryset = queryset.filter(description__icontains=description)
-        return queryset.distinct()
+        if search:
+            queryset = queryset.search(search)
+        return queryset
 
     @astronomy_show_list_schema
     def list(self, request, *args, **kwargs):
         return super().list(request, *args, **kwargs)
 
 
-class PlanetariumDomeViewSet(viewsets.ModelViewSet):
+class PlanetariumDomeViewSet(
+    ConditionalGetMixin, CatalogCacheMixin, viewsets.ModelViewSet
+):
     queryset = PlanetariumDome.objects.all()
+    catalog_cache_resource = "planetarium_dome"
 
     def get_serializer_class(self):
         if self.action == "list":
@@ -133,7 +291,7 @@ class PlanetariumDomeViewSet(viewsets.ModelViewSet):
         return PlanetariumDomeSerializer
 
     def get_queryset(self):
-        queryset = self.queryset
+        queryset = self.queryset.all()
         planetarium_name = self.request.query_params.get("planetarium_name")
         rows = self.request.query_params.get("rows")
         seats_in_row = self.request.query_params.get("seats_in_row")
@@ -144,31 +302,82 @@ class PlanetariumDomeViewSet(viewsets.ModelViewSet):
             queryset = queryset.filter(rows=rows)
         if seats_in_row:
             queryset = queryset.filter(seats_in_row=seats_in_row)
-        return queryset.distinct()
+        return queryset
 
     @planetarium_dome_list_schema
     def list(self, request, *args, **kwargs):
         return super().list(request, *args, **kwargs)
 
+    @planetarium_dome_free_slots_schema
+    @action(methods=["GET"], detail=True, url_path="free-slots")
+    def free_slots(self, request, pk=None):
+        date = request.query_params.get("date")
+        if not date:
+            raise ValidationError({"date": "a date is required"})
+        day_start = parse_show_time("date", date, date_only=True)
+        min_duration = request.query_params.get("min_duration", "0")
+        if not min_duration.isdigit():
+            raise ValidationError(
+                {"min_duration": "a whole number of minutes is required"}
+            )
+        dome = self.get_object()
+        slots = [
+            {"start": start, "end": end}
+            for start, end in find_free_slots(
+                dome.id, day_start, day_start + timedelta(days=1)
+            )
+            if end - start >= timedelta(minutes=int(min_duration))
+        ]
+        return Response(
+            {
+                "planetarium_dome": dome.id,
+                "date": day_start.date(),
+                "free_slots": FreeSlotSerializer(slots, many=True).data,
+            }
+        )
 
-class ShowSessionViewSet(viewsets.ModelViewSet):
-    queryset = ShowSession.objects.all().select_related("astronomy_show",
-                                                        "planetarium_dome")
+
+class ShowSessionViewSet(
+    ConditionalGetMixin,
+    SparseFieldsetMixin,
+    ValuesListMixin,
+    viewsets.ModelViewSet,
+):
+    queryset = ShowSession.objects.with_availability().select_related(
+        "astronomy_show", "planetarium_dome"
+    )
+    pagination_class = ShowSessionCursorPagination
+    conditional_updated_fields = (
+        "updated_at",
+        "astronomy_show__updated_at",
+        "planetarium_dome__updated_at",
+    )
 
     def get_serializer_class(self):
         if self.action == "list":
             return ShowSessionListSerializer
         if self.action == "create":
             return ShowSessionCreateSerializer
+        if self.action == "auto_assign":
+            return AutoAssignSerializer
+        if self.action == "schedule":
+            return ShowSessionScheduleSerializer
         return ShowSessionSerializer
 
     def get_queryset(self):
-        queryset = self.queryset
+        queryset = self.queryset.all()
         show_name = self.request.query_params.get("show_name")
         description = self.request.query_params.get("description")
         planetarium_dome = self.request.query_params.get("name")
-        show_time = self.request.query_params.get("show_time")
+        dome_id = self.request.query_params.get("planetarium_dome")
+        show_date = (
+            self.request.query_params.get("date")
+            or self.request.query_params.get("show_time")
+        )
+        after = self.request.query_params.get("show_time_after")
+        before = self.request.query_params.get("show_time_before")
         price = self.request.query_params.get("price")
+        available = self.request.query_params.get("available__gte")
 
         if show_name:
             queryset = queryset.filter(
@@ -179,38 +388,120 @@ class ShowSessionViewSet(viewsets.ModelViewSet):
         if planetarium_dome:
             queryset = queryset.filter(
                 planetarium_dome__name__icontains=planetarium_dome)
-        if show_time:
-            queryset = queryset.filter(show_time__icontains=show_time)
+        if dome_id:
+            if not dome_id.isdigit():
+                raise ValidationError(
+                    {"planetarium_dome": "a dome id is required"}
+                )
+            queryset = queryset.filter(planetarium_dome_id=dome_id)
+        if show_date:
+            day_start = parse_show_time("date", show_date, date_only=True)
+            queryset = queryset.filter(
+                show_time__gte=day_start,
+                show_time__lt=day_start + timedelta(days=1),
+            )
+        if after:
+            queryset = queryset.filter(
+                show_time__gte=parse_show_time("show_time_after", after)
+            )
+        if before:
+            queryset = queryset.filter(
+                show_time__lt=parse_show_time("show_time_before", before)
+            )
         if price:
             queryset = queryset.filter(price=price)
-        return queryset.distinct()
+        if available:
+            try:
+                available = int(available)
+            except ValueError:
+                raise ValidationError(
+                    {"available__gte": "a whole number is required"}
+                )
+            queryset = queryset.filter(tickets_available__gte=available)
+        return queryset
 
     @show_session_list_schema
     def list(self, request, *args, **kwargs):
         return super().list(request, *args, **kwargs)
 
+    @show_session_seat_map_schema
+    @action(methods=["GET"], detail=True, url_path="seat-map")
+    def seat_map(self, request, pk=None):
+        return Response(get_seat_map(pk, self.get_object))
+
+    @show_session_auto_assign_schema
+    @action(
+        methods=["POST"],
+        detail=True,
+        url_path="auto-assign",
+        permission_classes=[IsAuthenticated],
+    )
+    def auto_assign(self, request, pk=None):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        party_size = serializer.validated_data["party_size"]
+        seat_map = get_seat_map(pk, self.get_object)
+        block = find_best_block(seat_map, party_size)
+        if block is None:
+            raise ValidationError(
+                f"there are no {party_size} adjacent free seats"
+            )
+        row, seats = block
+        return Response(
+            self.get_serializer(
+                {
+                    "show_session": seat_map["show_session"],
+                    "row": row,
+                    "seats": seats,
+                }
+            ).data
+        )
 
-class ShowThemeViewSet(viewsets.ModelViewSet):
+    @show_session_schedule_schema
+    @action(methods=["POST"], detail=False, url_path="schedule")
+    def schedule(self, request):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        serializer.save()
+        return Response(serializer.data, status=status.HTTP_201_CREATED)
+
+
+class ShowThemeViewSet(
+    ConditionalGetMixin, CatalogCacheMixin, viewsets.ModelViewSet
+):
     queryset = ShowTheme.objects.all()
     serializer_class = ShowThemeSerializer
+    catalog_cache_resource = "show_theme"
 
     def get_queryset(self):
-        queryset = self.queryset
+        queryset = self.queryset.all()
         name = self.request.query_params.get("name")
 
         if name:
             queryset = queryset.filter(name__icontains=name)
-        return queryset.distinct()
+        return queryset
 
     @show_theme_list_schema
     def list(self, request, *args, **kwargs):
         return super().list(request, *args, **kwargs)
 
 
-class ReservationViewSet(viewsets.ModelViewSet):
-    queryset = Reservation.objects.all().select_related('user')
+class ReservationViewSet(SparseFieldsetMixin, viewsets.ModelViewSet):
+    queryset = Reservation.objects.all().select_related(
+        "user"
+    ).prefetch_related(
+        Prefetch(
+            "tickets",
+            queryset=Ticket.objects.select_related(
+                "show_session__astronomy_show",
+                "show_session__planetarium_dome",
+            ).prefetch_related("show_session__astronomy_show__show_theme"),
+        )
+    )
     serializer_class = ReservationSerializer
     permission_classes = [IsAuthenticated]
+    pagination_class = IdCursorPagination
+    throttle_costs = {"create": 10}
 
     def get_serializer_class(self):
         if self.action in ("list", "retrieve"):
@@ -221,11 +512,58 @@ class ReservationViewSet(viewsets.ModelViewSet):
 
     def get_queryset(self):
         email = self.request.query_params.get("email")
-        queryset = self.queryset
+        queryset = self.queryset.all()
         if email:
             queryset = queryset.filter(user__email__icontains=email)
-        return queryset.filter(user=self.request.user).distinct()
+        return queryset.filter(user=self.request.user)
 
     @reservation_list_schema
     def list(self, request, *args, **kwargs):
         return super().list(request, *args, **kwargs)
+
+    @reservation_export_schema
+    @action(
+        methods=["GET"],
+        detail=False,
+        url_path="export",
+        permission_classes=[IsAdminUser],
+        renderer_classes=[NDJSONRenderer, CSVRenderer],
+    )
+    def export(self, request):
+        """Reservations with a ticket matching the filters, with their
+        ticket count and total price."""
+        tickets = filter_ticket_export(
+            Ticket.objects.filter(reservation=OuterRef("pk")),
+            request.query_params,
+        )
+        queryset = Reservation.objects.filter(Exists(tickets)).order_by("id")
+        return export_response(
+            request, queryset, RESERVATION_EXPORT_COLUMNS, "reservations"
+        )
+
+
+class SeatHoldViewSet(
+    mixins.CreateModelMixin,
+    mixins.ListModelMixin,
+    mixins.DestroyModelMixin,
+    viewsets.GenericViewSet,
+):
+    queryset = SeatHold.objects.all()
+    permission_classes = [IsAuthenticated]
+    throttle_costs = {"create": 5}
+
+    def get_serializer_class(self):
+        if self.action == "create":
+            return SeatHoldCreateSerializer
+        return SeatHoldSerializer
+
+    def get_queryset(self):
+        return self.queryset.active().filter(user=self.request.user)
+
+    def perform_destroy(self, instance):
+        super().perform_destroy(instance)
+        invalidate_seat_maps(instance.show_session_id)
+
+    @seat_hold_create_schema
+    def create(self, request, *args, **kwargs):
+        return super().create(request, *args, **kwargs)
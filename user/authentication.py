@@ -0,0 +1,103 @@
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.shortcuts import get_object_or_404
+from django.utils.translation import gettext_lazy as _
+from drf_spectacular.contrib.rest_framework_simplejwt import SimpleJWTScheme
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+
+from user.models import TokenUser
+from user.tokens import TOKEN_VERSION_CLAIM
+
+# Stored instead of a version once a user is deleted; no token has it.
+DELETED_USER = -1
+
+
+def token_version_key(user_id):
+    return f"user:{user_id}:token_version"
+
+
+def user_cache_key(user_id):
+    return f"user:{user_id}"
+
+
+def publish_token_version(user_id, token_version):
+    """Tell every worker the user's current token version. Tokens issued
+    before the entry expire with it, so it only has to outlive access
+    tokens."""
+    cache.set(
+        token_version_key(user_id),
+        token_version,
+        settings.SIMPLE_JWT["ACCESS_TOKEN_LIFETIME"].total_seconds(),
+    )
+
+
+def current_token_version(user_id):
+    """The user's token version, DELETED_USER for deleted or inactive
+    users. A cache miss is filled from the database, for a short while
+    only, since a worker with a private cache does not see the versions
+    other workers publish."""
+    key = token_version_key(user_id)
+    token_version = cache.get(key)
+    if token_version is None:
+        token_version = (
+            get_user_model()
+            .objects.filter(pk=user_id, is_active=True)
+            .values_list("token_version", flat=True)
+            .first()
+        )
+        if token_version is None:
+            token_version = DELETED_USER
+        # add, not set: a version published meanwhile is newer.
+        cache.add(key, token_version, settings.USER_CACHE_TIMEOUT)
+    return token_version
+
+
+def load_user(user_id):
+    """The full user, cached for USER_CACHE_TIMEOUT seconds; for reading
+    only, as the copy may be that old."""
+    key = user_cache_key(user_id)
+    user = cache.get(key)
+    if user is None:
+        user = get_object_or_404(get_user_model(), pk=user_id)
+        cache.set(key, user, settings.USER_CACHE_TIMEOUT)
+    return user
+
+
+class StatelessJWTAuthentication(JWTAuthentication):
+    """Authenticate access tokens as a TokenUser built from their claims,
+    without loading the user. Tokens of a user whose version has been
+    raised since, or who has been deactivated or deleted, are rejected;
+    the version is read from the cache, or the database on a miss.
+
+    Tokens issued without the claims are authenticated the usual way."""
+
+    def get_user(self, validated_token):
+        if TOKEN_VERSION_CLAIM not in validated_token:
+            return super().get_user(validated_token)
+
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError:
+            raise InvalidToken(
+                _("Token contained no recognizable user identification")
+            )
+        token_version = validated_token[TOKEN_VERSION_CLAIM]
+        if current_token_version(user_id) != token_version:
+            raise InvalidToken(_("Token has been revoked"))
+
+        user = TokenUser(
+            id=user_id,
+            is_staff=validated_token.get("is_staff", False),
+            is_superuser=validated_token.get("is_superuser", False),
+            is_active=True,
+            token_version=token_version,
+        )
+        user._state.adding = False
+        return user
+
+
+class StatelessJWTScheme(SimpleJWTScheme):
+    target_class = StatelessJWTAuthentication
@@ -44,7 +44,27 @@ class User(AbstractUser):
     username = None
     email = models.EmailField(_("email address"), unique=True)
 
+    # Part of every token issued to the user; raising it revokes them all.
+    token_version = models.PositiveIntegerField(default=0, editable=False)
+
     USERNAME_FIELD = "email"
     REQUIRED_FIELDS = []
 
     objects = UserManager()
+
+
+class TokenUser(User):
+    """The user an access token was issued to, built from its claims
+    instead of a database query. Only the id, the staff and superuser
+    flags and the token version are known, so it can be filtered and
+    referred to, but not saved; see user.authentication.load_user for
+    the full row."""
+
+    class Meta:
+        proxy = True
+
+    def save(self, *args, **kwargs):
+        raise NotImplementedError("token users are read from their claims")
+
+    def delete(self, *args, **kwargs):
+        raise NotImplementedError("token users are read from their claims")
@@ -1,5 +1,14 @@
 from django.contrib.auth import get_user_model
+from django.utils.translation import gettext_lazy as _
 from rest_framework import serializers
+from rest_framework_simplejwt.exceptions import InvalidToken
+from rest_framework_simplejwt.serializers import (
+    TokenObtainPairSerializer as BaseTokenObtainPairSerializer,
+    TokenRefreshSerializer as BaseTokenRefreshSerializer,
+)
+from rest_framework_simplejwt.settings import api_settings
+
+from user.tokens import TOKEN_VERSION_CLAIM, UserRefreshToken
 
 
 class UserSerializer(serializers.ModelSerializer):
@@ -22,3 +31,25 @@ class UserSerializer(serializers.ModelSerializer):
             user.save()
 
         return user
+
+
+class TokenObtainPairSerializer(BaseTokenObtainPairSerializer):
+    token_class = UserRefreshToken
+
+
+class TokenRefreshSerializer(BaseTokenRefreshSerializer):
+    """Only refresh tokens whose version is still the user's, so a
+    revoked login cannot mint new access tokens."""
+
+    token_class = UserRefreshToken
+
+    def validate(self, attrs):
+        refresh = self.token_class(attrs["refresh"])
+        user = get_user_model().objects.filter(
+            pk=refresh.get(api_settings.USER_ID_CLAIM), is_active=True
+        ).first()
+        if user is None or refresh.get(
+            TOKEN_VERSION_CLAIM, user.token_version
+        ) != user.token_version:
+            raise InvalidToken(_("Token has been revoked"))
+        return super().validate(attrs)
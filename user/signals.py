@@ -0,0 +1,55 @@
+from functools import partial
+
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import F
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from user.authentication import (
+    DELETED_USER,
+    publish_token_version,
+    user_cache_key,
+)
+from user.models import User
+
+# What tokens vouch for: changing any of them revokes the user's tokens.
+TOKEN_FIELDS = ("password", "is_active", "is_staff", "is_superuser")
+
+
+@receiver(pre_save, sender=User)
+def user_changing(sender, instance, update_fields=None, **kwargs):
+    instance.revoke_tokens = False
+    if instance.pk is None or (
+        update_fields is not None
+        and not set(update_fields) & set(TOKEN_FIELDS)
+    ):
+        return
+    stored = User.objects.filter(pk=instance.pk).values(*TOKEN_FIELDS).first()
+    instance.revoke_tokens = stored is not None and any(
+        stored[field] != getattr(instance, field) for field in TOKEN_FIELDS
+    )
+
+
+@receiver(post_save, sender=User)
+def user_saved(sender, instance, **kwargs):
+    cache.delete(user_cache_key(instance.pk))
+    if instance.revoke_tokens:
+        users = User.objects.filter(pk=instance.pk)
+        users.update(token_version=F("token_version") + 1)
+        instance.token_version = users.values_list(
+            "token_version", flat=True
+        ).get()
+        # Only once committed: a rolled back version would revoke every
+        # token of the user, new ones included.
+        transaction.on_commit(
+            partial(publish_token_version, instance.pk, instance.token_version)
+        )
+
+
+@receiver(post_delete, sender=User)
+def user_deleted(sender, instance, **kwargs):
+    cache.delete(user_cache_key(instance.pk))
+    transaction.on_commit(
+        partial(publish_token_version, instance.pk, DELETED_USER)
+    )
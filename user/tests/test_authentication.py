@@ -0,0 +1,206 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import transaction
+from django.test import TestCase
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient, APIRequestFactory
+from rest_framework_simplejwt.tokens import AccessToken
+
+from shows.models import Reservation
+from shows.tests.default_test_data import admin_test, user_test
+from user.authentication import StatelessJWTAuthentication
+from user.models import TokenUser
+
+TOKEN_URL = reverse("user:token_obtain_pair")
+REFRESH_URL = reverse("user:token_refresh")
+ME_URL = reverse("user:manage")
+SHOW_THEME_URL = reverse("shows:showtheme-list")
+
+
+class StatelessJWTAuthenticationTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.user = user_test()
+
+    def obtain_tokens(self, email="default@example.com"):
+        res = self.client.post(
+            TOKEN_URL, {"email": email, "password": "default_password"}
+        )
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        return res.data
+
+    def authenticate(self, access):
+        request = APIRequestFactory().get(
+            "/", HTTP_AUTHORIZATION=f"Bearer {access}"
+        )
+        return StatelessJWTAuthentication().authenticate(request)
+
+    def test_token_user_without_query(self):
+        access = self.obtain_tokens()["access"]
+        self.authenticate(access)
+
+        with self.assertNumQueries(0):
+            user, _ = self.authenticate(access)
+
+        self.assertIsInstance(user, TokenUser)
+        self.assertEqual(user.pk, self.user.pk)
+        self.assertTrue(user.is_authenticated)
+        self.assertFalse(user.is_staff)
+        with self.assertRaises(NotImplementedError):
+            user.save()
+
+    def test_staff_claim_allows_writes(self):
+        admin_test()
+        access = self.obtain_tokens("admin@test.com")["access"]
+
+        res = self.client.post(
+            SHOW_THEME_URL,
+            {"name": "Galaxies"},
+            headers={"authorization": f"Bearer {access}"},
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+
+    def test_token_user_refers_to_the_user(self):
+        user, _ = self.authenticate(self.obtain_tokens()["access"])
+
+        reservation = Reservation.objects.create(user=user)
+
+        self.assertEqual(
+            Reservation.objects.get(user=user).pk, reservation.pk
+        )
+
+    def test_password_change_revokes_tokens(self):
+        tokens = self.obtain_tokens()
+        self.user.set_password("new_password")
+        self.user.save()
+
+        res = self.client.get(
+            SHOW_THEME_URL,
+            headers={"authorization": f"Bearer {tokens['access']}"},
+        )
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+        res = self.client.post(REFRESH_URL, {"refresh": tokens["refresh"]})
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_revocation_survives_cache_loss(self):
+        access = self.obtain_tokens()["access"]
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.set_password("new_password")
+            self.user.save()
+        cache.clear()
+
+        res = self.client.get(
+            SHOW_THEME_URL, headers={"authorization": f"Bearer {access}"}
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_deactivated_user_tokens_are_rejected(self):
+        admin_test()
+        access = self.obtain_tokens("admin@test.com")["access"]
+        get_user_model().objects.filter(email="admin@test.com").update(
+            is_active=False
+        )
+        cache.clear()
+
+        res = self.client.post(
+            SHOW_THEME_URL,
+            {"name": "Galaxies"},
+            headers={"authorization": f"Bearer {access}"},
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_rolled_back_change_keeps_tokens(self):
+        access = self.obtain_tokens()["access"]
+        with self.captureOnCommitCallbacks(execute=True):
+            try:
+                with transaction.atomic():
+                    self.user.set_password("new_password")
+                    self.user.save()
+                    raise RuntimeError
+            except RuntimeError:
+                pass
+
+        res = self.client.get(
+            SHOW_THEME_URL, headers={"authorization": f"Bearer {access}"}
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+    def test_unrelated_changes_keep_tokens(self):
+        access = self.obtain_tokens()["access"]
+        self.user.first_name = "Ada"
+        self.user.save()
+
+        res = self.client.get(
+            SHOW_THEME_URL, headers={"authorization": f"Bearer {access}"}
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+    def test_staff_change_revokes_tokens(self):
+        access = self.obtain_tokens()["access"]
+        self.user.is_staff = True
+        self.user.save()
+
+        res = self.client.get(
+            SHOW_THEME_URL, headers={"authorization": f"Bearer {access}"}
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+        self.assertTrue(
+            self.authenticate(self.obtain_tokens()["access"])[0].is_staff
+        )
+
+    def test_deleted_user_tokens_are_rejected(self):
+        access = self.obtain_tokens()["access"]
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.delete()
+
+        res = self.client.get(
+            SHOW_THEME_URL, headers={"authorization": f"Bearer {access}"}
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_tokens_without_claims_load_the_user(self):
+        access = AccessToken.for_user(self.user)
+
+        with self.assertNumQueries(1):
+            user, _ = self.authenticate(access)
+
+        self.assertEqual(user, self.user)
+        self.assertNotIsInstance(user, TokenUser)
+
+    def test_refresh(self):
+        refresh = self.obtain_tokens()["refresh"]
+
+        res = self.client.post(REFRESH_URL, {"refresh": refresh})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        user, _ = self.authenticate(res.data["access"])
+        self.assertIsInstance(user, TokenUser)
+
+    def test_manage_user_loads_full_user(self):
+        access = self.obtain_tokens()["access"]
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {access}")
+
+        res = self.client.get(ME_URL)
+        self.assertEqual(res.data["email"], "default@example.com")
+
+        with self.assertNumQueries(0):
+            self.client.get(ME_URL)
+
+        res = self.client.patch(ME_URL, {"email": "renamed@example.com"})
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.user.refresh_from_db()
+        self.assertEqual(self.user.email, "renamed@example.com")
+        self.assertTrue(self.user.check_password("default_password"))
+
+        res = self.client.get(ME_URL)
+        self.assertEqual(res.data["email"], "renamed@example.com")
@@ -0,0 +1,24 @@
+from rest_framework_simplejwt.tokens import RefreshToken
+
+TOKEN_VERSION_CLAIM = "token_version"
+
+
+def user_claims(user):
+    """What permission checks need to know about a user, so that
+    requests can be authenticated without loading it."""
+    return {
+        "is_staff": user.is_staff,
+        "is_superuser": user.is_superuser,
+        TOKEN_VERSION_CLAIM: user.token_version,
+    }
+
+
+class UserRefreshToken(RefreshToken):
+    """Refresh token carrying user_claims(); the access tokens made from
+    it copy them."""
+
+    @classmethod
+    def for_user(cls, user):
+        token = super().for_user(user)
+        token.payload.update(user_claims(user))
+        return token
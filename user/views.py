@@ -1,7 +1,9 @@
+from django.contrib.auth import get_user_model
+from django.shortcuts import get_object_or_404
 from rest_framework import generics
-from rest_framework.permissions import IsAuthenticated
-from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework.permissions import SAFE_METHODS, IsAuthenticated
 
+from user.authentication import load_user
 from user.serializers import UserSerializer
 
 
@@ -14,4 +16,8 @@ class ManageUserView(generics.RetrieveUpdateAPIView):
     permission_classes = (IsAuthenticated,)
 
     def get_object(self):
-        return self.request.user
+        # request.user may be a TokenUser; updates start from the stored
+        # row rather than the cached copy.
+        if self.request.method in SAFE_METHODS:
+            return load_user(self.request.user.pk)
+        return get_object_or_404(get_user_model(), pk=self.request.user.pk)